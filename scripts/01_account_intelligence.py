@@ -21,6 +21,53 @@ Triggers:
   - Weekly batch for Tier 1 accounts
   - Monthly for all active accounts
 
+Concurrency (--concurrent):
+  Batch runs fan companies out across a bounded worker pool. Clay and web
+  research for the same company run in parallel; each vendor (clay, web,
+  attio) has its own in-flight limit, and a bounded work queue applies
+  backpressure to company discovery. A progress + throughput summary is
+  logged as the run proceeds.
+
+Enrichment Cache (enrichment_cache.py):
+  Clay + web responses are cached on disk per domain with per-source TTLs,
+  so the monthly refresh reuses anything the weekly Tier 1 run fetched.
+  When the combined response hash matches what was last written to Attio,
+  scoring and the Attio write are skipped. --no-cache bypasses it;
+  --cache-stats prints hit/miss and size figures.
+
+ICP Scoring (icp_scoring.py):
+  icp_definitions.yaml is compiled once into a feature/weight matrix.
+  Single companies and the full book (--mode rescore) are scored with the
+  same vectorized code, so an ICP change can be re-applied to every account
+  from stored ai_enriched_* fields without re-enriching.
+
+Decision Tables (decision_table.py, config/gtm_decision_tables.yaml):
+  Next Best Action and claude_ai_gtm_channel come from declarative,
+  first-match-wins tables compiled into vectorized evaluators. The rule that
+  fired is recorded in gtm_reasoning. --mode rescore re-runs ICP scoring,
+  NBA and channel assignment for every account in one pass. Contact count,
+  lead source, customer flag and open deal stage are fetched per batch
+  (get_decision_context); facts Attio didn't return are left unknown, so
+  rules on them don't fire.
+
+Scheduling (enrichment_scheduler.py):
+  Batch runs pop stale companies from a priority heap (tier, open deal
+  stage, buying-signal freshness, enrichment age) and stop cleanly when the
+  per-run budget is spent: --budget-clay-credits, --budget-web-searches,
+  --budget-minutes. A partial run has enriched the most valuable accounts.
+
+Company Index (company_index.py):
+  Stale-company discovery, --tier filtering and audit mode read a local
+  index of company id → ai_enriched_at. Each run syncs only the records
+  modified since the stored cursor, then answers "stale as of N days" with
+  a range lookup instead of scanning the companies object.
+
+Attio Writes (attio_writer.py):
+  update_attio_fields stages a patch with a write coalescer that drops
+  attributes whose value matches the last known record, merges patches per
+  company and flushes them in bulk on size/time thresholds. A refresh where
+  nothing but ai_enriched_at changed sends only that attribute.
+
 Claude Code Prompt:
   Read the Attio companies object schema. Find all companies where ai_enriched_at
   is null or older than 30 days. For each: enrich via Clay, research via web
@@ -32,15 +79,51 @@ Claude Code Prompt:
 """
 
 import argparse
+import asyncio
+import json
 import logging
+import time
+import numpy as np
 import yaml
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from attio_writer import AttioWriteCoalescer
+from company_index import CompanyIndex
+from decision_table import load_decision_tables
+from enrichment_cache import EnrichmentCache
+from enrichment_scheduler import EnrichmentScheduler, RunBudget
+from icp_scoring import ICPScoringMatrix
+
 # --- Configuration ---
 CONFIG_DIR = Path(__file__).parent.parent / "config"
 logger = logging.getLogger(__name__)
 
+# Max in-flight calls per vendor during concurrent batch runs
+DEFAULT_VENDOR_LIMITS = {"clay": 5, "web": 8, "attio": 4}
+DEFAULT_WORKERS = 16
+PROGRESS_LOG_EVERY = 25
+
+# Empty fields that make a record too thin to act on (→ "Enrich Missing Data")
+CRITICAL_FIELDS = [
+    ("description", "ai_enriched_description"),
+    ("industry", "ai_enriched_industry"),
+    ("employee_count", "ai_enriched_employee_count"),
+]
+ENRICHED_PREFIX = "ai_enriched_"
+
+
+def as_attio_text(value):
+    """Clay / web enrichment value → text for an ai_enriched_* attribute."""
+    if value in (None, "", [], {}):
+        return None
+    if isinstance(value, (list, tuple)) and all(isinstance(v, str) for v in value):
+        return ", ".join(value)
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return str(value)
+
 
 def load_config():
     """Load ICP definitions and Attio schema from config files."""
@@ -54,21 +137,101 @@ def load_config():
 class AccountIntelligenceEngine:
     """Enriches and scores Attio company records."""
 
-    def __init__(self, attio_client, clay_client, search_client):
+    def __init__(self, attio_client, clay_client, search_client, cache=None,
+                 index=None, writer=None):
         self.attio = attio_client
         self.clay = clay_client
         self.search = search_client
+        self.cache = cache
         self.icp_config, self.attio_config = load_config()
+        self.icp_matrix = ICPScoringMatrix(self.icp_config)
+        self.decision_tables = load_decision_tables(self.attio_config)
+        self.ai_fields = [f["slug"] for f in self.attio_config["company_ai_fields"]]
+        self.index = index if index is not None else CompanyIndex(self.ai_fields)
+        self.writer = writer if writer is not None else AttioWriteCoalescer(attio_client)
+        self.budget = None
+        self._channel_options = None
+
+    def get_select_options(self, attribute):
+        """Titles of a companies select attribute's options in Attio, or None."""
+        # TODO: Implement Attio attribute options fetch
+        pass
+
+    def writable_channels(self):
+        """
+        claude_ai_gtm_channel labels that can be written: Attio's live select
+        options, else the decision table's labels if they are confirmed,
+        else none.
+        """
+        if self._channel_options is None:
+            table = self.decision_tables["gtm_channel"]
+            live = self.get_select_options("claude_ai_gtm_channel")
+            if live:
+                self._channel_options = set(live)
+                unknown = sorted(table.options - self._channel_options)
+                if unknown:
+                    logger.warning(f"GTM channels not in Attio, will not be written: {unknown}")
+            elif table.options_confirmed:
+                self._channel_options = set(table.options)
+            else:
+                logger.warning("GTM channel labels are unconfirmed and Attio's options are "
+                               "unavailable; claude_ai_gtm_channel will not be written")
+                self._channel_options = set()
+        return self._channel_options
+
+    def get_company(self, company_id):
+        """Fetch the current Attio company record (name, domain, AI fields)."""
+        # TODO: Implement Attio record fetch
+        pass
+
+    def fetch_company(self, company_id):
+        """get_company, seeding the write coalescer with the record's current AI values."""
+        company = self.get_company(company_id) or {"id": company_id}
+        self.writer.observe(company_id, {f: company[f] for f in self.ai_fields if f in company})
+        return company
+
+    def list_companies(self):
+        """Fetch all company records with their stored ai_enriched_* fields."""
+        # TODO: Implement paginated Attio companies query
+        pass
+
+    def fetch_companies_modified_since(self, cursor):
+        """
+        Query Attio for companies modified at or after `cursor` (ISO timestamp;
+        None = all companies), oldest modification first. Each record carries
+        id, name, domain, tier, updated_at and the AI enrichment fields.
+        """
+        # TODO: Implement paginated Attio query sorted by modification time
+        pass
 
-    def find_stale_companies(self, max_age_days=30):
+    def get_decision_context(self, company_ids):
         """
-        Query Attio for companies where ai_enriched_at is null or older than
-        max_age_days. Returns list of company records to enrich.
+        Decision-table facts that aren't company AI fields, per company id:
+        contact_count (people linked to the company), lead_source,
+        is_customer and deal_stage (open deal stage name, "" if none).
+        One batched query per fact; ids or keys left out are unknown.
         """
-        # TODO: Implement Attio API query
-        # Filter: ai_enriched_at IS NULL OR ai_enriched_at < (now - max_age_days)
+        # TODO: Implement Attio people count + company/deal attribute queries
         pass
 
+    def with_decision_context(self, companies):
+        """Companies merged with get_decision_context for the same ids."""
+        context = self.get_decision_context([c["id"] for c in companies if c.get("id")]) or {}
+        return [{**c, **context.get(c.get("id"), {})} for c in companies]
+
+    def sync_company_index(self):
+        """Pull only records changed since the last run into the local index."""
+        return self.index.sync(self.fetch_companies_modified_since)
+
+    def find_stale_companies(self, max_age_days=30, tier=None):
+        """
+        Find companies where ai_enriched_at is null or older than
+        max_age_days (optionally within one tier), never-enriched first.
+        Answered from the local company index after an incremental sync.
+        """
+        self.sync_company_index()
+        return self.index.stale(max_age_days, tier=tier)
+
     def enrich_via_clay(self, company_domain):
         """
         Call Clay API to get enrichment data:
@@ -91,6 +254,49 @@ class AccountIntelligenceEngine:
         # TODO: Implement web search research
         pass
 
+    def fetch_clay(self, company_domain):
+        """enrich_via_clay, served from the enrichment cache while fresh."""
+        def fetch():
+            self._charge("clay")
+            return self.enrich_via_clay(company_domain)
+        if self.cache is None:
+            return fetch()
+        return self.cache.get_or_fetch("clay", company_domain, fetch)
+
+    def fetch_web(self, company_name, domain):
+        """research_via_web, served from the enrichment cache while fresh."""
+        def fetch():
+            self._charge("web")
+            return self.research_via_web(company_name, domain)
+        if self.cache is None:
+            return fetch()
+        return self.cache.get_or_fetch("web", domain, fetch)
+
+    def _charge(self, vendor):
+        if self.budget is not None:
+            self.budget.spend(vendor)
+
+    def enrichment_unchanged(self, company, clay_data, web_data):
+        """True if this exact Clay + web data was already written to Attio."""
+        return self.cache is not None and self.cache.is_unchanged(
+            company.get("domain"), clay_data, web_data)
+
+    def record_applied(self, company, clay_data, web_data, result):
+        if self.cache is not None:
+            self.cache.mark_applied(company.get("domain"), clay_data, web_data)
+        self.index.mark_enriched(company["id"], result["ai_enriched_at"])
+
+    def touch_enriched(self, company_id):
+        """
+        Unchanged enrichment: write only ai_enriched_at so the company counts
+        as fresh (in Attio and the local index) and isn't picked again until
+        it goes stale.
+        """
+        enriched_at = datetime.utcnow().isoformat()
+        return self.writer.stage(
+            company_id, {"ai_enriched_at": enriched_at},
+            on_written=lambda: self.index.mark_enriched(company_id, enriched_at))
+
     def score_icp_fit(self, company_data, enrichment_data):
         """
         Score company against 3 ICPs:
@@ -100,8 +306,10 @@ class AccountIntelligenceEngine:
 
         Returns: icp_rationale (str), confidence (0-100), icp_match (str)
         """
-        # TODO: Implement ICP scoring logic
-        pass
+        record = dict(company_data)
+        for source in ("clay", "web"):
+            record.update(enrichment_data.get(source) or {})
+        return self.icp_matrix.score_one(record)
 
     def determine_next_best_action(self, company_data, icp_score, buying_signals):
         """
@@ -111,65 +319,359 @@ class AccountIntelligenceEngine:
         - Partner ecosystem match → "Partner Intro Request"
         - Missing critical data → "Enrich Missing Data"
         - Low ICP fit → "Nurture" or "Disqualify"
+
+        icp_score is the (rationale, confidence, icp_match) tuple from
+        score_icp_fit. Rules live in config/gtm_decision_tables.yaml.
         """
-        # TODO: Implement NBA logic
-        pass
+        record = {**company_data, "buying_signals": buying_signals}
+        facts = self.build_decision_facts([record], [icp_score[2]], [icp_score[1]])
+        return str(self.decision_tables["next_best_action"].evaluate(facts)["output"][0])
 
-    def classify_gtm_channel(self, company_data, icp_match):
+    def classify_gtm_channel(self, company_data, icp_match, confidence=0):
         """
         Set claude_ai_gtm_channel from the 16 available options based on
         company profile and ICP match.
         """
-        # TODO: Implement GTM channel classification
-        pass
+        facts = self.build_decision_facts([company_data], [icp_match], [confidence])
+        return str(self.decision_tables["gtm_channel"].evaluate(facts)["output"][0])
+
+    def build_decision_facts(self, companies, icp_match, icp_confidence):
+        """Column arrays of the facts the decision tables condition on."""
+        def signal_count(value):
+            if isinstance(value, (list, tuple)):
+                return len(value)
+            if isinstance(value, str):
+                return len([s for s in value.replace(";", "\n").splitlines() if s.strip()])
+            return 0
+
+        def present(company, names):
+            return any(company.get(n) not in (None, "", [], {}) for n in names)
 
-    def update_attio_fields(self, company_id, enrichment_result):
+        def fact(name, convert=None):
+            # None = not fetched → unknown to the decision tables
+            values = [c.get(name) for c in companies]
+            return np.array([None if v is None else convert(v) if convert else v
+                             for v in values], dtype=object)
+
+        return {
+            "icp_match": np.asarray(icp_match, dtype=object),
+            "icp_confidence": np.asarray(icp_confidence, dtype=float),
+            "buying_signal_count": np.array([signal_count(
+                c.get("buying_signals") or c.get("ai_enriched_buying_signals"))
+                for c in companies]),
+            "contact_count": np.array([np.nan if c.get("contact_count") is None
+                                       else c["contact_count"] for c in companies], dtype=float),
+            "missing_fields": np.array([sum(not present(c, names) for names in CRITICAL_FIELDS)
+                                        for c in companies]),
+            "deal_stage": fact("deal_stage"),
+            "employee_count": self.icp_matrix.employee_counts(companies),
+            "lead_source": fact("lead_source", lambda v: v.lower()),
+            "is_customer": fact("is_customer", bool),
+            "profile": np.array([" ".join(str(c.get(f) or "") for f in (
+                "name", "industry", "ai_enriched_industry", "description",
+                "ai_enriched_description")).lower() for c in companies]),
+        }
+
+    def assign_actions(self, companies, scores):
+        """
+        Evaluate NBA + GTM channel for a batch in one vectorized pass.
+        `scores` is the icp_matrix.score_batch result for the same companies.
+        Returns aligned arrays of Attio field values.
+        """
+        facts = self.build_decision_facts(companies, scores["icp_match"], scores["confidence"])
+        nba = self.decision_tables["next_best_action"].evaluate(facts)
+        channel = self.decision_tables["gtm_channel"].evaluate(facts)
+        gtm_confidence = np.where(np.isnan(channel["confidence"]),
+                                  scores["confidence"], channel["confidence"]).astype(int)
+        reasoning = (
+            "NBA " + nba["output"] + " [" + nba["rule_id"] + "]: " + nba["reason"]
+            + " | Channel " + channel["output"] + " [" + channel["rule_id"] + "]: "
+            + channel["reason"]
+        )
+        return {
+            "next_bext_action": nba["output"],
+            "claude_ai_gtm_channel": channel["output"],
+            "gtm_confidence": gtm_confidence,
+            "gtm_reasoning": reasoning,
+        }
+
+    def update_attio_fields(self, company_id, enrichment_result, on_written=None):
         """
         Update ALL existing Attio AI enrichment fields:
         - ai_account_brief, ai_icp_rationale, ai_personas
         - ai_enriched_pain_points, ai_enriched_buying_signals
         - ai_enriched_tech_stack, ai_enriched_key_people
         - ai_enrichment_confidence, ai_enriched_at
-        - next_bext_action, claude_ai_gtm_channel
+        - next_bext_action, claude_ai_gtm_channel (only labels confirmed
+          by writable_channels)
         - gtm_confidence, gtm_reasoning
+
+        The Clay + web payload under "enrichment" fills the ai_enriched_*
+        attributes (web research wins over Clay) so rescore_all can read
+        them back. icp_match has no Attio attribute; it leads
+        ai_icp_rationale.
+
+        Only attributes that differ from the last known record are sent;
+        patches are coalesced and flushed in bulk by self.writer, and
+        on_written runs once the patch has reached Attio.
         """
-        # TODO: Implement Attio API update
-        pass
+        values = self.enrichment_attributes(enrichment_result.get("enrichment"))
+        values.update({k: v for k, v in enrichment_result.items()
+                       if k in self.ai_fields and v is not None})
+        # A label Attio's select doesn't have would fail the whole write
+        if values.get("claude_ai_gtm_channel") not in self.writable_channels():
+            values.pop("claude_ai_gtm_channel", None)
+        return self.writer.stage(company_id, values, on_written=on_written)
+
+    def enrichment_attributes(self, enrichment):
+        """{"clay": ..., "web": ...} → {ai_enriched_<field>: text} for the schema's fields."""
+        if not enrichment:
+            return {}
+        clay, web = enrichment.get("clay") or {}, enrichment.get("web") or {}
+        values = {}
+        for slug in self.ai_fields:
+            if not slug.startswith(ENRICHED_PREFIX) or slug == "ai_enriched_at":
+                continue
+            key = slug[len(ENRICHED_PREFIX):]
+            text = as_attio_text(web.get(key)) or as_attio_text(clay.get(key))
+            if text is not None:
+                values[slug] = text
+        return values
 
     def process_single(self, company_id):
         """Enrich a single company record end-to-end."""
         logger.info(f"Processing company: {company_id}")
         # 1. Get current Attio record
+        company = self.fetch_company(company_id)
         # 2. Enrich via Clay
+        clay_data = self.fetch_clay(company.get("domain"))
         # 3. Research via web
-        # 4. Score ICP fit
-        # 5. Determine NBA
-        # 6. Classify GTM channel
+        web_data = self.fetch_web(company.get("name"), company.get("domain"))
+        if self.enrichment_unchanged(company, clay_data, web_data):
+            logger.info(f"Enrichment unchanged, refreshing ai_enriched_at only: {company_id}")
+            self.touch_enriched(company_id)
+            return None
+        # 4-6. Score, NBA, channel
+        result = self.build_enrichment_result(company, clay_data, web_data)
         # 7. Update Attio fields
-        pass
+        self.update_attio_fields(
+            company_id, result,
+            on_written=lambda: self.record_applied(company, clay_data, web_data, result))
+        return result
+
+    def build_enrichment_result(self, company, clay_data, web_data):
+        """
+        Combine Clay + web research into the Attio field payload:
+        score ICP fit, determine NBA and classify GTM channel.
+        """
+        enrichment = {"clay": clay_data or {}, "web": web_data or {}}
+        record = self.with_decision_context(
+            [{**company, **enrichment["clay"], **enrichment["web"]}])[0]
+        scores = self.icp_matrix.score_batch([record])
+        actions = self.assign_actions([record], scores)
+        return {
+            "enrichment": enrichment,
+            "ai_icp_rationale": str(scores["rationale"][0]),
+            "ai_enrichment_confidence": int(scores["confidence"][0]),
+            "icp_match": str(scores["icp_match"][0]),
+            **{field: values[0].item() if hasattr(values[0], "item") else values[0]
+               for field, values in actions.items()},
+            "ai_enriched_at": datetime.utcnow().isoformat(),
+        }
 
-    def process_batch(self, tier=None, max_age_days=30):
+    def rescore_all(self, companies=None):
         """
-        Batch process: find stale companies and enrich them.
+        Re-score every company against the current ICP definitions and
+        re-run NBA + GTM channel assignment from stored enrichment fields
+        (no Clay / web / Claude calls), then write the fields back.
+        Returns the vectorized score and action arrays.
+        """
+        companies = companies if companies is not None else (self.list_companies() or [])
+        companies = self.with_decision_context(companies)
+        started = time.monotonic()
+        scores = self.icp_matrix.score_batch(companies)
+        actions = self.assign_actions(companies, scores)
+        logger.info(f"Scored and classified {len(companies)} companies in "
+                    f"{time.monotonic() - started:.2f}s")
+        for i, company in enumerate(companies):
+            self.update_attio_fields(company["id"], {
+                "ai_icp_rationale": str(scores["rationale"][i]),
+                "ai_enrichment_confidence": int(scores["confidence"][i]),
+                "next_bext_action": str(actions["next_bext_action"][i]),
+                "claude_ai_gtm_channel": str(actions["claude_ai_gtm_channel"][i]),
+                "gtm_confidence": int(actions["gtm_confidence"][i]),
+                "gtm_reasoning": str(actions["gtm_reasoning"][i]),
+            })
+        self.writer.flush()
+        return {**scores, **actions}
+
+    def process_batch(self, tier=None, max_age_days=30, budget=None):
+        """
+        Batch process: find stale companies and enrich them, highest
+        priority first, until the optional RunBudget is spent.
         Optional tier filter for prioritization.
         """
-        companies = self.find_stale_companies(max_age_days)
+        scheduler = self._schedule(tier, max_age_days, budget)
+        for company in scheduler:
+            try:
+                self.process_single(company["id"])
+            finally:
+                scheduler.complete(company)
+        self.writer.flush()
+        logger.info(f"Budget: {scheduler.budget.summary()}")
+
+    def process_batch_concurrent(self, tier=None, max_age_days=30, budget=None,
+                                 vendor_limits=None, workers=DEFAULT_WORKERS):
+        """
+        Concurrent batch: same work as process_batch, fanned out across
+        `workers` companies at once with per-vendor in-flight limits.
+        Returns the BatchStats summary dict.
+        """
+        scheduler = self._schedule(tier, max_age_days, budget)
+        runner = ConcurrentBatchRunner(self, vendor_limits, workers)
+        summary = asyncio.run(runner.run(scheduler))
+        self.writer.flush()
+        summary["budget"] = scheduler.budget.summary()
+        return summary
+
+    def _schedule(self, tier, max_age_days, budget):
+        companies = self.find_stale_companies(max_age_days, tier=tier) or []
         logger.info(f"Found {len(companies)} companies to enrich")
-        for company in companies:
-            self.process_single(company["id"])
+        self.budget = budget or RunBudget()
+        return EnrichmentScheduler(companies, self.budget)
 
-    def audit(self):
+    def audit(self, tier=None, max_age_days=30):
         """
         Audit mode: report which companies have empty AI fields without
         making any changes. Useful for Week 1 Day 1 assessment.
         """
-        # TODO: Query all companies, report gaps
-        pass
+        self.sync_company_index()
+        report = self.index.audit(tier=tier, max_age_days=max_age_days)
+        logger.info(f"Audit: {report['total_companies']} companies, "
+                    f"{report['never_enriched']} never enriched, "
+                    f"{report['with_empty_ai_fields']} with empty AI fields")
+        return report
+
+
+class BatchStats:
+    """Progress and throughput counters for a concurrent batch run."""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        self.started = time.monotonic()
+        self.vendor_seconds = {}
+
+    def record_call(self, vendor, seconds):
+        self.vendor_seconds[vendor] = self.vendor_seconds.get(vendor, 0.0) + seconds
+
+    def record_company(self, ok, skipped=False):
+        self.done += 1
+        if not ok:
+            self.failed += 1
+        if skipped:
+            self.skipped += 1
+        if self.done % PROGRESS_LOG_EVERY == 0 or self.done == self.total:
+            elapsed = time.monotonic() - self.started
+            rate = self.done / elapsed if elapsed else 0.0
+            logger.info(f"Progress: {self.done}/{self.total} "
+                        f"({self.failed} failed, {rate:.2f} companies/s)")
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        return {
+            "total": self.total,
+            "completed": self.done - self.failed,
+            "failed": self.failed,
+            "unchanged_skipped": self.skipped,
+            "elapsed_seconds": round(elapsed, 2),
+            "companies_per_minute": round(self.done / elapsed * 60, 1) if elapsed else 0.0,
+            "vendor_seconds": {k: round(v, 2) for k, v in self.vendor_seconds.items()},
+        }
+
+
+class ConcurrentBatchRunner:
+    """
+    Fans AccountIntelligenceEngine work out across many companies at once.
+
+    API clients are synchronous, so each vendor call runs on a shared thread
+    pool; an asyncio.Semaphore per vendor caps in-flight calls, and a bounded
+    queue between discovery and the workers provides backpressure.
+    """
+
+    def __init__(self, engine, vendor_limits=None, workers=DEFAULT_WORKERS):
+        self.engine = engine
+        self.vendor_limits = {**DEFAULT_VENDOR_LIMITS, **(vendor_limits or {})}
+        self.workers = workers
+
+    async def _call(self, vendor, fn, *args):
+        async with self._semaphores[vendor]:
+            loop = asyncio.get_running_loop()
+            start = time.monotonic()
+            try:
+                return await loop.run_in_executor(self._executor, fn, *args)
+            finally:
+                self.stats.record_call(vendor, time.monotonic() - start)
+
+    async def _process_company(self, company):
+        engine = self.engine
+        company_id = company["id"]
+        if not company.get("domain"):
+            company = await self._call("attio", engine.fetch_company, company_id)
+        clay_data, web_data = await asyncio.gather(
+            self._call("clay", engine.fetch_clay, company.get("domain")),
+            self._call("web", engine.fetch_web,
+                       company.get("name"), company.get("domain")),
+        )
+        if engine.enrichment_unchanged(company, clay_data, web_data):
+            await self._call("attio", engine.touch_enriched, company_id)
+            return None
+        result = engine.build_enrichment_result(company, clay_data, web_data)
+        await self._call(
+            "attio", engine.update_attio_fields, company_id, result,
+            lambda: engine.record_applied(company, clay_data, web_data, result))
+        return result
+
+    async def _worker(self, queue, scheduler):
+        while True:
+            company = await queue.get()
+            try:
+                result = await self._process_company(company)
+                self.stats.record_company(ok=True, skipped=result is None)
+            except Exception:
+                logger.exception(f"Enrichment failed for company: {company.get('id')}")
+                self.stats.record_company(ok=False)
+            finally:
+                scheduler.complete(company)
+                queue.task_done()
+
+    async def run(self, scheduler):
+        """Drain an EnrichmentScheduler (highest priority first, within budget)."""
+        self.stats = BatchStats(len(scheduler))
+        self._semaphores = {v: asyncio.Semaphore(n) for v, n in self.vendor_limits.items()}
+        self._executor = ThreadPoolExecutor(max_workers=sum(self.vendor_limits.values()))
+        queue = asyncio.Queue(maxsize=self.workers * 2)
+        tasks = [asyncio.create_task(self._worker(queue, scheduler))
+                 for _ in range(self.workers)]
+        try:
+            for company in scheduler:
+                await queue.put(company)
+            await queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._executor.shutdown(wait=False)
+        summary = self.stats.summary()
+        logger.info(f"Batch summary: {summary}")
+        return summary
 
 
 def main():
     parser = argparse.ArgumentParser(description="Account Intelligence Engine")
-    parser.add_argument("--mode", choices=["single", "batch", "audit"],
+    parser.add_argument("--mode", choices=["single", "batch", "audit", "rescore"],
                         default="batch", help="Execution mode")
     parser.add_argument("--company-id", help="Company ID for single mode")
     parser.add_argument("--tier", type=int, help="Tier filter (1, 2, 3)")
@@ -177,25 +679,74 @@ def main():
                         help="Max enrichment age in days")
     parser.add_argument("--dry-run", action="store_true",
                         help="Preview changes without writing to Attio")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Run batch mode with bounded concurrency")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Companies in flight at once (concurrent mode)")
+    parser.add_argument("--clay-concurrency", type=int,
+                        default=DEFAULT_VENDOR_LIMITS["clay"])
+    parser.add_argument("--web-concurrency", type=int,
+                        default=DEFAULT_VENDOR_LIMITS["web"])
+    parser.add_argument("--attio-concurrency", type=int,
+                        default=DEFAULT_VENDOR_LIMITS["attio"])
+    parser.add_argument("--budget-clay-credits", type=int,
+                        help="Stop the batch once this many Clay credits are spent")
+    parser.add_argument("--budget-web-searches", type=int,
+                        help="Stop the batch once this many web searches are spent")
+    parser.add_argument("--budget-minutes", type=float,
+                        help="Stop dispatching new companies after this many minutes")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the on-disk Clay/web enrichment cache")
+    parser.add_argument("--cache-stats", action="store_true",
+                        help="Print enrichment cache statistics and exit")
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO)
 
+    cache = None if args.no_cache else EnrichmentCache()
+    if args.cache_stats:
+        if cache is None:
+            parser.error("--cache-stats cannot be combined with --no-cache")
+        print(json.dumps(cache.stats(), indent=2))
+        return
+
     # TODO: Initialize API clients
     engine = AccountIntelligenceEngine(
         attio_client=None,  # TODO
         clay_client=None,   # TODO
-        search_client=None  # TODO
+        search_client=None,  # TODO
+        cache=cache,
+        writer=AttioWriteCoalescer(None, dry_run=args.dry_run),
+    )
+
+    budget = RunBudget(
+        clay_credits=args.budget_clay_credits,
+        web_searches=args.budget_web_searches,
+        seconds=args.budget_minutes * 60 if args.budget_minutes else None,
     )
 
     if args.mode == "audit":
-        engine.audit()
+        print(json.dumps(engine.audit(tier=args.tier, max_age_days=args.max_age), indent=2))
+    elif args.mode == "rescore":
+        engine.rescore_all()
     elif args.mode == "single":
         if not args.company_id:
             parser.error("--company-id required for single mode")
         engine.process_single(args.company_id)
+    elif args.concurrent:
+        engine.process_batch_concurrent(
+            tier=args.tier, max_age_days=args.max_age, budget=budget,
+            workers=args.workers,
+            vendor_limits={"clay": args.clay_concurrency,
+                           "web": args.web_concurrency,
+                           "attio": args.attio_concurrency},
+        )
     else:
-        engine.process_batch(tier=args.tier, max_age_days=args.max_age)
+        engine.process_batch(tier=args.tier, max_age_days=args.max_age, budget=budget)
+
+    engine.writer.close()
+    if cache is not None:
+        logger.info(f"Enrichment cache: {cache.stats()['session']}")
 
 
 if __name__ == "__main__":
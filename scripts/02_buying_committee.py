@@ -20,9 +20,25 @@ Triggers:
 Data Flow:
   Attio company (NBA = "Build Buying Committee")
     → Clay: find personas by title + company
-    → Create Attio people records
+    → Classify titles to personas (title_classifier.py)
+    → Resolve against the local contact index (contact_index.py):
+      skip duplicates, merge new data into existing people
+    → Create Attio people records for personas not yet covered
     → Enrich with email + LinkedIn
     → Link people to company record
+
+Dedupe:
+  Before any person is created, each Clay result is resolved against a
+  persisted blocking-key index of Attio people (normalized email, LinkedIn
+  slug, company domain + name / phonetic name), synced incrementally from
+  Attio once per run. This catches the same person under a different email
+  without scanning every contact on the account.
+
+Clay access (clay_batcher.py):
+  Batch mode prefetches people for all target accounts in bulk searches and
+  enriches every created contact in bulk at the end of the run, writing
+  each enrichment back to the Attio person; identical in-flight lookups are
+  shared and repeated domains are served from a short-lived memo.
 """
 
 import argparse
@@ -30,29 +46,28 @@ import logging
 import yaml
 from pathlib import Path
 
+from clay_batcher import ClayBatcher
+from contact_index import ContactIndex
+from title_classifier import TARGET_PERSONAS, TitleClassifier
+
 CONFIG_DIR = Path(__file__).parent.parent / "config"
 logger = logging.getLogger(__name__)
 
-TARGET_PERSONAS = [
-    {"title_keywords": ["VP HR Operations", "Director of Onboarding", "Head of Onboarding"],
-     "persona": "hr_ops"},
-    {"title_keywords": ["Chief People Officer", "CHRO", "VP People"],
-     "persona": "c_suite"},
-    {"title_keywords": ["Head of Compliance", "Director of Compliance", "VP Risk"],
-     "persona": "compliance"},
-    {"title_keywords": ["Director of IT", "Head of Systems", "VP Technology"],
-     "persona": "hr_engineer"},
-    {"title_keywords": ["COO", "Chief Operating Officer", "VP Operations"],
-     "persona": "operations"},
-]
+# Clay matches below this title confidence are not added to the committee
+MIN_PERSONA_CONFIDENCE = 0.6
 
 
 class BuyingCommitteeBuilder:
     """Finds and creates buying committee contacts in Attio."""
 
-    def __init__(self, attio_client, clay_client):
+    def __init__(self, attio_client, clay_client, contact_index=None):
         self.attio = attio_client
         self.clay = clay_client
+        self.classifier = TitleClassifier.from_config(TARGET_PERSONAS)
+        self.contacts = contact_index or ContactIndex()
+        self.clay_batch = ClayBatcher(
+            clay_client, titles=[t for p in TARGET_PERSONAS for t in p["title_keywords"]])
+        self._enrichments = {}   # person_id -> Future of the Clay enrichment
 
     def get_target_accounts(self):
         """
@@ -66,8 +81,9 @@ class BuyingCommitteeBuilder:
         Use Clay to find people matching target persona titles at the company.
         Returns list of contacts with name, title, email, LinkedIn.
         """
-        # TODO: Implement Clay people search
-        pass
+        if not company_domain:
+            return []
+        return self.clay_batch.find_people(company_domain, company_name)
 
     def check_existing_contacts(self, company_id):
         """Check which personas already exist in Attio for this company."""
@@ -82,25 +98,120 @@ class BuyingCommitteeBuilder:
         # TODO: Implement Attio people creation
         pass
 
-    def enrich_contact(self, person_id):
-        """Enrich contact with additional data via Clay."""
-        # TODO: Implement enrichment
+    def merge_attio_person(self, person_id, person_data):
+        """
+        Fill empty fields on an existing Attio person (new email, LinkedIn,
+        title) instead of creating a duplicate.
+        """
+        # TODO: Implement Attio people update
+        pass
+
+    def fetch_people_modified_since(self, cursor):
+        """
+        Attio people modified at or after `cursor` (ISO timestamp; None = all),
+        with id, name, email, linkedin_url, title, company_id, company_domain,
+        updated_at.
+        """
+        # TODO: Query Attio people sorted by updated_at
         pass
 
-    def process_account(self, company_id, company_domain, company_name):
-        """Build buying committee for a single account."""
+    def sync_contact_index(self):
+        """Bring the local contact index up to date with Attio."""
+        return self.contacts.sync(self.fetch_people_modified_since)
+
+    def enrich_contact(self, person_id):
+        """
+        Queue a contact for bulk enrichment via Clay; returns a Future. The
+        result is written to Attio by write_enrichments().
+        """
+        future = self.clay_batch.request_enrichment(person_id)
+        self._enrichments[person_id] = future
+        return future
+
+    def write_enrichments(self):
+        """
+        Send queued Clay enrichments, then fill the enriched email / LinkedIn
+        / phone on each Attio person (and the contact index). Returns the
+        number of people updated.
+        """
+        self.clay_batch.flush_enrichments()
+        pending, self._enrichments = self._enrichments, {}
+        written = 0
+        for person_id, future in pending.items():
+            try:
+                enriched = future.result()
+            except Exception as e:
+                logger.error(f"Clay enrichment failed for {person_id}: {e}")
+                continue
+            if not enriched:
+                continue
+            try:
+                self.merge_attio_person(person_id, enriched)
+            except Exception as e:
+                logger.error(f"Attio update with Clay enrichment failed for {person_id}: {e}")
+                continue
+            self.contacts.merge(person_id, enriched)
+            written += 1
+        if pending:
+            logger.info(f"Clay enrichment: {written}/{len(pending)} contacts updated in Attio")
+        return written
+
+    def process_account(self, company_id, company_domain, company_name, flush=True):
+        """
+        Build buying committee for a single account. With flush=False the
+        queued enrichments are left for the caller (write_enrichments).
+        """
         logger.info(f"Building buying committee for: {company_name}")
-        existing = self.check_existing_contacts(company_id)
-        personas_found = self.find_personas_via_clay(company_domain, company_name)
+        existing = self.check_existing_contacts(company_id) or []
+        personas_found = self.find_personas_via_clay(company_domain, company_name) or []
+        covered = {m.persona for m in self.classifier.classify_batch(
+            [p.get("title") for p in existing]) if m}
         # Create missing personas, enrich all
-        pass
+        created = []
+        matches = self.classifier.classify_batch([p.get("title") for p in personas_found])
+        for person, match in zip(personas_found, matches):
+            if match is None or match.confidence < MIN_PERSONA_CONFIDENCE:
+                continue
+            if match.persona in covered:
+                continue
+            person_data = {**person, "persona": match.persona,
+                           "persona_confidence": match.confidence}
+            resolution = self.contacts.resolve(person_data, company_domain)
+            if resolution.decision == "skip":
+                logger.info(f"Skipping {person.get('name')}: already in Attio "
+                            f"({resolution.matched_on} match)")
+            elif resolution.decision == "merge":
+                self.merge_attio_person(resolution.person_id, person_data)
+                self.contacts.merge(resolution.person_id, person_data, company_domain)
+            else:
+                person_id = self.create_attio_person(person_data, company_id)
+                if not person_id:
+                    # Persona stays uncovered, so a later candidate can fill it
+                    logger.warning(f"Attio create failed for {person.get('name')}")
+                    continue
+                self.contacts.add(person_id, person_data, company_domain, company_id)
+                created.append(person_id)
+            covered.add(match.persona)
+        for person_id in created:
+            self.enrich_contact(person_id)
+        if flush:
+            self.write_enrichments()
+        logger.info(f"{company_name}: created {len(created)} contacts, "
+                    f"personas covered: {sorted(covered)}")
+        return created
 
     def process_batch(self):
         """Process all accounts with NBA = Build Buying Committee."""
-        accounts = self.get_target_accounts()
+        accounts = self.get_target_accounts() or []
+        self.sync_contact_index()
         logger.info(f"Found {len(accounts)} accounts needing buying committees")
+        self.clay_batch.prefetch(accounts)
         for account in accounts:
-            self.process_account(account["id"], account["domain"], account["name"])
+            self.process_account(account["id"], account["domain"], account["name"],
+                                 flush=False)
+        self.write_enrichments()
+        logger.info(f"Contact resolution: {self.contacts.stats}")
+        logger.info(f"Clay: {self.clay_batch.stats}")
 
 
 def main():
@@ -117,6 +228,7 @@ def main():
     if args.mode == "single":
         if not args.company_id:
             parser.error("--company-id required for single mode")
+        builder.sync_contact_index()
         builder.process_account(args.company_id, None, None)
     else:
         builder.process_batch()
@@ -26,26 +26,129 @@ Data Flow:
     → Match contacts to messaging tracks
     → Generate 4-touch sequences
     → Push to ActiveCampaign with tags
+
+Rendering:
+  Subject lines and bodies are compiled once from
+  templates/outbound_sequences.yaml (template_renderer.py) and rendered
+  locally for every contact. Claude only writes the account-specific
+  personalization lines, once per account and messaging track, so a batch
+  of thousands of contacts costs a handful of Claude calls.
+
+Claude calls (sequence_generation.py):
+  Requests share a prompt-cached prefix (messaging framework + cadence, then
+  the account brief), large runs go through the Message Batches API, and
+  responses are memoized by a hash of the exact inputs so re-runs and
+  previews of unchanged accounts are free. Token and latency usage is
+  logged per run.
+
+ActiveCampaign (activecampaign_sync.py):
+  Sequences are staged per contact and flushed as bulk imports over one
+  pooled, rate-limited session, with the tag ID map cached per run and only
+  failed rows retried.
+
+Preview mode:
+  Accounts stream from Attio page by page, are generated by a pool of
+  worker threads, and each finished account is appended to a JSONL file as
+  one line ({company_id, company_name, sequences}) and flushed, so memory
+  stays flat however big the book is.
+    --shard i/n   only accounts whose company-id hash falls in shard i
+                  (0-based), so n processes or machines split the book
+    --resume      skip accounts already in the output file (a line cut off
+                  by a crash is dropped and regenerated)
 """
 
 import argparse
+import hashlib
+import json
 import logging
+import os
 import yaml
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
+from activecampaign_sync import ActiveCampaignSync
+from sequence_generation import PersonalizationGenerator
+from template_renderer import SequenceRenderer
+from title_classifier import TitleClassifier
+
 CONFIG_DIR = Path(__file__).parent.parent / "config"
 TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
 logger = logging.getLogger(__name__)
 
+# Buying-committee personas without their own messaging track
+PERSONA_TRACK_FALLBACK = {"compliance": "c_suite", "operations": "c_suite"}
+SEQUENCE_TAG = "v1-initial"
+# claude_ai_gtm_channel → activecampaign_tags industry tag
+INDUSTRY_TAGS = {
+    "Staffing - Enterprise": "staffing-enterprise",
+    "Staffing - Mid-Market": "staffing-smb",
+    "Staffing - Healthcare": "staffing-healthcare",
+    "Partner - ATS": "partner-ats",
+    "Partner - Payroll": "partner-payroll",
+    "Partner - Background Check": "partner-screening",
+    "Enterprise - Healthcare": "enterprise-healthcare",
+    "Enterprise - Logistics": "enterprise-logistics",
+    "Enterprise - Retail": "enterprise-retail",
+}
+DEFAULT_PREVIEW_WORKERS = 8
+PROGRESS_LOG_EVERY = 100
+
+
+def parse_shard(value):
+    """'i/n' → (i, n), 0 <= i < n."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"--shard must look like i/n, got {value!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"--shard {value}: need 0 <= i < n")
+    return index, count
+
+
+def in_shard(company_id, shard):
+    """Deterministic (process- and machine-independent) shard membership."""
+    if shard is None:
+        return True
+    index, count = shard
+    digest = hashlib.sha1(str(company_id).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count == index
+
+
+def completed_accounts(output_path):
+    """
+    Company ids already written to a preview file. A trailing partial line
+    (crash mid-write) is truncated so appending resumes on a clean line.
+    """
+    path = Path(output_path)
+    if not path.exists():
+        return set()
+    done = set()
+    with open(path, "rb+") as f:
+        good_bytes = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["company_id"])
+            except (ValueError, KeyError):
+                break
+            good_bytes += len(line)
+        f.truncate(good_bytes)
+    return done
+
 
 class OutboundGenerator:
     """Generates personalized outbound email sequences."""
 
-    def __init__(self, attio_client, ac_client, claude_client):
+    def __init__(self, attio_client, ac_client, claude_client, generation_cache=None):
         self.attio = attio_client
-        self.ac = ac_client
+        self.ac = ac_client if ac_client is not None else ActiveCampaignSync()
         self.claude = claude_client
         self.messaging = self._load_messaging_framework()
+        self.classifier = TitleClassifier.from_config()
+        self.renderer = SequenceRenderer.load()
+        self.generation = PersonalizationGenerator(claude_client, self.messaging,
+                                                   self.renderer.cadence, generation_cache)
 
     def _load_messaging_framework(self):
         with open(CONFIG_DIR / "messaging_framework.yaml") as f:
@@ -55,6 +158,30 @@ class OutboundGenerator:
         """Query Attio for companies where next_bext_action = 'Launch Outbound'."""
         pass
 
+    def get_outbound_accounts_page(self, offset, limit):
+        """
+        One page of the get_outbound_accounts query (Attio records query
+        with offset / limit, sorted by record id).
+        """
+        pass
+
+    def iter_outbound_accounts(self, page_size=500):
+        """
+        Stream Launch Outbound companies from Attio page by page; only one
+        page is held in memory. Stops at the first short page.
+        """
+        offset = 0
+        while True:
+            page = self.get_outbound_accounts_page(offset, page_size) or []
+            yield from page
+            if len(page) < page_size:
+                return
+            offset += len(page)
+
+    def get_account(self, company_id):
+        """Get the enriched company record (name, industry, tech stack, tier)."""
+        pass
+
     def get_buying_committee(self, company_id):
         """Get all people records linked to this company."""
         pass
@@ -63,12 +190,27 @@ class OutboundGenerator:
         """
         Match contact title to messaging track:
         - HR Ops, HR Engineer, or C-suite
+        Returns the track key (hr_ops / hr_engineer / c_suite) or None.
         """
-        pass
+        match = self.classifier.classify(contact_title)
+        if match is None:
+            return None
+        track = PERSONA_TRACK_FALLBACK.get(match.persona, match.persona)
+        return track if track in self.messaging["personas"] else None
 
-    def generate_sequence(self, account_data, contact_data, persona_track):
+    def generate_personalization(self, account_data, persona_track):
+        """
+        Ask Claude for the account-specific text only: one short line per
+        touch type (intro / value / differentiation / cta) referencing their
+        ATS, industry pain and recent signals.
+        Returns {touch_type: text}; None falls back to the plain templates.
         """
-        Generate 4-touch email sequence using Claude:
+        return self.generation.generate(account_data, persona_track)
+
+    def generate_sequence(self, account_data, contact_data, persona_track,
+                          personalization=None):
+        """
+        Generate 4-touch email sequence from the compiled templates:
         - Touch 1: Pain-aware intro (reference their ATS + industry pain)
         - Touch 2: Value prop + social proof
         - Touch 3: Competitive differentiation
@@ -79,26 +221,174 @@ class OutboundGenerator:
         - "30-40% improvement in time-to-start"
         - "Data orchestration layer" framing
         - Industry-specific compliance scenarios
+
+        Only `personalization` comes from Claude (generated here if not given).
         """
-        pass
+        if personalization is None:
+            personalization = self.generate_personalization(account_data, persona_track)
+        return self.renderer.render(persona_track, self.renderer.account_values(account_data),
+                                    contact_data, personalization)
+
+    def match_committee(self, contacts):
+        """(contact, track) for every contact with a messaging track."""
+        tracked = []
+        for contact in contacts:
+            track = self.match_persona(contact.get("title"))
+            if track is not None:
+                tracked.append((contact, track))
+        return tracked
+
+    def generate_sequences(self, account_data, contacts, personalization=None):
+        """
+        Stream (contact, persona_track, sequence) for an account's contacts.
+        `personalization` maps track → Claude text; missing tracks are
+        generated together in one grouped call. Contacts without a messaging
+        track are skipped.
+        """
+        tracked = self.match_committee(contacts)
+        personalization = dict(personalization or {})
+        missing = sorted({track for _, track in tracked} - personalization.keys())
+        if missing:
+            generated = self.generation.generate_many([(account_data, t) for t in missing])
+            personalization.update(zip(missing, generated))
+        account_values = self.renderer.account_values(account_data)
+        tracks = {id(contact): track for contact, track in tracked}
+        items = ((track, account_values, contact, personalization[track])
+                 for contact, track in tracked)
+        for contact, sequence in self.renderer.render_batch(items):
+            yield contact, tracks[id(contact)], sequence
+
+    def build_tags(self, account_data, persona_track):
+        """
+        ActiveCampaign tags for a contact's sequence: persona, sequence
+        version, ICP tier and industry (from the account's GTM channel; none
+        for channels without an industry segment).
+        """
+        account_data = account_data or {}
+        tags = [persona_track.replace("_", "-"), SEQUENCE_TAG]
+        tier = account_data.get("tier")
+        if tier:
+            tags.append(f"tier-{tier}")
+        industry = INDUSTRY_TAGS.get(account_data.get("claude_ai_gtm_channel"))
+        if industry:
+            tags.append(industry)
+        return tags
 
-    def push_to_activecampaign(self, contact_email, sequence, tags):
+    def push_to_activecampaign(self, contact, sequence, tags):
         """
-        Push generated sequence to ActiveCampaign with proper tagging:
+        Stage a generated sequence for ActiveCampaign with proper tagging:
         - ICP tier tag
         - Industry tag
         - Persona tag
         - Sequence version tag
+        Staged contacts go out in bulk on flush_activecampaign().
         """
-        pass
+        self.ac.stage(contact, sequence, tags)
 
-    def process_account(self, company_id):
-        """Generate and push outbound for a single account."""
-        pass
+    def flush_activecampaign(self):
+        """Bulk import everything staged; returns emails that still failed."""
+        failed = self.ac.flush()
+        if failed:
+            logger.error(f"{len(failed)} contacts failed to sync to ActiveCampaign: "
+                         f"{failed[:10]}")
+        return failed
 
-    def process_batch(self):
-        """Process all accounts with NBA = Launch Outbound."""
-        pass
+    def process_account(self, company_id, dry_run=False, account=None, contacts=None,
+                        personalization=None, flush=True):
+        """
+        Generate and push outbound for a single account. With flush=False the
+        staged contacts are left for the caller to push in bulk.
+        """
+        account = account or self.get_account(company_id) or {"id": company_id}
+        if contacts is None:
+            contacts = self.get_buying_committee(company_id) or []
+        pushed = 0
+        for contact, track, sequence in self.generate_sequences(account, contacts,
+                                                                personalization):
+            if not dry_run:
+                self.push_to_activecampaign(contact, sequence, self.build_tags(account, track))
+            pushed += 1
+        if flush and not dry_run:
+            self.flush_activecampaign()
+        logger.info(f"{account.get('name', company_id)}: {pushed} sequences "
+                    f"{'generated' if dry_run else 'queued for ActiveCampaign'}")
+        return pushed
+
+    def process_batch(self, dry_run=False):
+        """
+        Process all accounts with NBA = Launch Outbound. Personalization for
+        every (account, track) is requested up front so it goes out as one
+        Claude batch.
+        """
+        accounts = self.get_outbound_accounts() or []
+        committees = {a["id"]: self.get_buying_committee(a["id"]) or [] for a in accounts}
+        jobs = [(account, track) for account in accounts
+                for track in sorted({t for _, t in self.match_committee(committees[account["id"]])})]
+        generated = self.generation.generate_many(jobs)
+        personalization = {}
+        for (account, track), lines in zip(jobs, generated):
+            personalization.setdefault(account["id"], {})[track] = lines
+        for account in accounts:
+            self.process_account(account["id"], dry_run, account, committees[account["id"]],
+                                 personalization.get(account["id"], {}), flush=False)
+        if not dry_run:
+            self.flush_activecampaign()
+        logger.info(f"Claude usage: {self.generation.usage.summary()}")
+
+    def preview_account(self, account):
+        """One preview JSONL record for an account (no ActiveCampaign push)."""
+        company_id = account["id"]
+        account = {**(self.get_account(company_id) or {}), **account}
+        contacts = self.get_buying_committee(company_id) or []
+        sequences = [{"email": contact.get("email"), "name": contact.get("name"),
+                      "title": contact.get("title"), "persona_track": track,
+                      "tags": self.build_tags(account, track), "touches": sequence}
+                     for contact, track, sequence in self.generate_sequences(account, contacts)]
+        return {"company_id": company_id, "company_name": account.get("name"),
+                "sequences": sequences}
+
+    def preview(self, output_path, shard=None, resume=False,
+                workers=DEFAULT_PREVIEW_WORKERS):
+        """
+        Stream preview sequences to JSONL (see module docstring). Returns
+        (accounts written, accounts skipped as already done).
+        """
+        done = completed_accounts(output_path) if resume else set()
+        if not resume and Path(output_path).exists():
+            Path(output_path).unlink()
+        accounts = (a for a in self.iter_outbound_accounts()
+                    if in_shard(a["id"], shard) and a["id"] not in done)
+        written = failed = 0
+        with open(output_path, "a", encoding="utf-8") as out, \
+                ThreadPoolExecutor(max_workers=workers) as pool:
+            in_flight = {}
+            while True:
+                # Keep a bounded window of accounts in flight
+                for account in accounts:
+                    in_flight[pool.submit(self.preview_account, account)] = account["id"]
+                    if len(in_flight) >= workers * 2:
+                        break
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    company_id = in_flight.pop(future)
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        logger.error(f"Preview failed for {company_id}: {e}")
+                        failed += 1
+                        continue
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    written += 1
+                    if written % PROGRESS_LOG_EVERY == 0:
+                        os.fsync(out.fileno())
+                        logger.info(f"Preview: {written} accounts written")
+        logger.info(f"Preview: {written} accounts written to {output_path}, "
+                    f"{len(done)} already done, {failed} failed; "
+                    f"Claude usage: {self.generation.usage.summary()}")
+        return written, len(done)
 
 
 def main():
@@ -107,6 +397,14 @@ def main():
     parser.add_argument("--company-id", help="Company ID for single mode")
     parser.add_argument("--dry-run", action="store_true",
                         help="Generate sequences but don't push to ActiveCampaign")
+    parser.add_argument("--output", help="Preview JSONL path "
+                        "(default outbound_preview[.shard-i-of-n].jsonl)")
+    parser.add_argument("--shard", type=parse_shard, metavar="i/n",
+                        help="Preview only shard i (0-based) of n, by company-id hash")
+    parser.add_argument("--resume", action="store_true",
+                        help="Preview: skip accounts already in the output file")
+    parser.add_argument("--workers", type=int, default=DEFAULT_PREVIEW_WORKERS,
+                        help="Preview worker threads")
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO)
@@ -116,12 +414,13 @@ def main():
     )
 
     if args.mode == "single":
-        generator.process_account(args.company_id)
+        generator.process_account(args.company_id, dry_run=args.dry_run)
     elif args.mode == "preview":
-        # Generate and print without pushing
-        pass
+        output = args.output or ("outbound_preview.jsonl" if args.shard is None else
+                                 "outbound_preview.shard-{}-of-{}.jsonl".format(*args.shard))
+        generator.preview(output, args.shard, args.resume, args.workers)
     else:
-        generator.process_batch()
+        generator.process_batch(dry_run=args.dry_run)
 
 
 if __name__ == "__main__":
@@ -19,37 +19,148 @@ Data Flow:
   Google Calendar (today's meetings)
     → For each attendee:
       ├── Attio: company record, deal record, people record
-      ├── Google Drive: Fathom transcripts (search by company/person)
+      ├── Fathom transcripts: top passages for company/person (local index)
       ├── Gmail: recent threads with attendee
       └── Attio: notes, tasks
     → Generate prep brief
     → Save to Google Drive + Attio note
 
 Triggers:
+  - Hourly (--warm): pre-generates briefs for meetings in the next
+    WARM_DAYS_AHEAD days as they appear on the calendar
   - Daily at 7 AM Pacific
-  - On-demand
+  - On-demand (--meeting-id)
+
+Concurrency:
+  All attendee lookups run at once, across attendees and across sources:
+  each attendee's Attio lookup and Gmail search start together, and as soon
+  as Attio returns the company, that attendee's Fathom search and the deal
+  context (once per company) follow. Clients are synchronous, so calls run
+  on a shared thread pool with an asyncio.Semaphore per source. A source's
+  slot is freed when its thread finishes, not when the deadline abandons
+  the call, so slow vendors can't fill the pool and starve later meetings.
+  Meetings are prepared MEETING_CONCURRENCY at a time.
+
+  Each meeting has a deadline: MEETING_DEADLINE_SECONDS, cut short so the
+  brief is ready PREP_LEAD_MINUTES before the meeting starts. Sources that
+  haven't answered by then (or failed) are left out and the brief carries a
+  "missing section" marker instead of waiting. Per-source latency, timeouts
+  and errors are logged for every run.
+
+Transcripts:
+  Fathom transcripts are searched in a local BM25 passage index
+  (transcript_index.py) rather than with Drive full-text search. The index
+  pulls only docs modified since its last sync once per run, and briefs get
+  the top TRANSCRIPT_EXCERPTS passages (speaker + timestamp) instead of
+  whole transcripts.
+
+Attendee resolution:
+  Attendee → Attio person / company / deal lookups go through the identity
+  cache shared with Script 5 (identity_cache.py). Every run first resolves
+  all uncached attendees in one bulk Attio query; repeat attendees,
+  internal addresses and known-unknown domains never reach Attio.
+  Attendees whose email isn't on an Attio person (a personal address, a
+  new alias) are matched by name in the local name index of Attio people
+  (contact_index.py), scoped to the companies already known on the invite.
+
+Brief cache:
+  Generated briefs are kept per calendar event with a fingerprint of each
+  input (Attio record versions, transcript ids, email thread ids, deal
+  stage; see brief_cache.py). Every run still gathers the inputs, but Claude
+  is only called for briefs whose fingerprints changed; unchanged briefs
+  are reused and not re-saved. On-demand requests for a meeting verified
+  within BRIEF_FRESH_SECONDS return the stored brief without any lookups.
 """
 
 import argparse
+import asyncio
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
 from pathlib import Path
 
+from brief_cache import BRIEF_FRESH_SECONDS, BriefCache, input_fingerprints
+from contact_index import ContactIndex
+from identity_cache import MISS, IdentityCache
+from transcript_index import TranscriptIndex
+
 CONFIG_DIR = Path(__file__).parent.parent / "config"
 TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
 logger = logging.getLogger(__name__)
 
+# Max in-flight calls per source
+SOURCE_LIMITS = {"attio": 4, "fathom": 3, "gmail": 4, "deal": 4}
+MEETING_CONCURRENCY = 4
+MEETING_DEADLINE_SECONDS = 90
+# Briefs must be ready this long before the meeting starts...
+PREP_LEAD_MINUTES = 10
+# ...but every meeting gets at least this long to gather data
+MIN_MEETING_SECONDS = 10
+SECTION_SOURCES = {"attendees": "attio", "relationship_history": "fathom",
+                   "email_threads": "gmail", "deal_status": "deal"}
+MISSING_SECTION_MARKER = "_[Missing: {source} did not respond before the prep deadline]_"
+TRANSCRIPT_EXCERPTS = 5
+WARM_DAYS_AHEAD = 2
+
+
+class SourceLatency:
+    """Per-source call latency and outcome counters for a run."""
+
+    def __init__(self):
+        self.seconds = {}
+        self.outcomes = {}
+
+    def record(self, source, seconds, outcome):
+        self.seconds.setdefault(source, []).append(seconds)
+        counts = self.outcomes.setdefault(source, {"ok": 0, "error": 0, "timeout": 0})
+        counts[outcome] += 1
+
+    def record_timeout(self, source, count=1):
+        counts = self.outcomes.setdefault(source, {"ok": 0, "error": 0, "timeout": 0})
+        counts["timeout"] += count
+
+    def summary(self):
+        summary = {}
+        for source, counts in self.outcomes.items():
+            latencies = sorted(self.seconds.get(source, []))
+            pct = lambda p: round(latencies[min(int(p * len(latencies)), len(latencies) - 1)], 3)
+            summary[source] = {**counts, **({"p50": pct(0.5), "p95": pct(0.95),
+                                             "max": round(latencies[-1], 3)}
+                                            if latencies else {})}
+        return summary
+
+
+def meeting_deadline(meeting, budget=MEETING_DEADLINE_SECONDS):
+    """Monotonic deadline for gathering a meeting's data."""
+    seconds = budget
+    start = meeting.get("start")
+    if start:
+        starts_at = datetime.fromisoformat(str(start).replace("Z", "+00:00")).timestamp()
+        until_lead = starts_at - PREP_LEAD_MINUTES * 60 - time.time()
+        seconds = max(min(budget, until_lead), MIN_MEETING_SECONDS)
+    return time.monotonic() + seconds
+
 
 class MeetingPrepGenerator:
     """Generates meeting prep briefs from multi-source data."""
 
     def __init__(self, calendar_client, attio_client, gdrive_client,
-                 gmail_client, claude_client):
+                 gmail_client, claude_client, source_limits=None,
+                 deadline_seconds=MEETING_DEADLINE_SECONDS, transcript_index=None,
+                 brief_cache=None, identity_cache=None, contact_index=None):
         self.calendar = calendar_client
         self.attio = attio_client
         self.gdrive = gdrive_client
         self.gmail = gmail_client
         self.claude = claude_client
+        self.source_limits = {**SOURCE_LIMITS, **(source_limits or {})}
+        self.deadline_seconds = deadline_seconds
+        self.latency = SourceLatency()
+        self.transcripts = transcript_index or TranscriptIndex()
+        self.briefs = brief_cache or BriefCache()
+        self.identities = identity_cache or IdentityCache()
+        self.contacts = contact_index or ContactIndex()
 
     def get_todays_external_meetings(self):
         """
@@ -58,17 +169,50 @@ class MeetingPrepGenerator:
         """
         pass
 
+    def get_upcoming_external_meetings(self, days_ahead=WARM_DAYS_AHEAD):
+        """
+        Query Google Calendar for external meetings from now through
+        days_ahead, same filtering as get_todays_external_meetings.
+        """
+        pass
+
     def lookup_attendee_in_attio(self, email, name):
         """Find person + linked company in Attio by email or name."""
         pass
 
-    def search_fathom_transcripts(self, company_name, person_name):
+    def lookup_attendees_in_attio(self, emails, domains):
+        """
+        One Attio query for a whole day's attendees: people whose email is in
+        `emails` (with linked company + open deal) and companies whose domain
+        is in `domains`. Returns {"people": {email: profile},
+        "companies": {domain: company}}.
+        """
+        pass
+
+    def fetch_people_modified_since(self, cursor):
         """
-        Search Google Drive Fathom folder for transcripts mentioning
-        the company or person. Returns relevant transcript excerpts.
+        Attio people modified at or after `cursor` (ISO timestamp; None = all),
+        with id, name, email, company_id, updated_at.
         """
         pass
 
+    def match_by_name(self, name, company_ids):
+        """Attio profile for an attendee via the local name index, or None."""
+        match = self.contacts.best_name_match(name, company_ids)
+        if match is None:
+            return None
+        profile = self.identities.resolve(match.email, match.name, self.lookup_attendee_in_attio)
+        return profile or {"id": match.person_id, "name": match.name, "email": match.email,
+                           "company": {"id": match.company_id} if match.company_id else None}
+
+    def search_fathom_transcripts(self, company_name, person_name):
+        """
+        Top Fathom transcript passages mentioning the company or person,
+        from the local index: [{title, speaker, timestamp, excerpt, ...}].
+        """
+        hits = self.transcripts.search([company_name, person_name], k=TRANSCRIPT_EXCERPTS)
+        return [hit._asdict() for hit in hits]
+
     def search_recent_emails(self, attendee_email, days_back=30):
         """Search Gmail for recent threads with this attendee."""
         pass
@@ -78,10 +222,11 @@ class MeetingPrepGenerator:
         pass
 
     def generate_brief(self, meeting_data, attendee_profiles, deal_context,
-                       transcript_excerpts, email_history):
+                       transcript_excerpts, email_history, missing_sections=None):
         """
         Generate structured 1-page meeting prep brief using Claude.
-        Uses meeting_prep_brief.md template.
+        Uses meeting_prep_brief.md template. Sections in missing_sections
+        (see SECTION_SOURCES) render MISSING_SECTION_MARKER instead of content.
         """
         pass
 
@@ -89,16 +234,247 @@ class MeetingPrepGenerator:
         """Save brief to Google Drive and create Attio note."""
         pass
 
-    def process_meeting(self, meeting):
-        """Generate prep brief for a single meeting."""
-        pass
+    # --- Concurrent fan-out ---
+
+    async def _call(self, source, fn, *args):
+        semaphore = self._semaphores[source]
+        await semaphore.acquire()
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+
+        def finished(_):
+            # Runs in the worker thread once the call is over (or cancelled
+            # unstarted). A call abandoned at the deadline keeps its slot
+            # until here, so abandoned calls still count per source. After
+            # the run the loop is closed and there is nothing to release.
+            if loop.is_closed():
+                return
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                pass   # closed since the check
+
+        try:
+            call = self._executor.submit(fn, *args)
+        except RuntimeError:
+            semaphore.release()
+            raise
+        call.add_done_callback(finished)
+        try:
+            result = await asyncio.wrap_future(call)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.latency.record(source, time.monotonic() - start, "error")
+            logger.warning(f"{source} lookup failed: {e}")
+            raise
+        self.latency.record(source, time.monotonic() - start, "ok")
+        return result
+
+    async def _fetch(self, found, failed, source, key, fn, *args):
+        """One lookup; stores the result under found[source][key] or counts a failure."""
+        try:
+            found[source][key] = await self._call(source, fn, *args)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            failed[source] += 1
+
+    def _invite_companies(self, meeting, attendees):
+        """Attio company ids already known for a meeting (cache only, no lookups)."""
+        company_ids = {meeting["company_id"]} if meeting.get("company_id") else set()
+        for a in attendees:
+            profile = self.identities.peek(a.get("email"), a.get("name"))
+            if profile and profile is not MISS and (profile.get("company") or {}).get("id"):
+                company_ids.add(profile["company"]["id"])
+        return company_ids
+
+    async def _gather_attendee(self, attendee, meeting, found, failed, deal_tasks,
+                               invite_companies):
+        email, name = attendee.get("email"), attendee.get("name")
+        profile = self.identities.get(email, name)
+        if profile is MISS:
+            await self._fetch(found, failed, "attio", email, self.identities.fetch,
+                              email, name, self.lookup_attendee_in_attio)
+        else:
+            found["attio"][email] = profile
+        profile = found["attio"].get(email) or {}
+        company = profile.get("company") or {}
+        if not profile.get("id") and not self.identities.is_internal(email):
+            scope = invite_companies | ({company["id"]} if company.get("id") else set())
+            try:
+                matched = scope and await self._call("attio", self.match_by_name,
+                                                     name or email, scope)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                matched = None
+            if matched:
+                found["attio"][email] = profile = matched
+                company = profile.get("company") or company
+        company_name = company.get("name") or meeting.get("company_name")
+        company_id = company.get("id")
+        calls = [self._fetch(found, failed, "fathom", email, self.search_fathom_transcripts,
+                             company_name, name)]
+        if company_id:
+            if company_id not in deal_tasks:
+                deal_tasks[company_id] = asyncio.ensure_future(self._fetch(
+                    found, failed, "deal", company_id, self.get_deal_context, company_id))
+            calls.append(asyncio.shield(deal_tasks[company_id]))
+        await asyncio.gather(*calls)
+
+    async def gather_meeting(self, meeting, deadline):
+        """
+        Fan out every lookup for a meeting and wait until `deadline`
+        (monotonic). Returns the gathered data plus the brief sections whose
+        source failed or didn't answer in time.
+        """
+        attendees = [a for a in meeting.get("attendees", []) if a.get("email")]
+        found = {source: {} for source in SOURCE_LIMITS}
+        failed = {source: 0 for source in SOURCE_LIMITS}
+        deal_tasks = {}
+        invite_companies = self._invite_companies(meeting, attendees)
+        tasks = [asyncio.ensure_future(self._gather_attendee(a, meeting, found, failed,
+                                                             deal_tasks, invite_companies))
+                 for a in attendees]
+        tasks += [asyncio.ensure_future(self._fetch(found, failed, "gmail", a["email"],
+                                                    self.search_recent_emails, a["email"]))
+                  for a in attendees]
+        if tasks:
+            await asyncio.wait(tasks, timeout=max(deadline - time.monotonic(), 0))
+            everything = [*tasks, *deal_tasks.values()]
+            for task in everything:
+                task.cancel()
+            await asyncio.gather(*everything, return_exceptions=True)
+        expected = {"attio": len(attendees), "fathom": len(attendees),
+                    "gmail": len(attendees), "deal": len(deal_tasks)}
+        missing = set()
+        for source, count in expected.items():
+            timed_out = count - len(found[source]) - failed[source]
+            if timed_out > 0:
+                self.latency.record_timeout(source, timed_out)
+            if len(found[source]) < count:
+                missing.add(source)
+        # Attendees Attio never placed may belong to a deal we couldn't look up
+        if "attio" in missing and not found["deal"]:
+            missing.add("deal")
+        return {
+            "attendee_profiles": [found["attio"].get(a["email"]) or
+                                  {"email": a["email"], "name": a.get("name")}
+                                  for a in attendees],
+            "deal_context": next(iter(found["deal"].values()), None),
+            "transcript_excerpts": [x for x in found["fathom"].values() if x],
+            "email_history": [x for x in found["gmail"].values() if x],
+            "missing_sections": sorted(section for section, source in SECTION_SOURCES.items()
+                                       if source in missing),
+        }
+
+    async def _process_meetings(self, meetings, force=False):
+        self._semaphores = {s: asyncio.Semaphore(n) for s, n in self.source_limits.items()}
+        # Source calls hold their slot until the thread returns, so they never
+        # need more than sum(limits) threads; the spare two are for briefs
+        self._executor = ThreadPoolExecutor(max_workers=sum(self.source_limits.values()) + 2)
+        gate = asyncio.Semaphore(MEETING_CONCURRENCY)
+
+        async def one(meeting):
+            async with gate:
+                started = time.monotonic()
+                data = await self.gather_meeting(
+                    meeting, meeting_deadline(meeting, self.deadline_seconds))
+                if data["missing_sections"]:
+                    logger.warning(f"{meeting.get('title', meeting.get('id'))}: missing "
+                                   f"{data['missing_sections']} at the deadline")
+                fingerprints = input_fingerprints(meeting, data)
+                cached = self.briefs.get(meeting["id"]) if meeting.get("id") else None
+                changed = self.briefs.changed_inputs(cached, fingerprints)
+                if cached and not changed and not force:
+                    self.briefs.verify(meeting["id"])
+                    logger.info(f"Brief for {meeting.get('title', meeting.get('id'))} "
+                                f"unchanged, reused")
+                    return cached.brief
+                if cached:
+                    logger.info(f"Regenerating {meeting.get('title', meeting.get('id'))}: "
+                                f"{changed or ['forced']} changed")
+                loop = asyncio.get_running_loop()
+                brief = await loop.run_in_executor(
+                    self._executor, lambda: self.generate_brief(
+                        meeting, data["attendee_profiles"], data["deal_context"],
+                        data["transcript_excerpts"], data["email_history"],
+                        data["missing_sections"]))
+                await loop.run_in_executor(
+                    self._executor, self.save_brief, brief, meeting.get("company_name"),
+                    meeting.get("start"))
+                if brief is not None and meeting.get("id"):
+                    self.briefs.put(meeting, fingerprints, brief)
+                logger.info(f"Prepped {meeting.get('title', meeting.get('id'))} in "
+                            f"{time.monotonic() - started:.1f}s")
+                return brief
+
+        try:
+            return await asyncio.gather(*(one(m) for m in meetings), return_exceptions=True)
+        finally:
+            # Abandoned (timed-out) calls may still be running; don't wait on
+            # them, and drop any that never started
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def process_meeting(self, meeting, force=False, max_age=BRIEF_FRESH_SECONDS):
+        """
+        Prep brief for a single meeting. A brief verified within max_age is
+        returned straight from the cache; otherwise its inputs are re-checked.
+        """
+        if not force and meeting.get("id"):
+            brief = self.briefs.fresh(meeting["id"], max_age)
+            if brief is not None:
+                logger.info(f"Brief for {meeting['id']} served from cache")
+                return brief
+            cached = self.briefs.get(meeting["id"])
+            if cached:
+                # --meeting-id passes only the id; reuse the stored event details
+                meeting = {**cached.meeting, **meeting}
+        return self.process_meetings([meeting], force=force)[0]
+
+    def process_meetings(self, meetings, force=False):
+        """
+        Prep several meetings concurrently; returns briefs (or exceptions).
+        Claude is only called for briefs whose inputs changed, unless force.
+        """
+        try:
+            self.transcripts.sync(self.gdrive)
+        except Exception as e:
+            logger.warning(f"Transcript index sync failed, searching stale index: {e}")
+        try:
+            self.contacts.sync(self.fetch_people_modified_since)
+        except Exception as e:
+            logger.warning(f"Contact index sync failed, matching names against stale index: {e}")
+        try:
+            self.identities.warm([(a.get("email"), a.get("name")) for m in meetings
+                                  for a in m.get("attendees", []) if a.get("email")],
+                                 self.lookup_attendees_in_attio)
+        except Exception as e:
+            logger.warning(f"Attendee warm-up failed, resolving one by one: {e}")
+        results = asyncio.run(self._process_meetings(meetings, force))
+        for meeting, result in zip(meetings, results):
+            if isinstance(result, Exception):
+                logger.error(f"Prep failed for {meeting.get('id')}: {result}")
+        logger.info(f"Source latency: {self.latency.summary()}")
+        logger.info(f"Brief cache: {self.briefs.stats}")
+        logger.info(f"Identity cache: {self.identities.stats}")
+        logger.info(f"Contact index: {self.contacts.stats}")
+        return results
 
-    def process_today(self):
+    def process_today(self, force=False):
         """Generate prep briefs for all of today's external meetings."""
-        meetings = self.get_todays_external_meetings()
+        meetings = self.get_todays_external_meetings() or []
         logger.info(f"Found {len(meetings)} external meetings today")
-        for meeting in meetings:
-            self.process_meeting(meeting)
+        return self.process_meetings(meetings, force)
+
+    def warm(self, days_ahead=WARM_DAYS_AHEAD):
+        """Pre-generate briefs for upcoming meetings; only changed ones hit Claude."""
+        meetings = self.get_upcoming_external_meetings(days_ahead) or []
+        logger.info(f"Warming briefs for {len(meetings)} meetings in the next {days_ahead} days")
+        results = self.process_meetings(meetings)
+        logger.info(f"Pruned {self.briefs.prune()} past briefs")
+        return results
 
 
 def main():
@@ -106,19 +482,28 @@ def main():
     parser.add_argument("--date", help="Date to prep for (YYYY-MM-DD, default: today)")
     parser.add_argument("--meeting-id", help="Specific meeting ID")
     parser.add_argument("--output-dir", help="Override output directory")
+    parser.add_argument("--deadline-seconds", type=int, default=MEETING_DEADLINE_SECONDS,
+                        help="Max seconds to gather data per meeting")
+    parser.add_argument("--warm", action="store_true",
+                        help="Pre-generate briefs for upcoming meetings")
+    parser.add_argument("--days-ahead", type=int, default=WARM_DAYS_AHEAD)
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerate briefs even if no input changed")
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO)
 
     generator = MeetingPrepGenerator(
         calendar_client=None, attio_client=None, gdrive_client=None,
-        gmail_client=None, claude_client=None
+        gmail_client=None, claude_client=None, deadline_seconds=args.deadline_seconds
     )
 
     if args.meeting_id:
-        generator.process_meeting({"id": args.meeting_id})
+        generator.process_meeting({"id": args.meeting_id}, force=args.force)
+    elif args.warm:
+        generator.warm(args.days_ahead)
     else:
-        generator.process_today()
+        generator.process_today(force=args.force)
 
 
 if __name__ == "__main__":
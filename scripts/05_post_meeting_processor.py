@@ -24,34 +24,136 @@ Data Flow:
       ├── Draft follow-up email
       └── If new people mentioned → trigger Script 2
 
+Extraction:
+  A rule-based pass (pre_extraction.py) first fills competitor mentions,
+  ATS and volume figures without a model, and cuts the transcript down to
+  the turns around signals that need judgement (amounts, dates, action
+  phrases, decision / objection / stakeholder cues). Only those windows go
+  to Claude, map-reduce style (transcript_extraction.py): speaker-aware
+  chunks in parallel, partial results merged and de-duplicated with the
+  rule-based fields. Tokens saved and per-chunk timings are logged.
+
+Participant matching:
+  Participants are resolved through the identity cache shared with
+  Script 4 (identity_cache.py): uncached emails go to Attio in one bulk
+  query per transcript, repeat attendees are answered from the cache.
+  The scope comes from the Fathom meeting metadata (calendar invitee
+  emails and the companies on the invite). Speakers known only by a
+  display name ("Jen M.", "jennifer.m") are matched in the local name
+  index of Attio people (contact_index.py), scoped to those companies plus
+  any matched by email. With no scope at all, full names are matched
+  across Attio, but a company inferred that way never gets company-level
+  writes (note, deal, tasks, stakeholders). The index is synced once per
+  batch.
+
+Idempotency:
+  A ledger (transcript_ledger.py) keyed by Drive doc id + content hash
+  records the extracted intelligence and each finished step (note, deal
+  update, tasks, follow-up draft, stakeholder hand-off). Batches skip
+  finished transcripts without downloading them, partially failed ones
+  resume at the failed step, and a transcript is only reprocessed when
+  Fathom edits its content.
+
+Backfill:
+  --mode backfill runs the historical transcripts (all by default) through
+  a pipeline of thread pools (Drive reads, Claude extraction, Attio writes),
+  so reads and extraction for later transcripts overlap the writes for
+  earlier ones. The ledger is the checkpoint: a crash or Ctrl-C loses at
+  most the in-flight steps, and rerunning resumes. Attio writes share one
+  token bucket (ATTIO_WRITE_RATE) and Claude calls one in-flight cap
+  (CLAUDE_CONCURRENCY) across all workers. Throughput and an ETA are
+  logged every PROGRESS_LOG_SECONDS; transcripts skipped as empty or
+  already done are counted apart from incomplete ones.
+
 Triggers:
   - On-demand after each meeting
   - Daily batch at 6 PM Pacific
+  - One-off historical backfill (--mode backfill)
 """
 
 import argparse
 import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, date
 from pathlib import Path
 
+from activecampaign_sync import TokenBucket
+from contact_index import ContactIndex
+from enrichment_cache import content_hash
+from identity_cache import IdentityCache
+from pre_extraction import PreExtractor
+from transcript_extraction import TranscriptExtractor, empty_intelligence, merge_intelligence
+from transcript_index import iter_turns
+from transcript_ledger import TranscriptLedger
+
 CONFIG_DIR = Path(__file__).parent.parent / "config"
 TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
 logger = logging.getLogger(__name__)
 
+# Side-effecting steps, in order; each is recorded in the ledger once done
+PROCESSING_STEPS = ("note", "deal", "tasks", "follow_up", "stakeholders")
+# Attio write requests each step makes (tasks: one per action item)
+ATTIO_WRITES = {"note": lambda items: 1, "deal": lambda items: 1,
+                "tasks": lambda items: len(items)}
+ATTIO_WRITE_RATE = 10.0       # write requests / second, across all workers
+CLAUDE_CONCURRENCY = 8        # Claude calls in flight, across all workers
+BACKFILL_WORKERS = 8
+PROGRESS_LOG_SECONDS = 30
+
+
+class BackfillProgress:
+    """Throughput + ETA for a backfill run, logged every PROGRESS_LOG_SECONDS."""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        self.started = time.monotonic()
+        self.logged = self.started
+
+    def record(self, ok, skipped=False):
+        self.done += 1
+        self.skipped += 1 if skipped else 0
+        self.failed += 0 if ok or skipped else 1
+        if time.monotonic() - self.logged >= PROGRESS_LOG_SECONDS or self.done == self.total:
+            self.logged = time.monotonic()
+            logger.info(f"Backfill {self.summary()}")
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        per_minute = self.done / elapsed * 60 if elapsed else 0.0
+        remaining = self.total - self.done
+        eta = remaining / per_minute * 60 if per_minute else None
+        eta_text = (f"{int(eta // 3600)}h{int(eta % 3600 // 60):02d}m" if eta is not None
+                    else "unknown")
+        return (f"{self.done}/{self.total} ({self.failed} incomplete, {self.skipped} skipped), "
+                f"{per_minute:.1f} transcripts/min, ETA {eta_text}")
+
 
 class PostMeetingProcessor:
     """Processes Fathom transcripts and updates Attio."""
 
-    def __init__(self, gdrive_client, attio_client, claude_client):
+    def __init__(self, gdrive_client, attio_client, claude_client, identity_cache=None,
+                 ledger=None, attio_write_rate=ATTIO_WRITE_RATE, contact_index=None,
+                 claude_concurrency=CLAUDE_CONCURRENCY):
         self.gdrive = gdrive_client
         self.attio = attio_client
         self.claude = claude_client
+        self.identities = identity_cache or IdentityCache()
+        self.contacts = contact_index or ContactIndex()
+        self.pre_extractor = PreExtractor.from_config(CONFIG_DIR)
+        self.extractor = TranscriptExtractor(claude_client, max_in_flight=claude_concurrency)
+        self.ledger = ledger or TranscriptLedger(PROCESSING_STEPS)
+        self.attio_bucket = TokenBucket(attio_write_rate, max(int(attio_write_rate), 1))
 
     def find_recent_transcripts(self, since_date=None):
         """
         Search Google Drive Fathom folder for recent transcripts.
         Match by meeting title/date. Fathom docs typically titled:
-        "Meeting Title - Date"
+        "Meeting Title - Date". since_date None returns every transcript in
+        the folder. Returns [{id, title, modifiedTime}].
         """
         pass
 
@@ -61,7 +163,9 @@ class PostMeetingProcessor:
 
     def extract_intelligence(self, transcript_text):
         """
-        Use Claude to extract structured data from transcript:
+        Extract structured data from the transcript (a string or any
+        iterable of lines): rule-based fields first, then Claude on the
+        windows around unresolved signals, chunk by chunk in parallel:
         - decisions: list of decisions made
         - action_items: [{owner, task, deadline}]
         - objections: list of concerns/pushback
@@ -70,13 +174,94 @@ class PostMeetingProcessor:
         - next_steps: [{action, timing, owner}]
         - deal_stage_signal: "advance" | "hold" | "regress"
         - new_stakeholders: [{name, title, role_in_deal}]
+
+        Returns None if any Claude chunk failed, so nothing partial is saved.
+        """
+        scan = self.pre_extractor.scan(transcript_text)
+        extracted = self.extractor.extract(scan.windows) if scan.windows else empty_intelligence()
+        if extracted is None:
+            return None
+        return merge_intelligence([scan.fields, extracted])
+
+    def get_meeting_metadata(self, doc_id, meeting_title):
+        """
+        Fathom meeting metadata for a transcript (matched to the calendar
+        event): {"attendee_emails": [...], "company_ids": [...]} with the
+        invitees' emails and the Attio companies on the invite, or None.
+        """
+        pass
+
+    def lookup_attendee_in_attio(self, email, name):
+        """Find person + linked company in Attio by email or name."""
+        pass
+
+    def lookup_attendees_in_attio(self, emails, domains):
+        """
+        One Attio query for people whose email is in `emails` (with linked
+        company + open deal) and companies whose domain is in `domains`.
+        Returns {"people": {email: profile}, "companies": {domain: company}}.
         """
         pass
 
-    def match_to_attio_records(self, attendee_names, attendee_emails):
-        """Match transcript participants to Attio people + company records."""
+    def fetch_people_modified_since(self, cursor):
+        """
+        Attio people modified at or after `cursor` (ISO timestamp; None = all),
+        with id, name, email, company_id, updated_at.
+        """
         pass
 
+    def sync_contact_index(self):
+        """Bring the local name index of Attio people up to date."""
+        try:
+            self.contacts.sync(self.fetch_people_modified_since)
+        except Exception as e:
+            logger.warning(f"Contact index sync failed, matching names against stale index: {e}")
+
+    def match_by_name(self, name, company_ids=None):
+        """Attio profile for a display name via the local name index, or None."""
+        match = self.contacts.best_name_match(name, company_ids)
+        if match is None:
+            return None
+        profile = self.identities.resolve(match.email, match.name, self.lookup_attendee_in_attio)
+        return profile or {"id": match.person_id, "name": match.name, "email": match.email,
+                           "company": {"id": match.company_id} if match.company_id else None}
+
+    def match_to_attio_records(self, attendee_names, attendee_emails, company_ids=None):
+        """
+        Match transcript participants to Attio people + company records.
+        Emails are resolved first; names not covered by an email match are
+        matched in the name index, scoped to company_ids (the companies on
+        the invite, when known) plus the companies matched so far. With no
+        scope at all, full names are matched first and their companies
+        scope the rest; every name match made that way is returned flagged
+        "inferred": True, since its company was never confirmed by an email
+        or the invite. Returns the matched profiles.
+        """
+        emails = [e for e in attendee_emails or [] if e]
+        self.identities.warm([(e, None) for e in emails], self.lookup_attendees_in_attio)
+        matched = [p for p in (self.identities.resolve(e, None, self.lookup_attendee_in_attio)
+                               for e in emails) if p]
+        known = {(p.get("name") or "").lower() for p in matched}
+        names = [n for n in dict.fromkeys(attendee_names or []) if n and n.lower() not in known]
+        scope = set(company_ids or ()) | {
+            p["company"]["id"] for p in matched if (p.get("company") or {}).get("id")}
+        inferred = not scope
+        if inferred:
+            for name in list(names):
+                profile = self.match_by_name(name)
+                if profile:
+                    matched.append({**profile, "inferred": True})
+                    names.remove(name)
+                    if (profile.get("company") or {}).get("id"):
+                        scope.add(profile["company"]["id"])
+        for name in names:
+            profile = self.match_by_name(name, scope) if scope else None
+            if profile:
+                matched.append({**profile, "inferred": True} if inferred else profile)
+            else:
+                logger.debug(f"No Attio person for speaker {name!r}")
+        return matched
+
     def create_attio_note(self, company_id, structured_summary):
         """Create a structured note on the company record in Attio."""
         pass
@@ -103,32 +288,177 @@ class PostMeetingProcessor:
         """If new stakeholders mentioned, trigger Script 2 for those people."""
         pass
 
-    def process_transcript(self, doc_id, meeting_title):
-        """Process a single Fathom transcript end-to-end."""
+    # --- Pipeline stages (read → extract → Attio writes) ---
+
+    def read_stage(self, doc_id, meeting_title, modified_at=None):
+        """Read + open the ledger entry; None if empty or already processed."""
+        text = self.read_transcript(doc_id)
+        if not text:
+            logger.warning(f"Transcript {meeting_title} is empty or unreadable")
+            return None
+        entry = self.ledger.begin(doc_id, content_hash(text), meeting_title, modified_at)
+        if entry.status == "done":
+            logger.info(f"Already processed: {meeting_title}")
+            return None
+        return entry, text
+
+    def extract_stage(self, entry, text, meeting_title):
+        """
+        Intelligence for the entry (kept in the ledger, so a resume doesn't
+        re-extract). None if extraction failed: nothing is saved and the
+        transcript is retried on the next run.
+        """
+        if entry.intelligence is not None:
+            return entry.intelligence
+        if self.claude is None:
+            logger.warning(f"No Claude client configured; {meeting_title} not processed")
+            return None
+        intelligence = self.extract_intelligence(text)
+        if intelligence is None:
+            logger.error(f"{meeting_title}: extraction failed, retrying next run")
+            self.ledger.mark_failed(entry.doc_id, "extract", "Claude extraction failed")
+            return None
+        self.ledger.save_intelligence(entry.doc_id, intelligence)
+        return intelligence
+
+    def write_stage(self, entry, text, meeting_title, intelligence):
+        """
+        Match participants (scoped by the meeting metadata), then run every
+        step the ledger doesn't have yet. Company-level steps are skipped
+        when no participant's company is confirmed by an email or the
+        invite. Attio writes are rate limited across all workers. Returns
+        True once every step is done; a failed step stops here.
+        """
+        meeting = self.get_meeting_metadata(entry.doc_id, meeting_title) or {}
+        speakers = sorted({speaker for speaker, _, _ in iter_turns(text) if speaker})
+        participants = self.match_to_attio_records(
+            speakers, meeting.get("attendee_emails") or [], meeting.get("company_ids"))
+        confirmed = [p for p in participants if not p.get("inferred")]
+        company_id = next((p["company"]["id"] for p in confirmed
+                           if (p.get("company") or {}).get("id")),
+                          next(iter(meeting.get("company_ids") or []), None))
+        deal_id = next((p["deal"].get("id") for p in confirmed if p.get("deal")), None)
+        if company_id is None:
+            logger.warning(f"{meeting_title}: no company confirmed by the invite or an "
+                           f"email; skipping note, deal, tasks and stakeholders")
+        stakeholders = intelligence.get("new_stakeholders")
+        action_items = intelligence.get("action_items") or []
+        actions = {
+            "note": lambda: company_id and self.create_attio_note(company_id, intelligence),
+            "deal": lambda: deal_id and self.update_deal(deal_id, intelligence),
+            "tasks": lambda: company_id and self.create_tasks(action_items, company_id),
+            "follow_up": lambda: self.draft_follow_up_email(intelligence, participants),
+            "stakeholders": lambda: company_id and stakeholders and (
+                self.trigger_buying_committee_builder(stakeholders, company_id)),
+        }
+        for step in PROCESSING_STEPS:
+            if step in entry.done_steps:
+                continue
+            for _ in range(ATTIO_WRITES.get(step, lambda i: 0)(action_items)):
+                self.attio_bucket.acquire()
+            try:
+                actions[step]()
+            except Exception as e:
+                logger.error(f"{meeting_title}: {step} failed, resuming there next run: {e}")
+                self.ledger.mark_failed(entry.doc_id, step, e)
+                return False
+            self.ledger.mark_done(entry.doc_id, step)
+        return True
+
+    def process_transcript(self, doc_id, meeting_title, modified_at=None):
+        """
+        Process a single Fathom transcript end-to-end. Steps the ledger
+        already has for this content are skipped; a failed step stops here
+        and is the first one retried on the next run.
+        """
         logger.info(f"Processing transcript: {meeting_title}")
         # 1. Read transcript
+        read = self.read_stage(doc_id, meeting_title, modified_at)
+        if read is None:
+            return None
+        entry, text = read
         # 2. Extract intelligence
-        # 3. Match to Attio records
-        # 4. Create note
-        # 5. Update deal
-        # 6. Create tasks
-        # 7. Draft follow-up
-        # 8. Handle new stakeholders
-        pass
+        intelligence = self.extract_stage(entry, text, meeting_title)
+        if intelligence is None:
+            return None
+        # 3. Match to Attio records, 4-8. note, deal, tasks, follow-up, new stakeholders
+        return intelligence if self.write_stage(entry, text, meeting_title, intelligence) else None
 
     def process_batch(self, since_date=None):
         """Find and process all unprocessed transcripts."""
-        transcripts = self.find_recent_transcripts(since_date)
-        logger.info(f"Found {len(transcripts)} transcripts to process")
-        for t in transcripts:
-            self.process_transcript(t["id"], t["title"])
+        transcripts = self.find_recent_transcripts(since_date) or []
+        pending = [t for t in transcripts
+                   if not self.ledger.is_done(t["id"], t.get("modifiedTime"))]
+        logger.info(f"Found {len(transcripts)} transcripts, {len(pending)} to process "
+                    f"({len(transcripts) - len(pending)} already done)")
+        if pending:
+            self.sync_contact_index()
+        for t in pending:
+            self.process_transcript(t["id"], t["title"], t.get("modifiedTime"))
+        logger.info(f"Transcript ledger: {self.ledger.stats()}")
+        logger.info(f"Contact index: {self.contacts.stats}")
 
-    def backfill(self, count=5):
+    def backfill(self, count=None, workers=BACKFILL_WORKERS):
         """
-        Backfill mode: process the N most recent transcripts.
-        Useful for Week 1 catch-up.
+        Backfill mode: process the N most recent transcripts (all if count
+        is None), pipelined across worker pools. Progress is checkpointed in
+        the ledger, so rerunning after a crash or Ctrl-C resumes where it
+        stopped.
         """
-        pass
+        transcripts = sorted(self.find_recent_transcripts(None) or [],
+                             key=lambda t: t.get("modifiedTime") or "", reverse=True)
+        transcripts = transcripts[:count] if count else transcripts
+        pending = [t for t in transcripts
+                   if not self.ledger.is_done(t["id"], t.get("modifiedTime"))]
+        logger.info(f"Backfill: {len(transcripts)} transcripts, {len(pending)} to process "
+                    f"({len(transcripts) - len(pending)} already done), {workers} workers")
+        if pending:
+            self.sync_contact_index()
+        progress = BackfillProgress(len(pending))
+        queue = iter(pending)
+        pools = {"read": ThreadPoolExecutor(workers), "extract": ThreadPoolExecutor(workers),
+                 "write": ThreadPoolExecutor(max(workers // 2, 1))}
+        in_flight = {}
+
+        def start_next():
+            t = next(queue, None)
+            if t is not None:
+                in_flight[pools["read"].submit(self.read_stage, t["id"], t["title"],
+                                               t.get("modifiedTime"))] = ("read", t, None)
+
+        for _ in range(2 * workers):
+            start_next()
+        try:
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, t, read = in_flight.pop(future)
+                    error = False
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Backfill {stage} of {t['title']} failed: {e}")
+                        result, error = None, True
+                    if stage == "read" and result:
+                        in_flight[pools["extract"].submit(
+                            self.extract_stage, *result, t["title"])] = ("extract", t, result)
+                    elif stage == "extract" and result:
+                        in_flight[pools["write"].submit(
+                            self.write_stage, *read, t["title"], result)] = ("write", t, read)
+                    else:
+                        # read_stage returns None for empty / already-done transcripts
+                        progress.record(ok=stage == "write" and bool(result),
+                                        skipped=stage == "read" and not error)
+                        start_next()
+        except KeyboardInterrupt:
+            logger.warning(f"Interrupted; letting {len(in_flight)} in-flight transcripts "
+                           f"finish their current step. Rerun to resume.")
+            raise
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+            logger.info(f"Backfill: {progress.summary()}; ledger {self.ledger.stats()}")
+            logger.info(f"Contact index: {self.contacts.stats}")
 
 
 def main():
@@ -137,21 +467,29 @@ def main():
                         default="batch")
     parser.add_argument("--doc-id", help="Google Drive doc ID for single mode")
     parser.add_argument("--since", help="Process transcripts since date (YYYY-MM-DD)")
-    parser.add_argument("--backfill-count", type=int, default=5,
-                        help="Number of transcripts to backfill")
+    parser.add_argument("--backfill-count", type=int,
+                        help="Number of most recent transcripts to backfill (default: all)")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS,
+                        help="Transcripts read / extracted in parallel during backfill")
+    parser.add_argument("--attio-write-rate", type=float, default=ATTIO_WRITE_RATE,
+                        help="Max Attio write requests per second across all workers")
+    parser.add_argument("--claude-concurrency", type=int, default=CLAUDE_CONCURRENCY,
+                        help="Max Claude calls in flight across all workers")
     parser.add_argument("--dry-run", action="store_true")
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO)
 
     processor = PostMeetingProcessor(
-        gdrive_client=None, attio_client=None, claude_client=None
+        gdrive_client=None, attio_client=None, claude_client=None,
+        attio_write_rate=args.attio_write_rate, claude_concurrency=args.claude_concurrency
     )
 
     if args.mode == "single":
+        processor.sync_contact_index()
         processor.process_transcript(args.doc_id, "Manual")
     elif args.mode == "backfill":
-        processor.backfill(count=args.backfill_count)
+        processor.backfill(count=args.backfill_count, workers=args.workers)
     else:
         processor.process_batch(since_date=args.since)
 
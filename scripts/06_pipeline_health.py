@@ -25,6 +25,22 @@ Stage Velocity Benchmarks:
   Solutioning: 30 days max, 14-day stall alert
   Redlines: 21 days max, 7-day stall alert
 
+Health checks (deal_health.py):
+  The rules in config/pipeline_stages.yaml (expected_max_days,
+  stall_alert_days / stall_signal, required_fields, activity_thresholds)
+  are compiled into per-stage arrays. Active deals are loaded once into
+  column arrays (stage, days in stage, last activity age, field-presence
+  bitmask) and every rule is evaluated across all of them in one
+  vectorized pass, giving a per-deal issue bitmask. Only flagged deals are
+  rendered into alert text.
+
+History (pipeline_history.py):
+  Attio only has each deal's current stage, so every run appends a daily
+  snapshot to a local append-only, memory-mapped columnar store: per-stage
+  counts / value plus the stage transitions since the previous snapshot.
+  Velocity by stage, coverage and the win-rate trend are trailing-N-week
+  queries over that store, updated incrementally from each new snapshot.
+
 Outputs:
   - Slack summary with actionable alerts
   - Detailed Google Drive report
@@ -36,23 +52,49 @@ Triggers:
 
 import argparse
 import logging
+import os
 import yaml
 from datetime import datetime
 from pathlib import Path
 
+import numpy as np
+
+from deal_health import ISSUES, DealHealthRules
+from pipeline_history import PipelineHistory
+
 CONFIG_DIR = Path(__file__).parent.parent / "config"
 TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
 logger = logging.getLogger(__name__)
 
+FIELD_LABELS = {"ai_account_brief": "account brief", "ai_enriched_key_people": "key people",
+                "ai_icp_rationale": "ICP rationale", "ai_personas": "personas",
+                "ai_enriched_tech_stack": "tech stack", "deal_amount": "deal amount",
+                "close_date": "close date"}
+FIELD_ACTIONS = {"ai_enriched_key_people": "run Buying Committee Builder?",
+                 "deal_amount": "update the deal?", "close_date": "update the deal?"}
+DEFAULT_FIELD_ACTION = "run Account Intelligence Engine?"
+# "3 deals in Redlines with no close date" once a gap is this common in a stage
+GROUPED_ALERT_MIN_DEALS = 3
+# Trailing window for velocity and win-rate trend
+METRIC_WEEKS = 12
+
 
 class PipelineHealthMonitor:
     """Monitors pipeline health and generates alerts."""
 
-    def __init__(self, attio_client, slack_client, gdrive_client):
+    def __init__(self, attio_client, slack_client, gdrive_client, pipeline_history=None,
+                 coverage_target=None, metric_weeks=METRIC_WEEKS):
         self.attio = attio_client
         self.slack = slack_client
         self.gdrive = gdrive_client
         self.stage_config = self._load_stage_config()
+        self.rules = DealHealthRules(self.stage_config)
+        self.history = pipeline_history or PipelineHistory(aliases={
+            slug: stage["name"] for slug, stage in self.stage_config["stages"].items()})
+        if coverage_target is None:
+            coverage_target = float(os.environ.get("PIPELINE_COVERAGE_TARGET") or 0) or None
+        self.coverage_target = coverage_target
+        self.metric_weeks = metric_weeks
 
     def _load_stage_config(self):
         with open(CONFIG_DIR / "pipeline_stages.yaml") as f:
@@ -62,6 +104,10 @@ class PipelineHealthMonitor:
         """Query all active deals in Attio (stages 1-5, 8)."""
         pass
 
+    def get_deals_closed_since(self, since):
+        """Deals moved to Won or Lost on or after `since` (ISO date; None = none)."""
+        pass
+
     def check_deal_health(self, deal):
         """
         Analyze a single deal for health issues:
@@ -69,9 +115,13 @@ class PipelineHealthMonitor:
         - Missing required fields
         - Activity recency
         - Stall signals
-        Returns list of alerts/issues.
+        Returns list of issue names (see deal_health.py).
         """
-        pass
+        return self.rules.issue_list(self.rules.check([deal]).issues[0])
+
+    def check_pipeline_health(self, deals):
+        """Every deal at once → DealHealth (per-deal issue bitmasks)."""
+        return self.rules.check(deals)
 
     def calculate_pipeline_metrics(self, deals):
         """
@@ -80,8 +130,22 @@ class PipelineHealthMonitor:
         - Coverage ratio
         - Average velocity
         - Win rate trend
+        Records today's snapshot (open deals + deals closed since the last
+        one) in the pipeline history, then reads the trailing metrics from it.
         """
-        pass
+        since = self.history.last_snapshot
+        closed = (self.get_deals_closed_since(since) or []) if since else []
+        self.history.record([*deals, *closed])
+        weeks = self.metric_weeks
+        metrics = {
+            "total_pipeline_value_by_stage": self.history.value_by_stage(),
+            "pipeline_coverage_ratio": self.history.coverage_ratio(self.coverage_target),
+            "average_deal_velocity_by_stage": self.history.velocity(weeks),
+            "win_rate": self.history.win_rate(weeks),
+            "win_rate_trending": self.history.win_rate_trend(weeks),
+        }
+        logger.info(f"Pipeline history: {self.history.stats()}")
+        return metrics
 
     def generate_alerts(self, deal_health_results):
         """
@@ -89,8 +153,47 @@ class PipelineHealthMonitor:
         - "Deal X in Discovery 23 days, no activity — schedule follow-up?"
         - "Deal Y missing technical contact — run Buying Committee Builder?"
         - "3 deals in Redlines with no close date"
+        Takes the DealHealth from check_pipeline_health; grouped alerts come
+        first, then one line per flagged deal.
         """
-        pass
+        columns, issues = deal_health_results
+        rules = self.rules
+        alerts = []
+        missing_bits = issues >> np.uint64(len(ISSUES))
+        for stage in np.unique(columns.stage[missing_bits != 0]):
+            in_stage = missing_bits[columns.stage == stage]
+            for bit, field in enumerate(rules.fields):
+                count = int(np.count_nonzero(in_stage >> np.uint64(bit) & np.uint64(1)))
+                if count >= GROUPED_ALERT_MIN_DEALS:
+                    alerts.append(f"{count} deals in {rules.stage_names[stage]} with no "
+                                  f"{FIELD_LABELS.get(field, field)}")
+        for i in np.flatnonzero(issues):
+            found = rules.issue_list(issues[i])
+            stage = columns.stage[i]
+            days, age = columns.days_in_stage[i], columns.activity_age[i]
+            head = f"{columns.names[i] or columns.ids[i]} in {rules.stage_names[stage]}"
+            if not np.isnan(days):
+                head += f" {days:.0f} days"
+            details, actions = [], []
+            if "overdue" in found:
+                details.append(f"over the {rules.expected_max_days[stage]:.0f}-day benchmark")
+            meeting_stall = "stalled" in found and rules.stall_on_meeting[stage]
+            # Both can hold at once (e.g. Intro Call: quiet and nothing booked)
+            if "inactive" in found or ("stalled" in found and not meeting_stall):
+                details.append("no activity logged" if np.isinf(age)
+                               else f"no activity in {age:.0f} days")
+                actions.append("schedule follow-up?")
+            if meeting_stall:
+                details.append("no meeting scheduled")
+                actions.append("book the next meeting?")
+            missing = [name.removeprefix("missing_") for name in found
+                       if name.startswith("missing_")]
+            if missing:
+                details.append("missing " + ", ".join(FIELD_LABELS.get(f, f) for f in missing))
+                actions += [FIELD_ACTIONS.get(f, DEFAULT_FIELD_ACTION) for f in missing]
+            alerts.append(f"{head}, {', '.join(details)} — "
+                          f"{' '.join(dict.fromkeys(actions)) or 'review?'}")
+        return alerts
 
     def post_to_slack(self, summary, alerts):
         """Post pipeline health summary + alerts to Slack."""
@@ -102,25 +205,36 @@ class PipelineHealthMonitor:
 
     def run(self):
         """Execute full pipeline health check."""
-        deals = self.get_active_deals()
-        health_results = [self.check_deal_health(d) for d in deals]
+        deals = self.get_active_deals() or []
+        health = self.check_pipeline_health(deals)
         metrics = self.calculate_pipeline_metrics(deals)
-        alerts = self.generate_alerts(health_results)
+        alerts = self.generate_alerts(health)
+        details = [{"id": health.columns.ids[i], "name": health.columns.names[i],
+                    "stage": self.rules.stage_names[health.columns.stage[i]],
+                    "issues": self.rules.issue_list(health.issues[i])}
+                   for i in np.flatnonzero(health.issues)]
+        logger.info(f"Deal health issues: {self.rules.counts(health)}")
         self.post_to_slack(metrics, alerts)
-        self.save_to_gdrive({"metrics": metrics, "alerts": alerts, "details": health_results})
+        self.save_to_gdrive({"metrics": metrics, "alerts": alerts, "details": details})
 
 
 def main():
     parser = argparse.ArgumentParser(description="Pipeline Health Monitor")
     parser.add_argument("--output", choices=["slack", "gdrive", "both", "console"],
                         default="both")
+    parser.add_argument("--coverage-target", type=float,
+                        help="Pipeline target for the coverage ratio "
+                             "(default: PIPELINE_COVERAGE_TARGET)")
+    parser.add_argument("--weeks", type=int, default=METRIC_WEEKS,
+                        help="Trailing weeks for velocity and win-rate trend")
     parser.add_argument("--dry-run", action="store_true")
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO)
 
     monitor = PipelineHealthMonitor(
-        attio_client=None, slack_client=None, gdrive_client=None
+        attio_client=None, slack_client=None, gdrive_client=None,
+        coverage_target=args.coverage_target, metric_weeks=args.weeks
     )
     monitor.run()
 
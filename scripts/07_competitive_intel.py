@@ -23,7 +23,8 @@ Tracked Signals:
 Outputs:
   - Updated competitive positioning matrix in Google Drive
   - Weekly competitive briefing to Slack
-  - Auto-tags Fathom transcripts with competitor mentions
+  - Auto-tags Fathom transcripts with competitor mentions (searched in the
+    local transcript index shared with Script 4, not Drive full-text search)
 
 Triggers:
   - Weekly
@@ -34,6 +35,8 @@ import logging
 import yaml
 from pathlib import Path
 
+from transcript_index import TranscriptIndex
+
 CONFIG_DIR = Path(__file__).parent.parent / "config"
 TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
 logger = logging.getLogger(__name__)
@@ -42,12 +45,14 @@ logger = logging.getLogger(__name__)
 class CompetitiveIntelTracker:
     """Tracks competitive landscape and generates briefings."""
 
-    def __init__(self, search_client, gdrive_client, slack_client, claude_client):
+    def __init__(self, search_client, gdrive_client, slack_client, claude_client,
+                 transcript_index=None):
         self.search = search_client
         self.gdrive = gdrive_client
         self.slack = slack_client
         self.claude = claude_client
         self.competitors = self._load_competitors()
+        self.transcripts = transcript_index or TranscriptIndex()
 
     def _load_competitors(self):
         with open(CONFIG_DIR / "competitive_landscape.yaml") as f:
@@ -70,11 +75,18 @@ class CompetitiveIntelTracker:
         """
         pass
 
-    def check_fathom_mentions(self, competitor_name):
+    def check_fathom_mentions(self, competitor_name, aliases=()):
         """
-        Search Fathom transcripts in Google Drive for competitor mentions.
-        Auto-tag relevant transcripts.
+        Search the Fathom transcript index for competitor mentions.
+        Auto-tag relevant transcripts; returns the top passages.
         """
+        terms = [competitor_name, *aliases]
+        for doc_id, title in self.transcripts.documents_mentioning(terms).items():
+            self.tag_transcript(doc_id, title, competitor_name)
+        return self.transcripts.search(terms)
+
+    def tag_transcript(self, doc_id, title, competitor_name):
+        """Tag a Fathom transcript in Google Drive with a competitor mention."""
         pass
 
     def update_competitive_matrix(self, all_findings):
@@ -88,13 +100,15 @@ class CompetitiveIntelTracker:
     def run(self):
         """Execute full competitive intelligence sweep."""
         all_findings = {}
+        self.transcripts.sync(self.gdrive)
         for key, competitor in self.competitors["competitors"].items():
             name = competitor["name"]
             logger.info(f"Researching: {name}")
             news = self.search_competitor_news(name, competitor.get("monitor", []))
             jobs = self.search_competitor_jobs(name)
             analysis = self.analyze_findings(name, {"news": news, "jobs": jobs})
-            self.check_fathom_mentions(name)
+            aliases = [competitor["parent"]] if competitor.get("parent") else []
+            self.check_fathom_mentions(name, aliases)
             all_findings[key] = analysis
         self.update_competitive_matrix(all_findings)
         self.generate_weekly_briefing(all_findings)
@@ -0,0 +1,271 @@
+"""
+ActiveCampaign Sync
+====================
+
+Bulk sync engine for pushing outbound sequences to ActiveCampaign, used by
+Script 3 (Personalized Outbound Generator). A 5k-contact wave goes out as
+~20 bulk import requests instead of ~20k per-contact contact / tag calls.
+
+  - One pooled requests.Session (keep-alive, urllib3 retries with
+    Retry-After: idempotent requests on 429 / 5xx, POSTs on 429 only, so
+    tag creation and bulk imports are never sent twice)
+  - Tag map (name → ID + AC's exact name) loaded once per run; missing
+    tags from activecampaign_tags are created once, never looked up per
+    contact, and rows carry the names exactly as AC has them
+  - Contacts, tags and sequence fields sent via import/bulk_import in
+    chunks of up to 250 rows
+  - Token bucket keeps every request under the AC rate limit (5 req/s)
+  - Partial failures: rows reported failed by import/info are retried on
+    their own, up to max_rounds, never the whole chunk
+
+Sequence touches are written to contact custom fields looked up by
+personalization tag (SEQ_T1_SUBJECT, SEQ_T1_BODY, ... SEQ_T4_BODY); fields
+missing in the AC account are skipped with a warning.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE = 5.0          # requests / second (AC account limit)
+DEFAULT_BURST = 5
+IMPORT_CHUNK = 250          # AC bulk import maximum
+PAGE_SIZE = 100
+MAX_ROUNDS = 3
+IMPORT_POLL_SECONDS = 2
+IMPORT_MAX_WAIT_SECONDS = 300
+REQUEST_TIMEOUT = 30
+FIELD_PERSTAG = "SEQ_T{touch}_{part}"
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is free."""
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+                self.waited += wait
+                time.sleep(wait)
+
+
+class ThrottleRetry(Retry):
+    """
+    Retry for idempotent methods (urllib3's default allowlist) on any
+    status_forcelist code, and for any method on 429: a throttled request
+    was refused, not processed, so resending a POST can't duplicate it.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429 and self.total:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def make_session(pool_size=10, retries=3):
+    """Pooled session with retries on throttling and transient server errors."""
+    session = requests.Session()
+    retry = ThrottleRetry(total=retries, backoff_factor=1.0,
+                          status_forcelist=(429, 500, 502, 503, 504),
+                          respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                          max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class ActiveCampaignSync:
+    """Pooled, rate-limited, bulk ActiveCampaign contact + tag + field sync."""
+
+    def __init__(self, base_url=None, api_token=None, session=None, rate=DEFAULT_RATE,
+                 burst=DEFAULT_BURST, chunk_size=IMPORT_CHUNK, max_rounds=MAX_ROUNDS,
+                 dry_run=False):
+        self.base_url = (base_url or os.environ.get("ACTIVECAMPAIGN_URL", "")).rstrip("/")
+        self.api_token = api_token or os.environ.get("ACTIVECAMPAIGN_API_KEY")
+        self.session = session or make_session()
+        self.bucket = TokenBucket(rate, burst)
+        self.chunk_size = chunk_size
+        self.max_rounds = max_rounds
+        self.dry_run = dry_run
+        self._tag_ids = None
+        self._field_ids = None
+        self._lock = threading.Lock()
+        self.pending = []
+        self.stats = {"requests": 0, "rows_sent": 0, "rows_imported": 0, "rows_retried": 0,
+                      "rows_failed": 0, "tags_created": 0}
+
+    def _request(self, method, path, **kwargs):
+        self.bucket.acquire()
+        self.stats["requests"] += 1
+        response = self.session.request(
+            method, f"{self.base_url}/api/3/{path}",
+            headers={"Api-Token": self.api_token, "Accept": "application/json"},
+            timeout=REQUEST_TIMEOUT, **kwargs)
+        response.raise_for_status()
+        return response.json() if response.content else {}
+
+    def _paginate(self, path, key):
+        offset = 0
+        while True:
+            page = self._request("GET", path, params={"limit": PAGE_SIZE, "offset": offset})
+            items = page.get(key, [])
+            yield from items
+            if len(items) < PAGE_SIZE:
+                return
+            offset += PAGE_SIZE
+
+    # Lookups (cached for the life of the sync)
+
+    def tag_ids(self):
+        """Tag name (lowercased) → (ID, name as stored in AC), loaded once."""
+        if self._tag_ids is None:
+            self._tag_ids = {t["tag"].lower(): (t["id"], t["tag"])
+                             for t in self._paginate("tags", "tags")}
+        return self._tag_ids
+
+    def ensure_tags(self, names):
+        """Create any tags that don't exist yet; returns name → (ID, AC name) for `names`."""
+        known = self.tag_ids()
+        for name in sorted(set(names)):
+            if name.lower() not in known:
+                created = self._request("POST", "tags", json={"tag": {
+                    "tag": name, "tagType": "contact", "description": ""}})
+                known[name.lower()] = (created["tag"]["id"], created["tag"].get("tag", name))
+                self.stats["tags_created"] += 1
+        return {name: known[name.lower()] for name in names}
+
+    def field_ids(self):
+        """Custom field personalization tag (uppercased) → ID, loaded once."""
+        if self._field_ids is None:
+            self._field_ids = {f["perstag"].upper(): f["id"]
+                               for f in self._paginate("fields", "fields") if f.get("perstag")}
+            missing = [FIELD_PERSTAG.format(touch=1, part=p) for p in ("SUBJECT", "BODY")
+                       if FIELD_PERSTAG.format(touch=1, part=p) not in self._field_ids]
+            if missing:
+                logger.warning(f"ActiveCampaign is missing sequence fields {missing}; "
+                               f"those touches are not synced")
+        return self._field_ids
+
+    # Rows
+
+    def contact_row(self, contact, sequence, tags):
+        """
+        One bulk_import row: contact identity, tag names (bulk_import takes
+        names, not IDs) and sequence fields. `tags` should already be AC's
+        names from ensure_tags, so no case-variant duplicate is created.
+        """
+        field_ids = self.field_ids()
+        fields = []
+        for touch in sequence:
+            for part in ("subject", "body"):
+                field_id = field_ids.get(FIELD_PERSTAG.format(touch=touch["touch"],
+                                                              part=part.upper()))
+                if field_id:
+                    fields.append({"id": int(field_id), "value": touch[part]})
+        row = {"email": contact["email"], "tags": list(tags), "fields": fields}
+        name = contact.get("name") or ""
+        first = contact.get("first_name") or (name.split()[0] if name else "")
+        last = contact.get("last_name") or (" ".join(name.split()[1:]) if name else "")
+        if first:
+            row["first_name"] = first
+        if last:
+            row["last_name"] = last
+        return row
+
+    def stage(self, contact, sequence, tags):
+        """Queue a contact for the next flush."""
+        if not contact.get("email"):
+            logger.warning(f"Skipping {contact.get('name')}: no email")
+            return
+        with self._lock:
+            self.pending.append((contact, sequence, list(tags)))
+
+    def flush(self):
+        """
+        Push everything staged: tags ensured once, rows bulk imported in
+        chunks, failed rows retried alone. Returns emails that still failed.
+        """
+        with self._lock:
+            staged, self.pending = self.pending, []
+        if not staged:
+            return []
+        if self.dry_run:
+            logger.info(f"[dry-run] Would import {len(staged)} contacts to ActiveCampaign")
+            return []
+        tag_map = self.ensure_tags({tag for _, _, tags in staged for tag in tags})
+        rows = {c["email"].lower(): self.contact_row(c, s, [tag_map[tag][1] for tag in t])
+                for c, s, t in staged}
+        remaining = list(rows)
+        for round_number in range(1, self.max_rounds + 1):
+            if round_number > 1:
+                self.stats["rows_retried"] += len(remaining)
+                logger.info(f"Retrying {len(remaining)} failed rows (round {round_number})")
+            failed = []
+            for start in range(0, len(remaining), self.chunk_size):
+                chunk = remaining[start:start + self.chunk_size]
+                failed.extend(self._import_chunk([rows[email] for email in chunk]))
+            remaining = failed
+            if not remaining:
+                break
+        self.stats["rows_imported"] += len(rows) - len(remaining)
+        self.stats["rows_failed"] += len(remaining)
+        logger.info(f"ActiveCampaign sync: {self.stats}, rate-limit wait "
+                    f"{self.bucket.waited:.1f}s")
+        return remaining
+
+    def _import_chunk(self, rows):
+        """Bulk import one chunk; returns the (lowercased) emails that failed."""
+        emails = [row["email"].lower() for row in rows]
+        self.stats["rows_sent"] += len(rows)
+        try:
+            response = self._request("POST", "import/bulk_import", json={"contacts": rows})
+        except requests.RequestException as e:
+            logger.error(f"Bulk import of {len(rows)} rows failed: {e}")
+            return emails
+        if not response.get("success"):
+            logger.error(f"Bulk import rejected: {response.get('failureReasons')}")
+            return emails
+        status = self._wait_for_import(response.get("batchId"))
+        if status is None:
+            return emails
+        sent = set(emails)
+        return [email.lower() for email in status.get("failure", []) if email.lower() in sent]
+
+    def _wait_for_import(self, batch_id):
+        """Poll import/info until the batch finishes; None if it never does."""
+        if not batch_id:
+            return {}
+        started = time.monotonic()
+        while time.monotonic() - started < IMPORT_MAX_WAIT_SECONDS:
+            try:
+                info = self._request("GET", "import/info", params={"batchId": batch_id})
+            except requests.RequestException as e:
+                logger.warning(f"Import status check for {batch_id} failed: {e}")
+                info = {}
+            if info.get("status") == "completed":
+                return info
+            time.sleep(IMPORT_POLL_SECONDS)
+        logger.error(f"Import {batch_id} did not finish in {IMPORT_MAX_WAIT_SECONDS}s")
+        return None
@@ -0,0 +1,195 @@
+"""
+Attio Write Coalescer
+======================
+
+Diff-only, batched write path for Attio record updates. Used by Script 1
+(Account Intelligence Engine) so that refreshes send only the attributes that
+actually changed, grouped into as few requests as possible.
+
+Behaviour:
+  - Keeps a hash of the last value written (or observed) for every
+    record attribute, persisted under state/ so the diff spans runs
+  - stage() drops unchanged attributes; a record with no changes at all is
+    skipped, and one where only touch fields (ai_enriched_at) changed is
+    sent as a touch-only patch so Attio's freshness matches local state
+  - Patches for the same record merge until flushed
+  - Flushes when max_batch records are pending or the oldest patch is
+    max_delay seconds old, and always on flush()/close()
+  - Uses the client's bulk update when available, else one request per record
+  - on_written callbacks fire only after a successful flush (never in
+    dry-run), so callers can record "applied" state without risking lost writes
+
+Client interface:
+  attio.update_records(object_slug, [{"record_id": ..., "values": {...}}])  # bulk
+  attio.update_record(object_slug, record_id, values)                        # fallback
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+STATE_DIR = Path(__file__).parent.parent / "state"
+DEFAULT_STATE_PATH = STATE_DIR / "attio_write_state.sqlite"
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH = 50
+DEFAULT_MAX_DELAY = 5.0
+# Freshness markers: a patch changing only these is counted as touch-only
+DEFAULT_TOUCH_FIELDS = ("ai_enriched_at",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS known_values (
+    object     TEXT NOT NULL,
+    record_id  TEXT NOT NULL,
+    attribute  TEXT NOT NULL,
+    value_hash TEXT NOT NULL,
+    PRIMARY KEY (object, record_id, attribute)
+);
+"""
+
+
+def value_hash(value):
+    blob = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+class AttioWriteCoalescer:
+    """Buffers Attio attribute patches, diffs them and flushes in bulk."""
+
+    def __init__(self, attio_client, object_slug="companies",
+                 path=DEFAULT_STATE_PATH, max_batch=DEFAULT_MAX_BATCH,
+                 max_delay=DEFAULT_MAX_DELAY, touch_fields=DEFAULT_TOUCH_FIELDS,
+                 dry_run=False):
+        self.attio = attio_client
+        self.object_slug = object_slug
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.touch_fields = set(touch_fields)
+        self.dry_run = dry_run
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._pending = {}     # record_id -> {attribute: value}
+        self._callbacks = {}   # record_id -> [on_written, ...]
+        self._oldest = None
+        self.stats = {"staged": 0, "skipped_unchanged": 0, "touch_only": 0, "attributes_sent": 0,
+                      "attributes_dropped": 0, "requests": 0, "records_written": 0,
+                      "failed_records": 0}
+
+    def _known(self, record_id):
+        rows = self._db.execute(
+            "SELECT attribute, value_hash FROM known_values WHERE object = ? AND record_id = ?",
+            (self.object_slug, record_id)).fetchall()
+        return dict(rows)
+
+    def _remember(self, record_id, values):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO known_values VALUES (?, ?, ?, ?)",
+            [(self.object_slug, record_id, attr, value_hash(v)) for attr, v in values.items()])
+
+    def observe(self, record_id, values):
+        """Seed last-known values from a freshly fetched Attio record."""
+        with self._lock:
+            self._remember(record_id, values)
+            self._db.commit()
+
+    def diff(self, record_id, values):
+        """Subset of values whose hash differs from the last known value."""
+        known = self._known(record_id)
+        pending = self._pending.get(record_id, {})
+        return {attr: v for attr, v in values.items()
+                if pending.get(attr, v) != v or known.get(attr) != value_hash(v)}
+
+    def stage(self, record_id, values, on_written=None):
+        """
+        Queue a patch for record_id. Only changed attributes are kept; returns
+        the attributes that will be sent (empty dict = nothing to write).
+        """
+        with self._lock:
+            self.stats["staged"] += 1
+            changed = self.diff(record_id, values)
+            if not changed:
+                # Attio already holds every value, touch fields included
+                self.stats["skipped_unchanged"] += 1
+                self.stats["attributes_dropped"] += len(values)
+                if on_written:
+                    on_written()
+                return {}
+            if not set(changed) - self.touch_fields:
+                self.stats["touch_only"] += 1
+            self.stats["attributes_dropped"] += len(values) - len(changed)
+            self._pending.setdefault(record_id, {}).update(changed)
+            if on_written:
+                self._callbacks.setdefault(record_id, []).append(on_written)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if (len(self._pending) >= self.max_batch
+                    or time.monotonic() - self._oldest >= self.max_delay):
+                self.flush()
+            return changed
+
+    def flush(self):
+        """Send all pending patches. Returns number of records written."""
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending, callbacks = self._pending, self._callbacks
+            self._pending, self._callbacks, self._oldest = {}, {}, None
+
+            if self.dry_run:
+                # Nothing reached Attio, so no callbacks: callers must not
+                # record dry-run patches as applied
+                for record_id, values in pending.items():
+                    logger.info(f"[dry-run] Attio {self.object_slug}/{record_id}: "
+                                f"{sorted(values)}")
+                return 0
+            if hasattr(self.attio, "update_records"):
+                written = self._send_bulk(pending)
+            else:
+                written = self._send_each(pending)
+
+            for record_id in written:
+                self.stats["attributes_sent"] += len(pending[record_id])
+                self._remember(record_id, pending[record_id])
+            self._db.commit()
+            self.stats["records_written"] += len(written)
+            self.stats["failed_records"] += len(pending) - len(written)
+
+        for record_id in written:
+            for callback in callbacks.get(record_id, []):
+                callback()
+        return len(written)
+
+    def _send_bulk(self, pending):
+        self.stats["requests"] += 1
+        try:
+            self.attio.update_records(self.object_slug, [
+                {"record_id": rid, "values": values} for rid, values in pending.items()])
+            return list(pending)
+        except Exception:
+            logger.exception(f"Bulk Attio update failed — retrying {len(pending)} "
+                             f"records individually")
+            return self._send_each(pending)
+
+    def _send_each(self, pending):
+        written = []
+        for record_id, values in pending.items():
+            self.stats["requests"] += 1
+            try:
+                self.attio.update_record(self.object_slug, record_id, values)
+                written.append(record_id)
+            except Exception:
+                logger.exception(f"Attio update failed: {self.object_slug}/{record_id}")
+        return written
+
+    def close(self):
+        self.flush()
+        logger.info(f"Attio writes: {self.stats}")
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,169 @@
+"""
+Brief Cache
+============
+
+Persistent cache of generated meeting prep briefs for Script 4 (Meeting
+Prep), keyed by calendar event id. Lets briefs be generated ahead of time
+(`--warm`, as events appear on the calendar) and reused by the 7 AM run and
+on-demand `--meeting-id` requests.
+
+Fingerprints:
+  Each brief is stored with one fingerprint per input:
+  - meeting:     title, start time, attendee emails
+  - attio:       person / company record ids + versions (updated_at)
+  - transcripts: Fathom transcript ids behind the excerpts
+  - emails:      Gmail thread ids (+ last message id when present)
+  - deal:        deal stage (+ updated_at)
+  - missing:     sections left out at the prep deadline
+  A brief is regenerated (one Claude call) only when at least one input
+  fingerprint changed; otherwise the stored brief is reused as is.
+
+Freshness:
+  verified_at records when a brief's inputs were last re-checked. On-demand
+  requests inside BRIEF_FRESH_SECONDS return the stored brief without
+  touching any source.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from company_index import to_epoch
+from enrichment_cache import content_hash
+
+STATE_DIR = Path(__file__).parent.parent / "state"
+DEFAULT_CACHE_PATH = STATE_DIR / "brief_cache.sqlite"
+logger = logging.getLogger(__name__)
+
+BRIEF_FRESH_SECONDS = 15 * 60
+# Briefs for meetings that started longer ago than this are pruned
+RETAIN_SECONDS = 7 * 86400
+
+CachedBrief = namedtuple("CachedBrief", ["meeting", "fingerprints", "brief",
+                                         "generated_at", "verified_at"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS briefs (
+    meeting_id    TEXT PRIMARY KEY,
+    meeting       TEXT NOT NULL,
+    fingerprints  TEXT NOT NULL,
+    brief         TEXT NOT NULL,
+    meeting_start REAL,
+    generated_at  REAL NOT NULL,
+    verified_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS briefs_start ON briefs (meeting_start);
+"""
+
+
+def _ids(items, *keys):
+    """Sorted identifiers of a list of records (first key present wins)."""
+    ids = []
+    for item in items or []:
+        if isinstance(item, dict):
+            ids.append(next((str(item[k]) for k in keys if item.get(k)), content_hash(item)))
+        else:
+            ids.append(str(item))
+    return sorted(ids)
+
+
+def _flatten(groups):
+    """Per-attendee result lists → one list of records."""
+    records = []
+    for group in groups or []:
+        records.extend(group if isinstance(group, list) else [group])
+    return records
+
+
+def input_fingerprints(meeting, data):
+    """Per-input fingerprints of a meeting and the data gathered for it."""
+    deal = data.get("deal_context") or {}
+    people = []
+    for profile in data.get("attendee_profiles") or []:
+        company = profile.get("company") or {}
+        people.append([profile.get("id") or profile.get("email"),
+                       profile.get("updated_at") or content_hash(profile),
+                       company.get("id"), company.get("updated_at")])
+    return {
+        "meeting": content_hash(meeting.get("title"), meeting.get("start"),
+                                sorted(a.get("email") or "" for a in meeting.get("attendees", []))),
+        "attio": content_hash(sorted(people, key=str)),
+        "transcripts": content_hash(_ids(_flatten(data.get("transcript_excerpts")), "doc_id")),
+        "emails": content_hash(_ids(_flatten(data.get("email_history")),
+                                    "last_message_id", "thread_id", "threadId", "id")),
+        "deal": content_hash(deal.get("stage"), deal.get("updated_at")),
+        "missing": content_hash(sorted(data.get("missing_sections") or [])),
+    }
+
+
+class BriefCache:
+    """SQLite-backed store of generated briefs + their input fingerprints."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self.stats = {"fresh": 0, "unchanged": 0, "regenerated": 0}
+
+    def get(self, meeting_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT meeting, fingerprints, brief, generated_at, verified_at "
+                "FROM briefs WHERE meeting_id = ?", (str(meeting_id),)).fetchone()
+        if row is None:
+            return None
+        return CachedBrief(json.loads(row[0]), json.loads(row[1]), json.loads(row[2]),
+                           row[3], row[4])
+
+    def fresh(self, meeting_id, max_age=BRIEF_FRESH_SECONDS):
+        """The stored brief if its inputs were verified within max_age, else None."""
+        cached = self.get(meeting_id)
+        if cached is None or time.time() - cached.verified_at > max_age:
+            return None
+        self.stats["fresh"] += 1
+        return cached.brief
+
+    @staticmethod
+    def changed_inputs(cached, fingerprints):
+        """Inputs whose fingerprint differs from the stored brief (all if none stored)."""
+        if cached is None:
+            return sorted(fingerprints)
+        return sorted(k for k, v in fingerprints.items() if cached.fingerprints.get(k) != v)
+
+    def verify(self, meeting_id):
+        """Inputs re-checked and unchanged: keep the brief, bump verified_at."""
+        with self._lock:
+            self._db.execute("UPDATE briefs SET verified_at = ? WHERE meeting_id = ?",
+                             (time.time(), str(meeting_id)))
+            self._db.commit()
+        self.stats["unchanged"] += 1
+
+    def put(self, meeting, fingerprints, brief):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO briefs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(meeting["id"]), json.dumps(meeting, default=str),
+                 json.dumps(fingerprints), json.dumps(brief, default=str),
+                 to_epoch(meeting.get("start")), now, now))
+            self._db.commit()
+        self.stats["regenerated"] += 1
+
+    def prune(self, retain_seconds=RETAIN_SECONDS):
+        """Drop briefs for meetings that are long over."""
+        with self._lock:
+            removed = self._db.execute(
+                "DELETE FROM briefs WHERE meeting_start < ?",
+                (time.time() - retain_seconds,)).rowcount
+            self._db.commit()
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,186 @@
+"""
+Clay Batcher
+=============
+
+Clay access layer for Script 2 (Buying Committee Builder). Instead of one
+people search per account and one enrichment call per created person, lookups
+are queued and sent as bulk requests.
+
+  - Coalescing: pending domains / person ids are sent in chunks of up to
+    max_batch per Clay request (search_people_bulk / enrich_people_bulk)
+  - In-flight dedupe: a second request for a domain (or person) that is
+    already pending or in flight shares the first request's Future
+  - Memo: people-search results are kept for memo_ttl seconds, so the same
+    domain seen again in a run (subsidiaries, retries, event lists) costs
+    nothing
+
+Clients without the bulk methods fall back to per-item search_people /
+enrich_person calls, still deduplicated and memoized.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH = 25
+DEFAULT_MEMO_TTL = 15 * 60
+
+
+def _resolved(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+class ClayBatcher:
+    """Coalesces Clay people searches and enrichments into bulk requests."""
+
+    def __init__(self, clay_client, titles=None, max_batch=DEFAULT_MAX_BATCH,
+                 memo_ttl=DEFAULT_MEMO_TTL):
+        self.clay = clay_client
+        self.titles = list(titles or [])
+        self.max_batch = max_batch
+        self.memo_ttl = memo_ttl
+        self._lock = threading.Lock()
+        self._memo = {}              # domain -> (expires_at, people)
+        self._search_pending = {}    # domain -> (company name, Future)
+        self._search_inflight = {}   # domain -> Future
+        self._enrich_pending = {}    # person_id -> Future
+        self._enrich_inflight = {}   # person_id -> Future
+        self.stats = {"search_lookups": 0, "search_requests": 0, "enrich_lookups": 0,
+                      "enrich_requests": 0, "memo_hits": 0, "coalesced": 0}
+
+    @staticmethod
+    def _key(domain):
+        return (domain or "").strip().lower()
+
+    # People search
+
+    def request_people(self, domain, name=None):
+        """Queue a people search for a company; returns a Future of the people list."""
+        key = self._key(domain)
+        with self._lock:
+            self.stats["search_lookups"] += 1
+            memo = self._memo.get(key)
+            if memo and memo[0] > time.monotonic():
+                self.stats["memo_hits"] += 1
+                return _resolved(memo[1])
+            shared = self._search_inflight.get(key) or self._search_pending.get(key, (None, None))[1]
+            if shared is not None:
+                self.stats["coalesced"] += 1
+                return shared
+            future = Future()
+            self._search_pending[key] = (name, future)
+            full = len(self._search_pending) >= self.max_batch
+        if full:
+            self.flush_searches()
+        return future
+
+    def find_people(self, domain, name=None):
+        """Blocking people search (flushes anything still queued)."""
+        future = self.request_people(domain, name)
+        if not future.done():
+            self.flush_searches()
+        return future.result()
+
+    def prefetch(self, accounts):
+        """
+        Queue searches for many accounts ({domain, name}) and send them in
+        bulk. Accounts without a domain are skipped (nothing to search on).
+        """
+        for account in accounts:
+            if self._key(account.get("domain")):
+                self.request_people(account.get("domain"), account.get("name"))
+        self.flush_searches()
+
+    def flush_searches(self):
+        with self._lock:
+            pending, self._search_pending = self._search_pending, {}
+            self._search_inflight.update({k: f for k, (_, f) in pending.items()})
+        items = list(pending.items())
+        for start in range(0, len(items), self.max_batch):
+            chunk = items[start:start + self.max_batch]
+            try:
+                results = self._search_chunk([(k, name) for k, (name, _) in chunk])
+                expires = time.monotonic() + self.memo_ttl
+                with self._lock:
+                    for key, (_, future) in chunk:
+                        people = results.get(key) or []
+                        self._memo[key] = (expires, people)
+                        future.set_result(people)
+            except Exception as e:
+                logger.error(f"Clay people search failed for {len(chunk)} domains: {e}")
+                for _, (_, future) in chunk:
+                    future.set_exception(e)
+            finally:
+                with self._lock:
+                    for key, _ in chunk:
+                        self._search_inflight.pop(key, None)
+
+    def _search_chunk(self, companies):
+        """{domain: [people]} for one chunk of (domain, name)."""
+        bulk = getattr(self.clay, "search_people_bulk", None)
+        if bulk is not None:
+            self.stats["search_requests"] += 1
+            response = bulk([{"domain": d, "name": n} for d, n in companies], self.titles)
+            return {self._key(d): people for d, people in (response or {}).items()}
+        results = {}
+        for domain, name in companies:
+            self.stats["search_requests"] += 1
+            results[domain] = self.clay.search_people(domain, name, self.titles)
+        return results
+
+    # Enrichment
+
+    def request_enrichment(self, person_id):
+        """Queue a contact enrichment; returns a Future of the enriched record."""
+        with self._lock:
+            self.stats["enrich_lookups"] += 1
+            shared = self._enrich_inflight.get(person_id) or self._enrich_pending.get(person_id)
+            if shared is not None:
+                self.stats["coalesced"] += 1
+                return shared
+            future = Future()
+            self._enrich_pending[person_id] = future
+            full = len(self._enrich_pending) >= self.max_batch
+        if full:
+            self.flush_enrichments()
+        return future
+
+    def flush_enrichments(self):
+        with self._lock:
+            pending, self._enrich_pending = self._enrich_pending, {}
+            self._enrich_inflight.update(pending)
+        items = list(pending.items())
+        for start in range(0, len(items), self.max_batch):
+            chunk = items[start:start + self.max_batch]
+            try:
+                results = self._enrich_chunk([person_id for person_id, _ in chunk])
+                for person_id, future in chunk:
+                    future.set_result(results.get(person_id))
+            except Exception as e:
+                logger.error(f"Clay enrichment failed for {len(chunk)} people: {e}")
+                for _, future in chunk:
+                    future.set_exception(e)
+            finally:
+                with self._lock:
+                    for person_id, _ in chunk:
+                        self._enrich_inflight.pop(person_id, None)
+
+    def _enrich_chunk(self, person_ids):
+        bulk = getattr(self.clay, "enrich_people_bulk", None)
+        if bulk is not None:
+            self.stats["enrich_requests"] += 1
+            return bulk(person_ids) or {}
+        results = {}
+        for person_id in person_ids:
+            self.stats["enrich_requests"] += 1
+            results[person_id] = self.clay.enrich_person(person_id)
+        return results
+
+    def flush(self):
+        self.flush_searches()
+        self.flush_enrichments()
@@ -0,0 +1,214 @@
+"""
+Company Enrichment Index
+=========================
+
+Local, sorted index of Attio company id → ai_enriched_at, kept current with
+a sync cursor (watermark) so each run pulls only companies modified since the
+previous run. Used by Script 1 (Account Intelligence Engine) for stale-company
+discovery, --tier filtering and audit mode.
+
+Storage:
+  SQLite file under state/
+  - companies: id, name, domain, tier, enriched_at (epoch), updated_at,
+    missing (bitmask of empty AI fields, in ai_fields order), plus
+    deal_stage and signals_at used for scheduling priority
+  - B-tree indexes on enriched_at and (tier, enriched_at), so "stale as of
+    N days" is a range lookup rather than a CRM scan
+  - meta: sync cursor + the AI field list the bitmask was built with (a
+    schema change resets the cursor and forces one full resync)
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+STATE_DIR = Path(__file__).parent.parent / "state"
+DEFAULT_INDEX_PATH = STATE_DIR / "company_index.sqlite"
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    id          TEXT PRIMARY KEY,
+    name        TEXT,
+    domain      TEXT,
+    tier        INTEGER,
+    enriched_at REAL,
+    updated_at  REAL,
+    missing     INTEGER NOT NULL DEFAULT 0,
+    deal_stage  TEXT,
+    signals_at  REAL
+);
+CREATE INDEX IF NOT EXISTS companies_enriched ON companies (enriched_at);
+CREATE INDEX IF NOT EXISTS companies_tier_enriched ON companies (tier, enriched_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+# Columns added after the first release; created on open if missing
+ADDED_COLUMNS = {"deal_stage": "TEXT", "signals_at": "REAL"}
+
+
+def to_epoch(value):
+    """Attio timestamp (ISO string / datetime / epoch) → epoch seconds, or None."""
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def to_iso(epoch):
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat() if epoch else None
+
+
+class CompanyIndex:
+    """Incrementally synced index of company enrichment state."""
+
+    def __init__(self, ai_fields, path=DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ai_fields = list(ai_fields)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(companies)")}
+        added = [column for column in ADDED_COLUMNS if column not in columns]
+        for column in added:
+            self._db.execute(f"ALTER TABLE companies ADD COLUMN {column} {ADDED_COLUMNS[column]}")
+        if added:
+            # Existing rows have NULLs in the new columns until resynced
+            logger.info(f"Index columns {added} added — index will fully resync")
+            self._set_meta("cursor", None)
+            self._db.commit()
+        if self._get_meta("ai_fields") != json.dumps(self.ai_fields):
+            logger.info("AI field list changed — index will fully resync")
+            self._set_meta("ai_fields", json.dumps(self.ai_fields))
+            self._set_meta("cursor", None)
+            self._db.commit()
+
+    def _get_meta(self, key):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    @property
+    def cursor(self):
+        """ISO timestamp of the newest modification seen, or None before first sync."""
+        return self._get_meta("cursor")
+
+    def _missing_mask(self, record):
+        mask = 0
+        for bit, field in enumerate(self.ai_fields):
+            if record.get(field) in (None, "", [], {}):
+                mask |= 1 << bit
+        return mask
+
+    def upsert(self, records):
+        """Insert/replace company records and advance the cursor. Returns count."""
+        cursor = to_epoch(self.cursor) or 0.0
+        rows = []
+        for r in records:
+            updated_at = to_epoch(r.get("updated_at"))
+            if updated_at:
+                cursor = max(cursor, updated_at)
+            rows.append((r["id"], r.get("name"), r.get("domain"), r.get("tier"),
+                         to_epoch(r.get("ai_enriched_at")), updated_at,
+                         self._missing_mask(r), r.get("deal_stage"),
+                         to_epoch(r.get("buying_signals_at"))))
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO companies (id, name, domain, tier, enriched_at, "
+                "updated_at, missing, deal_stage, signals_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            if cursor:
+                self._set_meta("cursor", to_iso(cursor))
+            self._db.commit()
+        return len(rows)
+
+    def sync(self, fetch_modified_since):
+        """
+        Pull records modified at or after the cursor via
+        fetch_modified_since(cursor_iso) (None = full load) and upsert them.
+        """
+        started = time.monotonic()
+        records = fetch_modified_since(self.cursor) or []
+        count = self.upsert(records)
+        logger.info(f"Company index sync: {count} changed records "
+                    f"in {time.monotonic() - started:.2f}s (cursor {self.cursor})")
+        return count
+
+    def mark_enriched(self, company_id, enriched_at):
+        """Record a fresh enrichment locally without waiting for the next sync."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE companies SET enriched_at = ?, missing = 0 WHERE id = ?",
+                (to_epoch(enriched_at), company_id))
+            self._db.commit()
+
+    def stale(self, max_age_days=30, tier=None, limit=None):
+        """
+        Companies never enriched or enriched before now - max_age_days,
+        oldest first (never-enriched first of all). Range lookup on the index.
+        """
+        cutoff = time.time() - max_age_days * DAY
+        sql = ("SELECT id, name, domain, tier, enriched_at, deal_stage, signals_at "
+               "FROM companies "
+               "WHERE (enriched_at IS NULL OR enriched_at < ?)")
+        params = [cutoff]
+        if tier is not None:
+            sql += " AND tier = ?"
+            params.append(tier)
+        sql += " ORDER BY enriched_at IS NOT NULL, enriched_at"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [{"id": r[0], "name": r[1], "domain": r[2], "tier": r[3],
+                 "ai_enriched_at": to_iso(r[4]), "deal_stage": r[5],
+                 "buying_signals_at": to_iso(r[6])} for r in rows]
+
+    def audit(self, tier=None, max_age_days=30):
+        """Enrichment coverage report: totals, age buckets, empties per AI field."""
+        now = time.time()
+        where, params = ("WHERE tier = ?", [tier]) if tier is not None else ("", [])
+        empties = ", ".join(f"SUM((missing >> {bit}) & 1)" for bit in range(len(self.ai_fields)))
+        sql = (
+            "SELECT COUNT(*), "
+            "SUM(enriched_at IS NULL), "
+            "SUM(enriched_at < ?), "
+            "SUM(enriched_at < ?), "
+            f"SUM(missing != 0){', ' + empties if empties else ''} "
+            f"FROM companies {where}"
+        )
+        with self._lock:
+            row = self._db.execute(
+                sql, [now - max_age_days * DAY, now - 90 * DAY] + params).fetchone()
+        total = row[0] or 0
+        return {
+            "total_companies": total,
+            "never_enriched": row[1] or 0,
+            f"stale_over_{max_age_days}_days": row[2] or 0,
+            "stale_over_90_days": row[3] or 0,
+            "with_empty_ai_fields": row[4] or 0,
+            "empty_by_field": {f: (row[5 + i] or 0) for i, f in enumerate(self.ai_fields)},
+            "tier": tier,
+            "cursor": self.cursor,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
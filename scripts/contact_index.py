@@ -0,0 +1,455 @@
+"""
+Contact Resolution Index
+=========================
+
+Local entity-resolution index of Attio people, used by Script 2 (Buying
+Committee Builder) to decide whether each Clay result is a new contact, a
+duplicate to skip, or an existing person to merge into — before any Attio
+person is created.
+
+Blocking keys (each an indexed exact lookup, so candidate search is ~O(1)):
+  e:<email>                 normalized email (lowercase, +tag stripped,
+                            dots ignored for gmail.com)
+  l:<slug>                  LinkedIn profile slug (linkedin.com/in/<slug>)
+  n:<domain>|<first last>   company domain + normalized full name
+  p:<domain>|<soundex>      company domain + first initial + Soundex(last name)
+
+Name matching:
+  Transcript speakers and calendar attendees often carry only a display
+  name ("Jen M.", "jennifer.m", "jmartinez"). Every person is also keyed
+  by company under name_keys:
+    g:<trigram>   character trigrams of first and last name ("^je", "jen"...)
+    s:<soundex>   Soundex of first and last name
+    i:<last>|<f>  last name + first initial
+  match_name() looks candidates up by the display name's keys within the
+  given company ids (the companies on the invite); without a scope only the
+  i: keys of a two-part name are used. Candidates are ranked by a
+  per-part score: exact, initial ("M." → Martinez), prefix ("Jen" →
+  Jennifer), phonetic, else trigram overlap. Scoped lookups touch only a
+  handful of index rows, so matching stays well under a millisecond per
+  name regardless of how many people Attio holds.
+
+Decisions:
+  skip    email / LinkedIn match and the incoming record adds nothing new
+  merge   same person, but the incoming record carries new data (e.g. a
+          different email for the same name at the same company)
+  create  no candidate, or only a weak phonetic match with a different
+          first name
+
+Storage:
+  SQLite file under state/, synced incrementally from Attio via a
+  modification-time cursor and persisted between runs, so batch mode stays
+  linear across thousands of accounts.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+from company_index import to_epoch, to_iso
+
+STATE_DIR = Path(__file__).parent.parent / "state"
+DEFAULT_INDEX_PATH = STATE_DIR / "contact_index.sqlite"
+logger = logging.getLogger(__name__)
+
+Resolution = namedtuple("Resolution", ["decision", "person_id", "matched_on", "score"])
+NameMatch = namedtuple("NameMatch", ["person_id", "company_id", "name", "email", "score"])
+
+# Strength of each key type; strongest match decides
+KEY_SCORES = {"e": 1.0, "l": 1.0, "n": 0.9, "p": 0.6}
+NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "phd", "md", "mba", "cpa", "shrm", "scp", "cp"}
+
+SOUNDEX_CODES = {c: d for d, letters in {"1": "bfpv", "2": "cgjkqsxz", "3": "dt",
+                                         "4": "l", "5": "mn", "6": "r"}.items()
+                 for c in letters}
+
+# Per name part: "M." vs Martinez, "Jen" vs Jennifer, Jon vs John
+INITIAL_SCORE = 0.7
+PREFIX_SCORE = 0.9
+PHONETIC_SCORE = 0.8
+# A lone token ("jen") could be anyone's first or last name
+SINGLE_TOKEN_WEIGHT = 0.8
+NAME_MATCH_THRESHOLD = 0.75
+# Without a company scope only (near-)full names are trusted
+UNSCOPED_MATCH_THRESHOLD = 0.9
+# Runner-up this close to the best → ambiguous, no match
+AMBIGUITY_MARGIN = 0.05
+NAME_CANDIDATES = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS people (
+    id           TEXT PRIMARY KEY,
+    company_id   TEXT,
+    name         TEXT,
+    first_name   TEXT,
+    email        TEXT,
+    linkedin_url TEXT,
+    title        TEXT,
+    phone        TEXT,
+    updated_at   REAL
+);
+CREATE TABLE IF NOT EXISTS person_keys (
+    key       TEXT NOT NULL,
+    person_id TEXT NOT NULL,
+    PRIMARY KEY (key, person_id)
+);
+CREATE INDEX IF NOT EXISTS person_keys_person ON person_keys (person_id);
+CREATE TABLE IF NOT EXISTS name_keys (
+    key        TEXT NOT NULL,
+    company_id TEXT NOT NULL,
+    person_id  TEXT NOT NULL,
+    PRIMARY KEY (key, company_id, person_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS name_keys_person ON name_keys (person_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def normalize_email(email):
+    if not email or "@" not in email:
+        return None
+    local, _, domain = email.strip().lower().partition("@")
+    local = local.split("+", 1)[0]
+    if domain in ("gmail.com", "googlemail.com"):
+        local = local.replace(".", "")
+        domain = "gmail.com"
+    return f"{local}@{domain}"
+
+
+def linkedin_slug(url):
+    if not url:
+        return None
+    match = re.search(r"linkedin\.com/in/([^/?#]+)", url.lower())
+    return match.group(1).strip("-") if match else None
+
+
+def normalize_domain(domain):
+    if not domain:
+        return None
+    domain = re.sub(r"^https?://", "", domain.strip().lower())
+    return domain.split("/", 1)[0].removeprefix("www.")
+
+
+def split_name(person):
+    """(first, last) normalized, with honorific suffixes and punctuation removed."""
+    first = person.get("first_name")
+    last = person.get("last_name")
+    if not (first and last) and person.get("name"):
+        parts = [p for p in re.sub(r"[^a-z\s'-]", " ", person["name"].lower()).split()
+                 if p not in NAME_SUFFIXES]
+        if parts:
+            first, last = parts[0], parts[-1] if len(parts) > 1 else ""
+    clean = lambda s: re.sub(r"[^a-z]", "", (s or "").lower())
+    return clean(first), clean(last)
+
+
+@lru_cache(maxsize=65536)
+def soundex(word):
+    """Classic American Soundex (R163 for Robert/Rupert)."""
+    if not word:
+        return ""
+    word = word.lower()
+    out = word[0].upper()
+    last = SOUNDEX_CODES.get(word[0], "")
+    for ch in word[1:]:
+        code = SOUNDEX_CODES.get(ch, "")
+        if code and code != last:
+            out += code
+        if ch not in "hw":
+            last = code
+    return (out + "000")[:4]
+
+
+def name_tokens(display_name):
+    """Lowercase name parts of a display name or email ("Jen M." / "jennifer.m@x" → jen, m)."""
+    display_name = (display_name or "").lower().split("@", 1)[0]
+    return [p for p in re.split(r"[^a-z]+", display_name) if p and p not in NAME_SUFFIXES]
+
+
+@lru_cache(maxsize=65536)
+def trigrams(part):
+    padded = f"^{part}$"
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def name_keys(parts):
+    """Trigram + Soundex lookup keys for name parts (single letters carry none)."""
+    keys = set()
+    for part in parts:
+        if len(part) > 1:
+            keys.update(f"g:{gram}" for gram in trigrams(part))
+            keys.add(f"s:{soundex(part)}")
+    return keys
+
+
+def initialed_keys(tokens):
+    """Last name + first initial, both ways round ("Martinez, Jen")."""
+    if len(tokens) < 2:
+        return set()
+    first, last = tokens[0], tokens[-1]
+    return {f"i:{a}|{b[0]}" for a, b in ((last, first), (first, last)) if len(a) > 1}
+
+
+def _part_score(token, part):
+    if not token or not part:
+        return 0.0
+    if token == part:
+        return 1.0
+    if len(token) == 1:
+        return INITIAL_SCORE if part[0] == token else 0.0
+    if part.startswith(token) or token.startswith(part):
+        return PREFIX_SCORE
+    if soundex(token) == soundex(part):
+        return PHONETIC_SCORE
+    a, b = trigrams(token), trigrams(part)
+    return len(a & b) / len(a | b)
+
+
+def name_score(tokens, first, last):
+    """0..1 similarity of display-name tokens to a (first, last) name."""
+    if not tokens or not first:
+        return 0.0
+    if len(tokens) == 1:
+        token = tokens[0]
+        # Run-together email local parts: jmartinez, jennifermartinez, jenniferm
+        if last and token in (first + last, first[0] + last, first + last[0]):
+            return PREFIX_SCORE
+        return SINGLE_TOKEN_WEIGHT * max(_part_score(token, first), _part_score(token, last))
+    forward = (_part_score(tokens[0], first) + _part_score(tokens[-1], last)) / 2
+    # "Martinez, Jen"
+    reverse = (_part_score(tokens[-1], first) + _part_score(tokens[0], last)) / 2
+    return max(forward, reverse * 0.95)
+
+
+def blocking_keys(person, company_domain=None):
+    """All blocking keys for a person record."""
+    keys = []
+    email = normalize_email(person.get("email"))
+    if email:
+        keys.append(f"e:{email}")
+    slug = linkedin_slug(person.get("linkedin_url"))
+    if slug:
+        keys.append(f"l:{slug}")
+    domain = normalize_domain(company_domain or person.get("company_domain")) or (
+        email.split("@", 1)[1] if email else None)
+    first, last = split_name(person)
+    if domain and first and last:
+        keys.append(f"n:{domain}|{first} {last}")
+        keys.append(f"p:{domain}|{first[0]}{soundex(last)}")
+    return keys
+
+
+class ContactIndex:
+    """Persistent blocking-key index over Attio people."""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self.stats = {"create": 0, "merge": 0, "skip": 0,
+                      "name_matched": 0, "name_ambiguous": 0, "name_unmatched": 0}
+        self._backfill_name_keys()
+
+    def _backfill_name_keys(self):
+        """Index names of people stored before name_keys existed."""
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM name_keys LIMIT 1").fetchone():
+                return
+            rows = self._db.execute(
+                "SELECT id, company_id, name, first_name FROM people").fetchall()
+            for person_id, company_id, name, first_name in rows:
+                self._index_name(person_id, company_id,
+                                 {"name": name, "first_name": first_name})
+            self._db.commit()
+        if rows:
+            logger.info(f"Contact index: indexed names of {len(rows)} people")
+
+    def _index_name(self, person_id, company_id, person):
+        """Replace a person's name keys (caller holds the lock)."""
+        first, last = split_name(person)
+        keys = name_keys((first, last))
+        if first and last:
+            keys.add(f"i:{last}|{first[0]}")
+        self._db.execute("DELETE FROM name_keys WHERE person_id = ?", (person_id,))
+        self._db.executemany("INSERT OR IGNORE INTO name_keys VALUES (?, ?, ?)",
+                             [(key, company_id or "", person_id) for key in keys])
+
+    @property
+    def cursor(self):
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'cursor'").fetchone()
+        return row[0] if row else None
+
+    def add(self, person_id, person, company_domain=None, company_id=None, commit=True):
+        """Insert or refresh a person and its blocking keys."""
+        first, _ = split_name(person)
+        company_id = company_id or person.get("company_id")
+        name = person.get("name") or " ".join(
+            n for n in (person.get("first_name"), person.get("last_name")) if n) or None
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO people VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (person_id, company_id, name,
+                 first, person.get("email"), person.get("linkedin_url"),
+                 person.get("title"), person.get("phone"),
+                 to_epoch(person.get("updated_at")) or time.time()))
+            self._index_name(person_id, company_id, person)
+            self._db.execute("DELETE FROM person_keys WHERE person_id = ?", (person_id,))
+            self._db.executemany(
+                "INSERT OR IGNORE INTO person_keys VALUES (?, ?)",
+                [(key, person_id) for key in blocking_keys(person, company_domain)])
+            if commit:
+                self._db.commit()
+
+    def merge(self, person_id, person, company_domain=None):
+        """
+        Record merged data: take the incoming title / phone when given (they
+        change over time), fill empty email / LinkedIn, keep the old keys as
+        aliases.
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE people SET email = COALESCE(email, ?), "
+                "linkedin_url = COALESCE(linkedin_url, ?), title = COALESCE(?, title), "
+                "phone = COALESCE(?, phone), updated_at = ? WHERE id = ?",
+                (person.get("email"), person.get("linkedin_url"), person.get("title"),
+                 person.get("phone"), time.time(), person_id))
+            self._db.executemany(
+                "INSERT OR IGNORE INTO person_keys VALUES (?, ?)",
+                [(key, person_id) for key in blocking_keys(person, company_domain)])
+            self._db.commit()
+
+    def sync(self, fetch_people_modified_since):
+        """
+        Pull people modified at or after the cursor via
+        fetch_people_modified_since(cursor_iso) (None = full load). Each record
+        needs id, name (or first/last), email, linkedin_url, company_domain,
+        company_id, updated_at.
+        """
+        started = time.monotonic()
+        records = fetch_people_modified_since(self.cursor) or []
+        newest = to_epoch(self.cursor) or 0.0
+        for record in records:
+            self.add(record["id"], record, commit=False)
+            newest = max(newest, to_epoch(record.get("updated_at")) or 0.0)
+        with self._lock:
+            if newest:
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('cursor', ?)",
+                                 (to_iso(newest),))
+            self._db.commit()
+        logger.info(f"Contact index sync: {len(records)} changed people "
+                    f"in {time.monotonic() - started:.2f}s")
+        return len(records)
+
+    def candidates(self, person, company_domain=None):
+        """{person_id: (best key type, score)} for every blocking-key hit."""
+        keys = blocking_keys(person, company_domain)
+        if not keys:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT key, person_id FROM person_keys WHERE key IN "
+                f"({','.join('?' * len(keys))})", keys).fetchall()
+        found = {}
+        for key, person_id in rows:
+            kind = key[0]
+            if KEY_SCORES[kind] > found.get(person_id, ("", 0.0))[1]:
+                found[person_id] = (kind, KEY_SCORES[kind])
+        return found
+
+    def resolve(self, person, company_domain=None):
+        """Decide create / merge / skip for an incoming person."""
+        found = self.candidates(person, company_domain)
+        if not found:
+            self.stats["create"] += 1
+            return Resolution("create", None, None, 0.0)
+        person_id, (kind, score) = max(found.items(), key=lambda kv: kv[1][1])
+        with self._lock:
+            existing = self._db.execute(
+                "SELECT first_name, title, phone FROM people WHERE id = ?",
+                (person_id,)).fetchone()
+        existing = dict(zip(("first_name", "title", "phone"), existing or ()))
+        if kind == "p":
+            # Phonetic surname match only counts if first names agree too
+            first, _ = split_name(person)
+            known_first = existing.get("first_name") or ""
+            if not first or not known_first or first[:3] != known_first[:3]:
+                self.stats["create"] += 1
+                return Resolution("create", None, None, 0.0)
+        # New data = an email / LinkedIn not yet keyed to this person, or a
+        # title / phone that differs from what's stored
+        with self._lock:
+            known_keys = {k for (k,) in self._db.execute(
+                "SELECT key FROM person_keys WHERE person_id = ?", (person_id,))}
+        new_keys = [k for k in blocking_keys(person, company_domain)
+                    if k[0] in "el" and k not in known_keys]
+        new_data = bool(new_keys) or any(
+            person.get(f) and person[f] != existing.get(f) for f in ("title", "phone"))
+        decision = "merge" if new_data else "skip"
+        self.stats[decision] += 1
+        return Resolution(decision, person_id, kind, score)
+
+    def match_name(self, display_name, company_ids=None, k=5):
+        """
+        Ranked NameMatches (best first) for a display name, among people at
+        company_ids (None = everyone). Only candidates scoring above zero are
+        returned.
+        """
+        tokens = name_tokens(display_name)
+        keys = sorted(name_keys(tokens) if company_ids is not None else initialed_keys(tokens))
+        if not keys:
+            return []
+        sql = (f"SELECT p.id, p.company_id, p.name, p.first_name, p.email FROM people p "
+               f"JOIN (SELECT person_id, COUNT(*) AS hits FROM name_keys "
+               f"WHERE key IN ({','.join('?' * len(keys))})")
+        params = list(keys)
+        if company_ids is not None:
+            company_ids = [str(c) for c in company_ids if c]
+            if not company_ids:
+                return []
+            sql += f" AND company_id IN ({','.join('?' * len(company_ids))})"
+            params += company_ids
+        sql += " GROUP BY person_id ORDER BY hits DESC LIMIT ?) h ON h.person_id = p.id"
+        params.append(NAME_CANDIDATES)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        matches = []
+        for person_id, company_id, name, first_name, email in rows:
+            score = name_score(tokens, *split_name({"name": name, "first_name": first_name}))
+            if score > 0:
+                matches.append(NameMatch(person_id, company_id or None, name, email,
+                                         round(score, 3)))
+        matches.sort(key=lambda m: m.score, reverse=True)
+        return matches[:k]
+
+    def best_name_match(self, display_name, company_ids=None):
+        """
+        The single person a display name refers to, or None when nothing
+        clears the threshold (stricter without a company scope) or the top
+        two candidates are too close to call.
+        """
+        scoped = bool(company_ids)
+        matches = self.match_name(display_name, company_ids if scoped else None, k=2)
+        threshold = NAME_MATCH_THRESHOLD if scoped else UNSCOPED_MATCH_THRESHOLD
+        if not matches or matches[0].score < threshold:
+            self.stats["name_unmatched"] += 1
+            return None
+        if len(matches) > 1 and matches[0].score - matches[1].score < AMBIGUITY_MARGIN:
+            self.stats["name_ambiguous"] += 1
+            logger.debug(f"{display_name!r} is ambiguous: {matches[0].name} / {matches[1].name}")
+            return None
+        self.stats["name_matched"] += 1
+        return matches[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
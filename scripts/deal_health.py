@@ -0,0 +1,164 @@
+"""
+Deal Health Rules
+==================
+
+Compiles config/pipeline_stages.yaml into per-stage threshold arrays and
+checks every active deal in one NumPy pass. Used by Script 6 (Pipeline
+Health Monitor) for the Monday run and on-demand checks.
+
+Columns (one entry per deal, built once from the Attio deals):
+  stage              index into the configured stages (unknown stages get
+                     no thresholds and never alert)
+  days_in_stage      days since the deal entered its current stage
+  activity_age       days since the last email / meeting / note (inf = never)
+  meeting_scheduled  an upcoming meeting is on the deal
+  fields             bitmask of the tracked fields that are filled in (every
+                     field named in any stage's required_fields)
+
+Issues (one bit each in a per-deal uint64 mask):
+  overdue            days_in_stage > expected_max_days
+  stalled            the stage's stall_signal for stall_alert_days:
+                     "no activity" → no activity in that many days,
+                     "no meeting scheduled" → that long in stage, none booked
+  inactive           no activity for activity_thresholds (early stages, order
+                     <= EARLY_STAGE_MAX_ORDER, vs. mid stages)
+  missing_<field>    a required field of the stage is empty (one bit per field)
+
+A mask of 0 means the deal is healthy; only flagged deals are turned into
+alert text.
+"""
+
+import logging
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from company_index import to_epoch
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+EARLY_STAGE_MAX_ORDER = 2
+ISSUES = ("overdue", "stalled", "inactive")
+MEETING_STALL_SIGNAL = "no meeting scheduled"
+
+DealColumns = namedtuple("DealColumns", ["ids", "names", "stage", "days_in_stage",
+                                         "activity_age", "meeting_scheduled", "fields"])
+DealHealth = namedtuple("DealHealth", ["columns", "issues"])
+
+
+def _filled(deal, field):
+    """Deal attribute, falling back to the linked company record (ai_* fields)."""
+    value = deal.get(field)
+    if value in (None, "", [], {}):
+        value = (deal.get("company") or {}).get(field)
+    return value not in (None, "", [], {})
+
+
+class DealHealthRules:
+    """pipeline_stages.yaml compiled to per-stage arrays + a vectorized check."""
+
+    def __init__(self, stage_config):
+        stages = sorted(stage_config["stages"].items(), key=lambda kv: kv[1]["order"])
+        self.slugs = [slug for slug, _ in stages]
+        self.stage_names = [stage["name"] for _, stage in stages] + ["Unknown"]
+        self.fields = sorted({f for _, stage in stages for f in stage.get("required_fields", [])})
+        self.issue_names = [*ISSUES, *(f"missing_{f}" for f in self.fields)]
+        if len(self.issue_names) > 64:
+            raise ValueError(f"{len(self.fields)} required fields don't fit an issue bitmask")
+        self._stage_index = {}
+        for i, (slug, stage) in enumerate(stages):
+            self._stage_index[slug.lower()] = i
+            self._stage_index[stage["name"].lower()] = i
+        thresholds = stage_config.get("activity_thresholds", {})
+        early = thresholds.get("early_stage_inactivity_days", np.nan)
+        mid = thresholds.get("mid_stage_inactivity_days", np.nan)
+        # Index len(stages) is the unknown stage; a NaN threshold never fires,
+        # not even for deals with no activity at all (age inf)
+        self.expected_max_days = np.array(
+            [s.get("expected_max_days", np.nan) for _, s in stages] + [np.nan], dtype=float)
+        self.stall_alert_days = np.array(
+            [s.get("stall_alert_days", np.nan) for _, s in stages] + [np.nan], dtype=float)
+        self.stall_on_meeting = np.array(
+            [s.get("stall_signal") == MEETING_STALL_SIGNAL for _, s in stages] + [False])
+        self.inactivity_days = np.array(
+            [early if s["order"] <= EARLY_STAGE_MAX_ORDER else mid for _, s in stages]
+            + [np.nan], dtype=float)
+        self.required = np.array(
+            [sum(1 << self.fields.index(f) for f in s.get("required_fields", []))
+             for _, s in stages] + [0], dtype=np.uint64)
+
+    @classmethod
+    def from_config(cls, path=CONFIG_DIR / "pipeline_stages.yaml"):
+        with open(path) as f:
+            return cls(yaml.safe_load(f))
+
+    def stage_index(self, stage):
+        """Stage slug or display name → index (len(slugs) when not configured)."""
+        if isinstance(stage, dict):
+            stage = stage.get("slug") or stage.get("name") or stage.get("title")
+        return self._stage_index.get(str(stage or "").strip().lower(), len(self.slugs))
+
+    def columns(self, deals, now=None):
+        """
+        Attio deals → DealColumns. Each deal needs id, name, stage (slug or
+        name), stage_changed_at, last_activity_at, next_meeting_at (optional)
+        and the tracked fields (on the deal or its "company").
+        """
+        now = now if now is not None else datetime.now(timezone.utc).timestamp()
+        n = len(deals)
+
+        def epochs(key, missing):
+            return np.fromiter((to_epoch(d.get(key)) or missing for d in deals), float, n)
+
+        stage = np.fromiter((self.stage_index(d.get("stage")) for d in deals), np.intp, n)
+        fields = np.zeros(n, dtype=np.uint64)
+        for bit, field in enumerate(self.fields):
+            filled = np.fromiter((_filled(d, field) for d in deals), bool, n)
+            fields |= filled.astype(np.uint64) << np.uint64(bit)
+        return DealColumns(
+            np.array([d.get("id") for d in deals], dtype=object),
+            np.array([d.get("name") for d in deals], dtype=object),
+            stage, (now - epochs("stage_changed_at", np.nan)) / DAY,
+            (now - epochs("last_activity_at", -np.inf)) / DAY,
+            epochs("next_meeting_at", 0.0) > now, fields)
+
+    def evaluate(self, columns):
+        """DealColumns → DealHealth with one issue bitmask (uint64) per deal."""
+        started = time.perf_counter()
+        s = columns.stage
+        days, age = columns.days_in_stage, columns.activity_age
+        stall_days = self.stall_alert_days[s]
+        with np.errstate(invalid="ignore"):
+            overdue = days > self.expected_max_days[s]
+            stalled = np.where(self.stall_on_meeting[s],
+                               (days >= stall_days) & ~columns.meeting_scheduled,
+                               age >= stall_days)
+            inactive = age >= self.inactivity_days[s]
+        missing = self.required[s] & ~columns.fields
+        issues = (overdue.astype(np.uint64)
+                  | (stalled.astype(np.uint64) << np.uint64(1))
+                  | (inactive.astype(np.uint64) << np.uint64(2))
+                  | (missing << np.uint64(len(ISSUES))))
+        logger.info(f"Deal health: {len(s):,} deals checked in "
+                    f"{(time.perf_counter() - started) * 1000:.1f}ms, "
+                    f"{np.count_nonzero(issues):,} flagged")
+        return DealHealth(columns, issues)
+
+    def check(self, deals, now=None):
+        return self.evaluate(self.columns(deals, now))
+
+    def issue_list(self, mask):
+        """Issue bitmask → issue names."""
+        mask = int(mask)
+        return [name for bit, name in enumerate(self.issue_names) if mask >> bit & 1]
+
+    def counts(self, health):
+        """{issue name: number of deals} across a DealHealth."""
+        return {name: int(np.count_nonzero(health.issues >> np.uint64(bit) & np.uint64(1)))
+                for bit, name in enumerate(self.issue_names)}
@@ -0,0 +1,154 @@
+"""
+Decision Table Engine
+======================
+
+Loads the declarative tables in config/gtm_decision_tables.yaml and compiles
+each into a vectorized evaluator. Used by Script 1 (Account Intelligence
+Engine) to assign next_bext_action and claude_ai_gtm_channel for whole batches
+of companies in one pass, with no Claude calls and no per-record branching.
+
+Compilation:
+  - Every distinct (fact, operator, value) condition across a table's rules
+    becomes one predicate, evaluated once per batch as a boolean array and
+    shared by all rules that use it
+  - Each rule is the AND of its predicate columns
+  - First-match-wins is an argmax over the (companies x rules) match matrix,
+    with the default appended as an always-true final rule
+
+Unknown facts:
+  None / NaN means the fact was never fetched for that company. Every
+  condition on an unknown fact is false (ne and not_in included), so rules
+  that need it fall through instead of treating it as 0 / "" / False.
+
+Results are aligned arrays: output, rule_id, reason, confidence.
+"""
+
+import numpy as np
+import yaml
+from pathlib import Path
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+DEFAULT_RULE_ID = "default"
+
+OPERATORS = {
+    "eq": lambda col, v: col == v,
+    "ne": lambda col, v: col != v,
+    "in": lambda col, v: np.isin(col, list(v)),
+    "not_in": lambda col, v: ~np.isin(col, list(v)),
+    "lt": lambda col, v: col < v,
+    "lte": lambda col, v: col <= v,
+    "gt": lambda col, v: col > v,
+    "gte": lambda col, v: col >= v,
+    "contains": lambda col, v: np.char.find(col.astype(str), str(v).lower()) >= 0,
+}
+
+
+def known(column):
+    """False where a fact is unknown (None / NaN)."""
+    if column.dtype.kind == "f":
+        return ~np.isnan(column)
+    if column.dtype == object:
+        return np.fromiter((v is not None and v == v for v in column), bool, len(column))
+    return np.ones(len(column), dtype=bool)
+
+
+class DecisionTable:
+    """One compiled first-match-wins decision table."""
+
+    def __init__(self, name, table, allowed_outputs=None):
+        self.name = name
+        self.default = table["default"]
+        rules = table.get("rules", [])
+        allowed = set(allowed_outputs or table.get("options") or [])
+        self.options = allowed
+        # False = option labels not yet checked against the Attio select
+        self.options_confirmed = bool(table.get("options_confirmed", True))
+        for rule in rules:
+            if allowed and rule["then"] not in allowed:
+                raise ValueError(f"{name}: rule {rule['id']} outputs unknown option "
+                                 f"{rule['then']!r}")
+            for fact, conditions in rule["when"].items():
+                for op in conditions:
+                    if op not in OPERATORS:
+                        raise ValueError(f"{name}: rule {rule['id']} uses unknown "
+                                         f"operator {op!r} on {fact}")
+        if allowed and self.default not in allowed:
+            raise ValueError(f"{name}: default {self.default!r} is not a valid option")
+        self._compile(rules)
+
+    def _compile(self, rules):
+        self.predicates = []   # (fact, op, value)
+        predicate_index = {}
+        self.rule_predicates = []
+        for rule in rules:
+            cols = []
+            for fact, conditions in rule["when"].items():
+                for op, value in conditions.items():
+                    key = (fact, op, tuple(value) if isinstance(value, list) else value)
+                    if key not in predicate_index:
+                        predicate_index[key] = len(self.predicates)
+                        self.predicates.append((fact, op, value))
+                    cols.append(predicate_index[key])
+            self.rule_predicates.append(np.array(cols, dtype=int))
+        self.facts = sorted({fact for fact, _, _ in self.predicates})
+        self.outputs = np.array([r["then"] for r in rules] + [self.default], dtype=object)
+        self.rule_ids = np.array([r["id"] for r in rules] + [DEFAULT_RULE_ID], dtype=object)
+        self.reasons = np.array([r.get("reason", "") for r in rules]
+                                + ["No rule matched"], dtype=object)
+        # NaN = "use the caller's confidence" for rules without a fixed one
+        self.confidences = np.array([r.get("confidence", np.nan) for r in rules]
+                                    + [np.nan], dtype=float)
+
+    def evaluate(self, facts):
+        """
+        Evaluate the table over a batch. `facts` maps fact name → array (one
+        entry per company). Returns dict of aligned arrays: output, rule_id,
+        reason, confidence (NaN where the rule sets none), rule_index.
+        """
+        missing = [f for f in self.facts if f not in facts]
+        if missing:
+            raise KeyError(f"{self.name}: missing facts {missing}")
+        n = len(next(iter(facts.values()))) if facts else 0
+        columns = {fact: np.asarray(facts[fact]) for fact in self.facts}
+        is_known = {fact: known(column) for fact, column in columns.items()}
+        with np.errstate(invalid="ignore"):
+            predicate_matrix = np.stack(
+                [OPERATORS[op](columns[fact], value) & is_known[fact]
+                 for fact, op, value in self.predicates], axis=1
+            ) if self.predicates else np.zeros((n, 0), dtype=bool)
+        matches = np.ones((n, len(self.outputs)), dtype=bool)
+        for r, cols in enumerate(self.rule_predicates):
+            matches[:, r] = predicate_matrix[:, cols].all(axis=1)
+        fired = np.argmax(matches, axis=1)
+        return {
+            "output": self.outputs[fired],
+            "rule_id": self.rule_ids[fired],
+            "reason": self.reasons[fired],
+            "confidence": self.confidences[fired],
+            "rule_index": fired,
+        }
+
+
+def load_decision_tables(attio_config=None, path=CONFIG_DIR / "gtm_decision_tables.yaml"):
+    """Compile the NBA + GTM channel tables, validating outputs against the schema."""
+    with open(path) as f:
+        tables = yaml.safe_load(f)
+    nba_options = channel_options = None
+    for field in (attio_config or {}).get("company_ai_fields", []):
+        if field["slug"] == "next_bext_action":
+            nba_options = field.get("options")
+        elif field["slug"] == "claude_ai_gtm_channel":
+            # Schema labels, when recorded, are authoritative over the table's
+            channel_options = field.get("options")
+            expected = field.get("option_count")
+            options = tables["gtm_channel"].get("options", [])
+            if expected and len(options) != expected:
+                raise ValueError(f"gtm_channel lists {len(options)} options, "
+                                 f"Attio has {expected}")
+    if channel_options:
+        tables["gtm_channel"]["options_confirmed"] = True
+    return {
+        "next_best_action": DecisionTable(
+            "next_best_action", tables["next_best_action"], nba_options),
+        "gtm_channel": DecisionTable("gtm_channel", tables["gtm_channel"], channel_options),
+    }
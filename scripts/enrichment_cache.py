@@ -0,0 +1,204 @@
+"""
+Enrichment Cache
+=================
+
+Persistent on-disk cache for Clay + web research responses, keyed by company
+domain. Used by Script 1 (Account Intelligence Engine) so that refreshes
+inside a source's TTL reuse the stored response instead of spending Clay
+credits or search calls again.
+
+Storage:
+  SQLite file under state/ (one row per source + domain)
+  - Per-source TTLs (Clay data ages slower than news/job postings)
+  - LRU eviction once the cache holds more than max_entries rows
+  - sha256 content hash per response
+
+Change detection:
+  The combined hash of the Clay + web payloads last written to Attio is
+  recorded per domain. If a refresh produces the same hash, scoring and the
+  Attio write can be skipped entirely.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+STATE_DIR = Path(__file__).parent.parent / "state"
+DEFAULT_CACHE_PATH = STATE_DIR / "enrichment_cache.sqlite"
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+DEFAULT_TTLS = {
+    "clay": 21 * DAY,  # firmographics, tech stack, key people
+    "web": 7 * DAY,    # news, job postings, compliance announcements
+}
+DEFAULT_MAX_ENTRIES = 50000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    source       TEXT NOT NULL,
+    key          TEXT NOT NULL,
+    payload      TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    fetched_at   REAL NOT NULL,
+    accessed_at  REAL NOT NULL,
+    PRIMARY KEY (source, key)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS applied (
+    key          TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    applied_at   REAL NOT NULL
+);
+"""
+
+
+def content_hash(*payloads):
+    """Stable sha256 over one or more JSON-serializable payloads."""
+    blob = json.dumps(payloads, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class EnrichmentCache:
+    """SQLite-backed TTL + LRU cache for enrichment responses."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttls=None,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._size = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.unchanged = 0
+
+    @staticmethod
+    def normalize_key(domain):
+        return domain.strip().lower().removeprefix("www.") if domain else None
+
+    def get(self, source, domain):
+        """Return the cached payload if present and within TTL, else None."""
+        key = self.normalize_key(domain)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload, fetched_at FROM entries WHERE source = ? AND key = ?",
+                (source, key)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if now - row[1] > self.ttls.get(source, 0):
+                self.expired += 1
+                return None
+            self._db.execute(
+                "UPDATE entries SET accessed_at = ? WHERE source = ? AND key = ?",
+                (now, source, key))
+            self._db.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, source, domain, payload):
+        """Store a fresh response and evict least-recently-used rows if over size."""
+        key = self.normalize_key(domain)
+        now = time.time()
+        with self._lock:
+            existed = self._db.execute(
+                "SELECT 1 FROM entries WHERE source = ? AND key = ?",
+                (source, key)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (source, key, json.dumps(payload, sort_keys=True, default=str),
+                 content_hash(payload), now, now))
+            if not existed:
+                self._size += 1
+            if self._size > self.max_entries:
+                self._evict(self._size - self.max_entries)
+            self._db.commit()
+
+    def _evict(self, count):
+        self._db.execute(
+            "DELETE FROM entries WHERE rowid IN "
+            "(SELECT rowid FROM entries ORDER BY accessed_at LIMIT ?)", (count,))
+        self._size -= count
+        self.evictions += count
+
+    def get_or_fetch(self, source, domain, fetch):
+        """Serve from cache, or call fetch() and store its (non-empty) result."""
+        if not domain:
+            return fetch()
+        payload = self.get(source, domain)
+        if payload is not None:
+            return payload
+        payload = fetch()
+        if payload:
+            self.put(source, domain, payload)
+        return payload
+
+    def is_unchanged(self, domain, *payloads):
+        """True if these payloads hash to what was last written to Attio."""
+        key = self.normalize_key(domain)
+        if not key:
+            return False
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content_hash FROM applied WHERE key = ?", (key,)).fetchone()
+        unchanged = row is not None and row[0] == content_hash(*payloads)
+        if unchanged:
+            self.unchanged += 1
+        return unchanged
+
+    def mark_applied(self, domain, *payloads):
+        """Record the payload hash that was just written to Attio."""
+        key = self.normalize_key(domain)
+        if not key:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO applied VALUES (?, ?, ?)",
+                (key, content_hash(*payloads), time.time()))
+            self._db.commit()
+
+    def stats(self):
+        """Session counters plus on-disk totals per source."""
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT source, COUNT(*), MIN(fetched_at) FROM entries GROUP BY source"
+            ).fetchall()
+        by_source = {}
+        for source, count, oldest in rows:
+            by_source[source] = {
+                "entries": count,
+                "oldest_age_days": round((now - oldest) / DAY, 1),
+                "ttl_days": round(self.ttls.get(source, 0) / DAY, 1),
+            }
+        lookups = self.hits + self.misses + self.expired
+        return {
+            "path": str(self.path),
+            "size_bytes": self.path.stat().st_size if self.path.exists() else 0,
+            "entries": self._size,
+            "max_entries": self.max_entries,
+            "by_source": by_source,
+            "session": {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "unchanged_skips": self.unchanged,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            },
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
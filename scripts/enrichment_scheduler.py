@@ -0,0 +1,156 @@
+"""
+Enrichment Scheduler
+=====================
+
+Priority-queue scheduling with a per-run budget for Script 1 (Account
+Intelligence Engine). Stale companies are ordered on a heap so the most
+valuable accounts are enriched first, and the run stops cleanly once the
+Clay credit, web search or wall-clock budget is used up, so a partial run
+has still covered the accounts that matter most.
+
+Priority (higher runs first), each component normalised to 0-1:
+  - tier                 tier 1 > 2 > 3 (unknown tier ranks lowest)
+  - open deal stage      later pipeline stage (pipeline_stages.yaml order) ranks higher
+  - signal freshness     exponential decay on the newest buying signal
+  - enrichment age       never enriched = 1, else age / ENRICHMENT_AGE_CAP_DAYS
+
+Budget:
+  Each dispatched company reserves its worst-case cost (one Clay enrichment
+  + one web research). Actual vendor calls are recorded as they happen
+  (cache hits cost nothing) and the reservation is released when the
+  company finishes, so concurrent runs never overshoot the limit.
+"""
+
+import heapq
+import logging
+import math
+import threading
+import time
+import yaml
+from pathlib import Path
+
+from company_index import to_epoch
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+PRIORITY_WEIGHTS = {"tier": 4.0, "deal_stage": 3.0, "signal_freshness": 2.0,
+                    "enrichment_age": 1.0}
+TIER_SCORES = {1: 1.0, 2: 0.6, 3: 0.3}
+UNKNOWN_TIER_SCORE = 0.1
+SIGNAL_HALF_LIFE_DAYS = 14
+ENRICHMENT_AGE_CAP_DAYS = 90
+# Lowercased names of stages that end a deal
+CLOSED_STAGES = {"won", "lost", "closed won", "closed lost"}
+# Worst-case vendor calls per company enrichment
+DEFAULT_UNIT_COSTS = {"clay": 1, "web": 1}
+
+
+def load_stage_order():
+    """
+    Pipeline stage name → order, for open stages only: a closed stage
+    (CLOSED_STAGES, should pipeline_stages.yaml ever list one) ranks like no
+    open deal.
+    """
+    with open(CONFIG_DIR / "pipeline_stages.yaml") as f:
+        stages = yaml.safe_load(f)["stages"]
+    return {s["name"]: s["order"] for s in stages.values()
+            if s["name"].lower() not in CLOSED_STAGES}
+
+
+class RunBudget:
+    """Per-run limits on Clay credits, web searches and wall-clock time."""
+
+    def __init__(self, clay_credits=None, web_searches=None, seconds=None,
+                 unit_costs=None):
+        self.limits = {"clay": clay_credits, "web": web_searches}
+        self.seconds = seconds
+        self.unit_costs = {**DEFAULT_UNIT_COSTS, **(unit_costs or {})}
+        self.spent = {"clay": 0, "web": 0}
+        self.reserved = {"clay": 0, "web": 0}
+        self.started = time.monotonic()
+        self.exhausted_by = None
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def reserve(self):
+        """Reserve one company's worst-case cost. False once any limit is hit."""
+        with self._lock:
+            if self.seconds is not None and self.elapsed() >= self.seconds:
+                self.exhausted_by = "wall_clock"
+                return False
+            for vendor, limit in self.limits.items():
+                cost = self.unit_costs[vendor]
+                if limit is not None and self.spent[vendor] + self.reserved[vendor] + cost > limit:
+                    self.exhausted_by = vendor
+                    return False
+            for vendor in self.reserved:
+                self.reserved[vendor] += self.unit_costs[vendor]
+            return True
+
+    def release(self):
+        """Release a finished company's reservation (actual spend already recorded)."""
+        with self._lock:
+            for vendor in self.reserved:
+                self.reserved[vendor] -= self.unit_costs[vendor]
+
+    def spend(self, vendor, amount=None):
+        """Record an actual vendor call (cache misses only)."""
+        with self._lock:
+            self.spent[vendor] += self.unit_costs[vendor] if amount is None else amount
+
+    def summary(self):
+        return {"spent": dict(self.spent), "limits": dict(self.limits),
+                "seconds_limit": self.seconds, "elapsed_seconds": round(self.elapsed(), 1),
+                "exhausted_by": self.exhausted_by}
+
+
+class EnrichmentScheduler:
+    """Heap of stale companies, popped highest priority first within budget."""
+
+    def __init__(self, companies, budget=None, now=None):
+        self.budget = budget or RunBudget()
+        self.now = now or time.time()
+        self.stage_order = load_stage_order()
+        self.max_stage = max(self.stage_order.values())
+        self._heap = []
+        for seq, company in enumerate(companies):
+            heapq.heappush(self._heap, (-self.priority(company), seq, company))
+        self.dispatched = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def priority(self, company):
+        tier = TIER_SCORES.get(company.get("tier"), UNKNOWN_TIER_SCORE)
+        stage = self.stage_order.get(company.get("deal_stage") or "", 0) / self.max_stage
+        signals_at = to_epoch(company.get("buying_signals_at"))
+        freshness = 0.0
+        if signals_at:
+            age_days = max(self.now - signals_at, 0) / DAY
+            freshness = math.pow(0.5, age_days / SIGNAL_HALF_LIFE_DAYS)
+        enriched_at = to_epoch(company.get("ai_enriched_at"))
+        age = 1.0 if enriched_at is None else min(
+            (self.now - enriched_at) / DAY / ENRICHMENT_AGE_CAP_DAYS, 1.0)
+        return (PRIORITY_WEIGHTS["tier"] * tier
+                + PRIORITY_WEIGHTS["deal_stage"] * stage
+                + PRIORITY_WEIGHTS["signal_freshness"] * freshness
+                + PRIORITY_WEIGHTS["enrichment_age"] * age)
+
+    def __iter__(self):
+        while self._heap:
+            if not self.budget.reserve():
+                logger.info(f"Budget exhausted ({self.budget.exhausted_by}) after "
+                            f"{self.dispatched} companies; {len(self._heap)} left "
+                            f"for the next run")
+                return
+            _, _, company = heapq.heappop(self._heap)
+            self.dispatched += 1
+            yield company
+
+    def complete(self, company):
+        """Mark a dispatched company finished, releasing its reservation."""
+        self.budget.release()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Fake Claude
+============
+
+In-process stub of the Anthropic Messages + Message Batches APIs, for
+exercising sequence_generation.py and Script 3 without API keys or spend.
+Responses are deterministic JSON built from the prompt; usage mimics prompt
+caching (a system prefix up to a cache_control breakpoint that was seen
+before is billed as cache_read, otherwise cache_creation) with ~4 chars per
+token. tests/test_sequence_generation.py uses it for the memo, batching
+and cancellation paths.
+
+Run directly for a token / latency comparison of per-contact prompts vs. the
+grouped, prefix-cached, memoized generator:
+
+  python scripts/fake_claude.py --accounts 50 --contacts-per-account 5
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import re
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from enrichment_cache import EnrichmentCache
+from sequence_generation import CACHE_SOURCE, CACHE_TTL
+
+CHARS_PER_TOKEN = 4
+
+
+def _tokens(text):
+    return max(len(text) // CHARS_PER_TOKEN, 1)
+
+
+class _Batches:
+    """
+    A batch ends after client.batch_polls retrieve() calls (0 = ended on
+    create, None = only once cancelled). Requests are answered when the
+    batch ends; a cancelled batch answers none of them ("canceled").
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._batches = {}   # id -> {"requests", "status", "polls", "entries"}
+        self.cancelled = []
+
+    def _status(self, batch_id):
+        return SimpleNamespace(id=batch_id, processing_status=self._batches[batch_id]["status"])
+
+    def _end(self, batch):
+        cancelled = batch["status"] == "canceling"
+        batch["entries"] = [
+            SimpleNamespace(custom_id=r["custom_id"], result=SimpleNamespace(
+                type="canceled", message=None) if cancelled else SimpleNamespace(
+                type="succeeded", message=self.client.messages.create(**r["params"])))
+            for r in batch["requests"]]
+        batch["status"] = "ended"
+
+    def create(self, requests):
+        batch_id = f"msgbatch_{len(self._batches) + 1:04d}"
+        batch = self._batches[batch_id] = {"requests": list(requests), "status": "in_progress",
+                                           "polls": 0, "entries": None}
+        if self.client.batch_polls == 0:
+            self._end(batch)
+        return self._status(batch_id)
+
+    def retrieve(self, batch_id):
+        batch = self._batches[batch_id]
+        if batch["status"] != "ended":
+            batch["polls"] += 1
+            if batch["status"] == "canceling" or batch["polls"] == self.client.batch_polls:
+                self._end(batch)
+        return self._status(batch_id)
+
+    def results(self, batch_id):
+        entries = self._batches[batch_id]["entries"]
+        if entries is None:
+            raise RuntimeError(f"Batch {batch_id} has not ended")
+        return iter(entries)
+
+    def cancel(self, batch_id):
+        batch = self._batches[batch_id]
+        self.cancelled.append(batch_id)
+        if batch["status"] != "ended":
+            batch["status"] = "canceling"
+        return self._status(batch_id)
+
+
+class _Messages:
+    def __init__(self, client):
+        self.client = client
+        self.batches = _Batches(client)
+
+    def create(self, model, max_tokens, messages, system=None, **kwargs):
+        client = self.client
+        client.calls += 1
+        if client.latency:
+            time.sleep(client.latency)
+        blocks = system if isinstance(system, list) else (
+            [{"type": "text", "text": system}] if system else [])
+        cached = uncached = cache_write = 0
+        prefix = ""
+        pending = 0
+        for block in blocks:
+            prefix += block["text"]
+            pending += _tokens(block["text"])
+            if block.get("cache_control"):
+                digest = hashlib.sha256(prefix.encode()).hexdigest()
+                if digest in client.prompt_cache:
+                    cached += pending
+                else:
+                    client.prompt_cache.add(digest)
+                    cache_write += pending
+                pending = 0
+        user = " ".join(m["content"] if isinstance(m["content"], str) else json.dumps(m["content"])
+                        for m in messages)
+        uncached += pending + _tokens(user)
+        touches = re.search(r"touch types ([\w, ]+)\.", user)
+        name = re.search(r'"name": "([^"]+)"', prefix)
+        company = name.group(1) if name else "your team"
+        text = json.dumps({t.strip(): f"Noticed {company} is scaling onboarding ({t.strip()})."
+                           for t in (touches.group(1).split(",") if touches else ["intro"])})
+        return SimpleNamespace(
+            content=[SimpleNamespace(type="text", text=text)],
+            usage=SimpleNamespace(input_tokens=uncached, output_tokens=_tokens(text),
+                                  cache_creation_input_tokens=cache_write,
+                                  cache_read_input_tokens=cached))
+
+
+class StubClaudeClient:
+    """Stand-in for anthropic.Anthropic() (messages.create + messages.batches)."""
+
+    def __init__(self, latency=0.0, batch_polls=0):
+        self.latency = latency
+        self.batch_polls = batch_polls
+        self.calls = 0
+        self.prompt_cache = set()
+        self.messages = _Messages(self)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Claude generation benchmark (stub model)")
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--contacts-per-account", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Simulated seconds per Claude request")
+    args = parser.parse_args()
+
+    generator_module = importlib.import_module("03_outbound_generator")
+    titles = ["VP HR Operations", "Director of IT", "Chief People Officer", "Recruiter", "CHRO"]
+    accounts = [{"id": f"c{i}", "name": f"Account {i}", "ats_name": "Bullhorn"}
+                for i in range(args.accounts)]
+    contacts = [{"first_name": f"P{j}", "title": titles[j % len(titles)]}
+                for j in range(args.contacts_per_account)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EnrichmentCache(Path(tmp) / "generation.sqlite",
+                                ttls={CACHE_SOURCE: CACHE_TTL})
+        for label in ("before", "after", "re-run"):
+            client = StubClaudeClient(args.latency)
+            generator = generator_module.OutboundGenerator(None, None, client,
+                                                           generation_cache=cache)
+            started = time.perf_counter()
+            if label == "before":
+                # One uncached prompt per contact, as generate_sequence was specced
+                for account in accounts:
+                    for contact in contacts:
+                        track = generator.match_persona(contact["title"])
+                        if track:
+                            params = generator.generation.request_params(
+                                generator.generation.account_block(account), track)
+                            for block in params["system"]:
+                                block.pop("cache_control")
+                            generator.generation.usage.record(
+                                client.messages.create(**params).usage)
+            else:
+                jobs = [(a, t) for a in accounts for t in
+                        {generator.match_persona(c["title"]) for c in contacts} if t]
+                generator.generation.generate_many(jobs)
+            usage = generator.generation.usage.summary()
+            print(f"{label:>6}: {client.calls:4d} Claude requests, tokens {usage['tokens']}, "
+                  f"memo hits {usage['memo_hits']}, {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Fake Clay
+==========
+
+In-process stand-in for the Clay API, for exercising Script 2 (Buying
+Committee Builder) and clay_batcher.py without credits or network. People are
+generated deterministically from the domain, every request is counted, and
+each request sleeps for a fixed simulated latency. tests/test_clay_batcher.py
+asserts the request counts.
+
+Run directly to benchmark Clay requests per account, per-account calls
+(before) vs. the coalesced ClayBatcher path (after):
+
+  python scripts/fake_clay.py --accounts 200 --duplicate-rate 0.2
+"""
+
+import argparse
+import hashlib
+import importlib
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from contact_index import ContactIndex
+
+SAMPLE_TITLES = ["VP HR Operations", "Chief People Officer", "Head of Compliance",
+                 "Director of IT", "COO", "Recruiter", "Payroll Specialist"]
+FIRST_NAMES = ["Ana", "Ben", "Chloe", "Dev", "Erin", "Femi", "Grace", "Hugo"]
+LAST_NAMES = ["Alvarez", "Brooks", "Chen", "Dubois", "Evans", "Fischer", "Gupta"]
+
+
+class FakeClayClient:
+    """Deterministic fake Clay client with request counting."""
+
+    def __init__(self, latency=0.0, people_per_company=4):
+        self.latency = latency
+        self.people_per_company = people_per_company
+        self.requests = {"search_people": 0, "search_people_bulk": 0,
+                         "enrich_person": 0, "enrich_people_bulk": 0}
+
+    def _people(self, domain):
+        rng = random.Random(hashlib.md5(domain.encode()).hexdigest())
+        people = []
+        for _ in range(self.people_per_company):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            people.append({
+                "name": f"{first} {last}",
+                "title": rng.choice(SAMPLE_TITLES),
+                "email": f"{first.lower()}.{last.lower()}@{domain}",
+                "linkedin_url": f"https://www.linkedin.com/in/{first.lower()}-{last.lower()}-{rng.randint(100, 999)}",
+            })
+        return people
+
+    def _call(self, endpoint):
+        self.requests[endpoint] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def search_people(self, domain, name=None, titles=None):
+        self._call("search_people")
+        return self._people(domain)
+
+    def search_people_bulk(self, companies, titles=None):
+        self._call("search_people_bulk")
+        return {c["domain"]: self._people(c["domain"]) for c in companies}
+
+    def enrich_person(self, person_id):
+        self._call("enrich_person")
+        return {"id": person_id, "phone": "+1-555-0100"}
+
+    def enrich_people_bulk(self, person_ids):
+        self._call("enrich_people_bulk")
+        return {pid: {"id": pid, "phone": "+1-555-0100"} for pid in person_ids}
+
+    @property
+    def total_requests(self):
+        return sum(self.requests.values())
+
+
+def make_accounts(n, duplicate_rate, seed=7):
+    rng = random.Random(seed)
+    accounts = []
+    for i in range(n):
+        if accounts and rng.random() < duplicate_rate:
+            source = rng.choice(accounts)
+            accounts.append({**source, "id": f"company-{i}"})
+        else:
+            accounts.append({"id": f"company-{i}", "domain": f"account{i}.example.com",
+                             "name": f"Account {i}"})
+    return accounts
+
+
+def run_before(accounts, latency):
+    """Per-account search + per-person enrichment, as Script 2 used to call Clay."""
+    clay = FakeClayClient(latency)
+    builder_module = importlib.import_module("02_buying_committee")
+    classifier = builder_module.TitleClassifier.from_config(builder_module.TARGET_PERSONAS)
+    created = 0
+    for account in accounts:
+        covered = set()
+        for person in clay.search_people(account["domain"], account["name"]):
+            match = classifier.classify(person["title"])
+            if match and match.confidence >= builder_module.MIN_PERSONA_CONFIDENCE \
+                    and match.persona not in covered:
+                covered.add(match.persona)
+                created += 1
+                clay.enrich_person(f"{account['id']}:{person['email']}")
+    return clay, created
+
+
+def run_after(accounts, latency):
+    """Script 2 batch mode with ClayBatcher against the fake client."""
+    clay = FakeClayClient(latency)
+    builder_module = importlib.import_module("02_buying_committee")
+
+    class BenchmarkBuilder(builder_module.BuyingCommitteeBuilder):
+        def get_target_accounts(self):
+            return accounts
+
+        def check_existing_contacts(self, company_id):
+            return []
+
+        def fetch_people_modified_since(self, cursor):
+            return []
+
+        def create_attio_person(self, person_data, company_id):
+            return f"{company_id}:{person_data['email']}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        builder = BenchmarkBuilder(None, clay, ContactIndex(Path(tmp) / "contacts.sqlite"))
+        builder.process_batch()
+        builder.contacts.close()
+    return clay, builder.contacts.stats["create"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clay batching benchmark (fake Clay)")
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--duplicate-rate", type=float, default=0.2,
+                        help="Share of accounts that repeat an earlier domain")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Simulated seconds per Clay request")
+    args = parser.parse_args()
+
+    accounts = make_accounts(args.accounts, args.duplicate_rate)
+    for label, run in (("before", run_before), ("after", run_after)):
+        started = time.perf_counter()
+        clay, created = run(accounts, args.latency)
+        elapsed = time.perf_counter() - started
+        print(f"{label:>6}: {clay.total_requests:5d} Clay requests "
+              f"({clay.total_requests / len(accounts):.2f}/account), "
+              f"{created} contacts, {elapsed:.2f}s  {clay.requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+ICP Scoring Matrix
+===================
+
+Compiles config/icp_definitions.yaml once into a feature/weight matrix and
+scores whole batches of companies against the 3 ICPs in a single NumPy pass.
+Used by Script 1 (Account Intelligence Engine) for both single-company
+scoring and full-book re-scoring after an ICP change.
+
+Features (one column each, values in [0, 1]):
+  - identity:<icp>      best match against the ICP's label / tier / type /
+                        vertical phrases (gates the ICP: no identity, no score)
+  - size_enterprise     employees >= tiers.enterprise.min_employees
+  - size_mid_market     employees within tiers.mid_market.employee_range
+  - onboard_volume      onboards/month >= sweet_spot.min_onboards_per_month
+  - downstream_systems  systems >= sweet_spot.min_downstream_systems
+  - ats_primary         tech stack includes an ats_fit.primary ATS
+  - ats_secondary       tech stack includes an ats_fit.secondary ATS
+  - signals:<icp>       share of the ICP's buying_signals found in the text
+
+Scores:
+  raw = X @ W (companies x ICPs), gated by identity. icp_match is the ICP
+  with the most weighted evidence (ties broken by focus_percentage), or
+  NO_MATCH when its confidence (raw / best achievable score for that ICP,
+  0-100) is below MIN_MATCH_CONFIDENCE. Rationale lists the top
+  contributing features.
+"""
+
+import re
+import numpy as np
+import yaml
+from pathlib import Path
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+
+NO_MATCH = "No ICP Fit"
+MIN_MATCH_CONFIDENCE = 25
+RATIONALE_TOP_K = 3
+
+FEATURE_WEIGHTS = {
+    "identity": 5.0,
+    "size_enterprise": 2.0,
+    "size_mid_market": 1.0,
+    "onboard_volume": 3.0,
+    "downstream_systems": 1.0,
+    "ats_primary": 2.0,
+    "ats_secondary": 1.0,
+    "signals": 2.0,
+}
+# Pairs that can never both fire; only the larger counts towards max score
+EXCLUSIVE_FEATURES = [("size_enterprise", "size_mid_market"),
+                      ("ats_primary", "ats_secondary")]
+# Which ICPs each firmographic feature counts towards
+FIRMOGRAPHIC_ICPS = {
+    "size_enterprise": ["staffing_organizations", "enterprise_direct"],
+    "size_mid_market": ["staffing_organizations"],
+    "onboard_volume": ["staffing_organizations", "enterprise_direct"],
+    "downstream_systems": ["staffing_organizations"],
+    "ats_primary": ["staffing_organizations"],
+    "ats_secondary": ["staffing_organizations"],
+}
+
+# Tokens that carry no ICP meaning on their own ("Enterprise Direct Employers")
+GENERIC_TOKENS = {
+    "a", "an", "and", "or", "the", "in", "of", "to", "for", "with", "has",
+    "is", "its", "about", "into", "any", "clients", "asking", "current",
+    "organizations", "organization", "vendors", "providers", "employers",
+    "direct", "enterprise", "mm", "smb", "systems", "partner", "partners",
+    "platform", "wanting", "needing", "related",
+}
+
+
+def _normalize_text(value):
+    """Lowercase, punctuation → spaces, padded so ' token' prefix-matches words."""
+    if value is None:
+        return " "
+    if isinstance(value, (list, tuple)):
+        value = " ".join(str(v) for v in value)
+    elif isinstance(value, dict):
+        value = " ".join(str(v) for v in value.values())
+    return " " + re.sub(r"[^a-z0-9]+", " ", str(value).lower()).strip() + " "
+
+
+def _phrase_tokens(phrase):
+    """Significant, crudely stemmed tokens of a config phrase."""
+    tokens = re.sub(r"[^a-z0-9]+", " ", phrase.lower()).split()
+    stems = []
+    for token in tokens:
+        if token in GENERIC_TOKENS or len(token) < 2:
+            continue
+        if len(token) > 4 and token.endswith("s"):
+            token = token[:-1]
+        stems.append(token)
+    return stems
+
+
+def _parse_number(value):
+    """Parse '1,200', '501-1000' (upper bound), '5k', 750 → float; NaN if unknown."""
+    if value is None or value == "":
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    numbers = re.findall(r"(\d[\d,]*\.?\d*)\s*([kKmM]?)", str(value))
+    if not numbers:
+        return np.nan
+    digits, suffix = numbers[-1]
+    scale = {"k": 1e3, "m": 1e6}.get(suffix.lower(), 1.0)
+    return float(digits.replace(",", "")) * scale
+
+
+def _field(company, *names):
+    for name in names:
+        value = company.get(name)
+        if value not in (None, "", [], {}):
+            return value
+    return None
+
+
+class ICPScoringMatrix:
+    """ICP definitions compiled into a feature/weight matrix."""
+
+    def __init__(self, icp_config=None):
+        if icp_config is None:
+            with open(CONFIG_DIR / "icp_definitions.yaml") as f:
+                icp_config = yaml.safe_load(f)
+        self._compile(icp_config["icps"])
+
+    def _compile(self, icps):
+        self.icp_keys = list(icps)
+        self.icp_labels = np.array([icps[k].get("label", k) for k in self.icp_keys])
+        self.focus = np.array([icps[k].get("focus_percentage", 0) for k in self.icp_keys],
+                              dtype=float)
+
+        staffing = icps.get("staffing_organizations", {})
+        tiers = staffing.get("tiers", {})
+        sweet_spot = staffing.get("sweet_spot", {})
+        ats_fit = staffing.get("ats_fit", {})
+        self.min_enterprise_employees = tiers.get("enterprise", {}).get("min_employees", 500)
+        self.mid_market_range = tuple(tiers.get("mid_market", {}).get("employee_range", [50, 500]))
+        self.min_onboards = sweet_spot.get("min_onboards_per_month", 500)
+        self.min_systems = sweet_spot.get("min_downstream_systems", 3)
+        self.ats_primary = [_phrase_tokens(a) for a in ats_fit.get("primary", [])]
+        self.ats_secondary = [_phrase_tokens(a) for a in ats_fit.get("secondary", [])]
+
+        # Phrase lists per ICP: identity (who they are) and buying signals
+        self.identity_phrases = {}
+        self.signal_phrases = {}
+        for key, icp in icps.items():
+            phrases = [icp.get("label", "")]
+            phrases += [t.get("label", "") for t in icp.get("tiers", {}).values()]
+            phrases += [t.get("label", "") for t in icp.get("types", [])]
+            phrases += icp.get("verticals", [])
+            if icp.get("hiring_type"):
+                phrases.append(icp["hiring_type"])
+            self.identity_phrases[key] = [p for p in map(_phrase_tokens, phrases) if p]
+            self.signal_phrases[key] = [p for p in map(_phrase_tokens, icp.get("buying_signals", [])) if p]
+
+        # Feature columns + weight matrix W (features x ICPs)
+        self.feature_names = []
+        self.feature_labels = []
+        weights = []
+        for i, key in enumerate(self.icp_keys):
+            row = np.zeros(len(self.icp_keys))
+            row[i] = FEATURE_WEIGHTS["identity"]
+            self.feature_names.append(f"identity:{key}")
+            self.feature_labels.append(f"profile matches {self.icp_labels[i]}")
+            weights.append(row)
+        for name, targets in FIRMOGRAPHIC_ICPS.items():
+            row = np.array([FEATURE_WEIGHTS[name] if k in targets else 0.0
+                            for k in self.icp_keys])
+            self.feature_names.append(name)
+            self.feature_labels.append(self._firmographic_label(name))
+            weights.append(row)
+        for i, key in enumerate(self.icp_keys):
+            if not self.signal_phrases[key]:
+                continue
+            row = np.zeros(len(self.icp_keys))
+            row[i] = FEATURE_WEIGHTS["signals"]
+            self.feature_names.append(f"signals:{key}")
+            self.feature_labels.append(f"{self.icp_labels[i]} buying signals")
+            weights.append(row)
+        self.W = np.vstack(weights)
+        self.feature_labels = np.array(self.feature_labels)
+        self.identity_cols = np.arange(len(self.icp_keys))
+
+        # Best achievable raw score per ICP (exclusive pairs count once)
+        max_score = self.W.sum(axis=0)
+        index = {n: i for i, n in enumerate(self.feature_names)}
+        for a, b in EXCLUSIVE_FEATURES:
+            max_score -= np.minimum(self.W[index[a]], self.W[index[b]])
+        self.max_score = max_score
+
+    def _firmographic_label(self, name):
+        lo, hi = self.mid_market_range
+        return {
+            "size_enterprise": f"{self.min_enterprise_employees}+ employees",
+            "size_mid_market": f"{lo}-{hi} employees",
+            "onboard_volume": f"{self.min_onboards}+ onboards/month",
+            "downstream_systems": f"{self.min_systems}+ downstream systems",
+            "ats_primary": "primary-fit ATS",
+            "ats_secondary": "secondary-fit ATS",
+        }[name]
+
+    # --- Feature extraction ---
+
+    @staticmethod
+    def _token_hits(texts, tokens):
+        """(companies x tokens) boolean presence of each token as a word prefix."""
+        return np.stack([np.char.find(texts, " " + t) >= 0 for t in tokens], axis=1)
+
+    def _phrase_scores(self, texts, phrases, reduce):
+        """Per-phrase share of tokens present, reduced across phrases (max/mean)."""
+        if not phrases:
+            return np.zeros(len(texts))
+        vocab = sorted({t for p in phrases for t in p})
+        hits = self._token_hits(texts, vocab)
+        col = {t: i for i, t in enumerate(vocab)}
+        per_phrase = np.stack(
+            [hits[:, [col[t] for t in p]].mean(axis=1) for p in phrases], axis=1)
+        return reduce(per_phrase, axis=1)
+
+    def _any_phrase(self, texts, phrases):
+        if not phrases:
+            return np.zeros(len(texts))
+        return (self._phrase_scores(texts, phrases, np.max) == 1.0).astype(float)
+
+    @staticmethod
+    def employee_counts(companies):
+        """Headcount per company as floats (NaN when unknown)."""
+        return np.array([_parse_number(_field(c, "employee_count", "ai_enriched_employee_count"))
+                         for c in companies], dtype=float)
+
+    def build_features(self, companies):
+        """
+        Build the (companies x features) matrix X from Attio company records
+        (ai_enriched_* fields) and/or flattened Clay + web enrichment data.
+        """
+        if not companies:
+            return np.zeros((0, len(self.W)))
+        profile = np.array([_normalize_text([
+            _field(c, "name"), _field(c, "industry", "ai_enriched_industry"),
+            _field(c, "description", "ai_enriched_description"),
+        ]) for c in companies])
+        stack = np.array([_normalize_text(
+            _field(c, "tech_stack", "ai_enriched_tech_stack", "ats")) for c in companies])
+        signals = np.array([_normalize_text([
+            _field(c, "buying_signals", "ai_enriched_buying_signals"),
+            _field(c, "pain_points", "ai_enriched_pain_points"),
+            _field(c, "job_postings"), _field(c, "news"),
+        ]) for c in companies])
+        employees = self.employee_counts(companies)
+        onboards = np.array([_parse_number(_field(c, "onboards_per_month")) for c in companies])
+        systems = np.array([_parse_number(_field(c, "downstream_systems")) for c in companies])
+
+        lo, hi = self.mid_market_range
+        columns = [self._phrase_scores(profile, self.identity_phrases[k], np.max)
+                   for k in self.icp_keys]
+        with np.errstate(invalid="ignore"):
+            columns += [
+                (employees >= self.min_enterprise_employees).astype(float),
+                ((employees >= lo) & (employees < hi)).astype(float),
+                (onboards >= self.min_onboards).astype(float),
+                (systems >= self.min_systems).astype(float),
+            ]
+        primary = self._any_phrase(stack, self.ats_primary)
+        columns += [primary, self._any_phrase(stack, self.ats_secondary) * (1 - primary)]
+        columns += [self._phrase_scores(signals, self.signal_phrases[k], np.mean)
+                    for k in self.icp_keys if self.signal_phrases[k]]
+        return np.stack(columns, axis=1)
+
+    # --- Scoring ---
+
+    def score_features(self, X):
+        """Score a prebuilt feature matrix. See score_batch for the return shape."""
+        raw = X @ self.W
+        raw *= X[:, self.identity_cols] > 0
+        confidence = np.rint(100 * raw / self.max_score).astype(int)
+        # Most evidence wins; focus percentage only breaks ties
+        best = np.argmax(raw + self.focus / 1000.0, axis=1)
+        rows = np.arange(len(X))
+        best_conf = confidence[rows, best]
+        matched = best_conf >= MIN_MATCH_CONFIDENCE
+        icp_match = np.where(matched, self.icp_labels[best], NO_MATCH)
+
+        contrib = X * self.W[:, best].T
+        top = np.argsort(-contrib, axis=1)[:, :RATIONALE_TOP_K]
+        top_contrib = np.take_along_axis(contrib, top, axis=1)
+        top_labels = self.feature_labels[top]
+        rationale = np.array([
+            f"{label} ({conf}%): " + "; ".join(lbl[c > 0]) if ok
+            else f"{NO_MATCH}: best was {label} at {conf}%"
+            for label, conf, ok, lbl, c in zip(
+                self.icp_labels[best], best_conf, matched, top_labels, top_contrib)
+        ], dtype=object)
+        return {
+            "icp_match": icp_match,
+            "confidence": best_conf,
+            "rationale": rationale,
+            "scores": dict(zip(self.icp_keys, confidence.T)),
+        }
+
+    def score_batch(self, companies):
+        """
+        Score a list of company dicts in one pass. Returns arrays aligned with
+        the input: icp_match (label), confidence (0-100), rationale (str),
+        plus per-ICP confidence arrays under "scores".
+        """
+        return self.score_features(self.build_features(companies))
+
+    def score_one(self, company):
+        """Convenience wrapper: (icp_rationale, confidence, icp_match) for one company."""
+        result = self.score_batch([company])
+        return (str(result["rationale"][0]), int(result["confidence"][0]),
+                str(result["icp_match"][0]))
@@ -0,0 +1,213 @@
+"""
+Identity Cache
+===============
+
+Shared email / name → Attio person + company + open deal resolution cache,
+used by Script 4 (Meeting Prep) and Script 5 (Post-Meeting Processor). Most
+meetings are with repeat attendees, so most lookups are answered here and
+never reach Attio.
+
+Entries:
+  - Positive: the resolved profile (person fields, "company", "deal"),
+    kept for POSITIVE_TTL
+  - Negative, per email: Attio has no such person (the company may still be
+    known), kept for NEGATIVE_TTL
+  - Negative, per domain: no Attio company and no person at the domain;
+    every email there resolves to nothing without a lookup (never set for
+    FREE_EMAIL_DOMAINS)
+  - Internal domains (INTERNAL_EMAIL_DOMAINS, comma-separated) are never
+    looked up at all
+
+Warm-up:
+  warm() resolves every not-yet-cached attendee for the day in one bulk
+  Attio query (people by email + companies by domain), so the per-attendee
+  lookups that follow are all cache hits.
+
+Storage:
+  SQLite file under state/, expired rows pruned on open.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from contact_index import normalize_email, split_name
+
+STATE_DIR = Path(__file__).parent.parent / "state"
+DEFAULT_CACHE_PATH = STATE_DIR / "identity_cache.sqlite"
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+POSITIVE_TTL = 24 * HOUR
+NEGATIVE_TTL = 24 * HOUR
+MISS = object()
+FREE_EMAIL_DOMAINS = {"gmail.com", "yahoo.com", "outlook.com", "hotmail.com", "live.com",
+                      "icloud.com", "me.com", "aol.com", "protonmail.com", "proton.me"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS identities (
+    key         TEXT PRIMARY KEY,
+    profile     TEXT,
+    reason      TEXT,
+    resolved_at REAL NOT NULL,
+    expires_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS identities_expires ON identities (expires_at);
+"""
+
+
+def email_domain(email):
+    email = normalize_email(email)
+    return email.rsplit("@", 1)[1] if email else None
+
+
+def identity_key(email=None, name=None):
+    """Cache key: normalized email, else normalized full name."""
+    email = normalize_email(email)
+    if email:
+        return f"e:{email}"
+    first, last = split_name({"name": name or ""})
+    return f"n:{first} {last}".rstrip() if first else None
+
+
+class IdentityCache:
+    """TTL cache of Attio identity resolutions with negative entries."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, internal_domains=None,
+                 ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if internal_domains is None:
+            internal_domains = os.environ.get("INTERNAL_EMAIL_DOMAINS", "").split(",")
+        self.internal_domains = {d.strip().lower() for d in internal_domains if d.strip()}
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._db.execute("DELETE FROM identities WHERE expires_at < ?", (time.time(),))
+        self._db.commit()
+        self.stats = {"hits": 0, "negative_hits": 0, "internal": 0, "misses": 0,
+                      "lookups": 0, "bulk_queries": 0, "bulk_resolved": 0}
+
+    def is_internal(self, email):
+        return email_domain(email) in self.internal_domains
+
+    def _lookup(self, email, name):
+        """(profile / None / MISS, outcome) without touching stats."""
+        if email and self.is_internal(email):
+            return None, "internal"
+        key = identity_key(email, name)
+        if key is None:
+            return None, "negative_hits"
+        keys = [key] + ([f"d:{email_domain(email)}"] if email_domain(email) else [])
+        now = time.time()
+        with self._lock:
+            for k in keys:
+                row = self._db.execute(
+                    "SELECT profile, reason FROM identities WHERE key = ? AND expires_at >= ?",
+                    (k, now)).fetchone()
+                if row:
+                    break
+        if row is None:
+            return MISS, "misses"
+        profile, reason = row
+        # A negative person entry may still carry the known company
+        return (json.loads(profile) if profile else None), ("negative_hits" if reason else "hits")
+
+    def get(self, email=None, name=None):
+        """Cached profile, None for a known negative, or MISS."""
+        profile, outcome = self._lookup(email, name)
+        self.stats[outcome] += 1
+        return profile
+
+    def peek(self, email=None, name=None):
+        """Like get(), without counting towards stats."""
+        return self._lookup(email, name)[0]
+
+    def put(self, email, name, profile, reason=None):
+        """Store a resolution; profile None (or reason set) is a negative entry."""
+        key = identity_key(email, name)
+        if key is None:
+            return
+        self._store(key, profile, reason or (None if profile and profile.get("id") else "unknown"))
+
+    def put_unknown_domain(self, domain):
+        self._store(f"d:{domain.lower()}", None, "unknown")
+
+    def _store(self, key, profile, reason):
+        now = time.time()
+        ttl = self.negative_ttl if reason else self.ttl
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO identities VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(profile, default=str) if profile else None, reason,
+                 now, now + ttl))
+            self._db.commit()
+
+    def fetch(self, email, name, lookup):
+        """lookup(email, name) against Attio and cache the result (or its absence)."""
+        self.stats["lookups"] += 1
+        profile = lookup(email, name)
+        self.put(email, name, profile)
+        return profile
+
+    def resolve(self, email, name, lookup):
+        """Cached resolution, or fetch() on a miss."""
+        profile = self.get(email, name)
+        return self.fetch(email, name, lookup) if profile is MISS else profile
+
+    def warm(self, attendees, bulk_lookup):
+        """
+        Resolve every uncached (email, name) in `attendees` with one call to
+        bulk_lookup(emails, domains) → {"people": {email: profile},
+        "companies": {domain: company}}. Returns the number of emails sent.
+
+        Attio is queried with the addresses as given (people are stored
+        under their raw address, plus-tags and dots included); only the
+        cache keys are normalized.
+        """
+        pending = {}   # normalized email -> (raw addresses, name)
+        for email, name in attendees:
+            key = normalize_email(email)
+            if not key:
+                continue
+            if key in pending:
+                pending[key][0].add(email.strip())
+            elif self._lookup(email, name)[0] is MISS:
+                pending[key] = ({email.strip()}, name)
+        if not pending:
+            return 0
+        emails = sorted({e for raw, _ in pending.values() for e in raw})
+        domains = sorted({email_domain(e) for e in pending})
+        result = bulk_lookup(emails, domains)
+        if result is None:
+            return 0
+        self.stats["bulk_queries"] += 1
+        people = {e.lower(): p for e, p in (result.get("people") or {}).items()}
+        by_key = {normalize_email(e): p for e, p in people.items()}
+        companies = {d.lower(): c for d, c in (result.get("companies") or {}).items()}
+        for domain in domains:
+            if (domain not in companies and domain not in FREE_EMAIL_DOMAINS
+                    and not any(email_domain(e) == domain for e in people)):
+                self.put_unknown_domain(domain)
+        for key, (raw, name) in pending.items():
+            email = min(raw)
+            profile = next((people[e.lower()] for e in sorted(raw) if e.lower() in people),
+                           by_key.get(key))
+            company = companies.get(email_domain(key))
+            if profile:
+                self.stats["bulk_resolved"] += 1
+                self.put(email, name, profile)
+            else:
+                self.put(email, name, {"email": email, "name": name, "company": company}
+                         if company else None)
+        return len(emails)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,321 @@
+"""
+Pipeline History
+=================
+
+Local time series of the Attio pipeline for Script 6 (Pipeline Health
+Monitor). Attio only exposes each deal's current stage, so every snapshot
+is diffed against the previous one and the difference is appended here;
+velocity, coverage and win-rate queries then read history instead of
+rebuilding it.
+
+Tables (append-only, one binary file per column, read via np.memmap):
+  daily        one row per stage per snapshot day:
+                 day, stage, open_count, open_value (deals in the stage at
+                 snapshot time), entered, exited, exit_days (total days the
+                 exiting deals spent in the stage)
+  transitions  one row per stage change seen between snapshots:
+                 day, deal, from_stage, to_stage, days_in_stage
+
+Stages are stored by their Attio order (config/attio_schema.yaml pipeline
+stages; 0 = unknown). Won / Lost deals leave the open set when they close.
+
+state.json holds the committed row count of each table (columns are
+truncated back to it on open, so a crash mid-append leaves no partial
+snapshot), the day of the last snapshot, interned deal keys and each open
+deal's current stage. It is replaced atomically after every snapshot.
+
+Metrics are updated incrementally: each snapshot only appends its own
+deltas (about 9 daily rows + the day's transitions), and trailing-N-week
+queries sum a searchsorted slice of the daily rows. Several years of
+daily snapshots are well under a megabyte.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from company_index import to_epoch
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+STATE_DIR = Path(__file__).parent.parent / "state"
+DEFAULT_HISTORY_DIR = STATE_DIR / "pipeline_history"
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+UNKNOWN_STAGE = 0
+WON_STAGE = "won"
+LOST_STAGE = "lost"
+
+TABLES = {
+    "daily": {"day": "<i4", "stage": "<i1", "open_count": "<u4", "open_value": "<f8",
+              "entered": "<u4", "exited": "<u4", "exit_days": "<f8"},
+    "transitions": {"day": "<i4", "deal": "<i4", "from_stage": "<i1", "to_stage": "<i1",
+                    "days_in_stage": "<f4"},
+}
+
+
+def to_day(value):
+    """Timestamp → days since the epoch (UTC)."""
+    epoch = to_epoch(value)
+    return int(epoch // DAY) if epoch is not None else None
+
+
+def day_iso(day):
+    return datetime.fromtimestamp(int(day) * DAY, tz=timezone.utc).date().isoformat()
+
+
+def load_pipeline_stages(path=CONFIG_DIR / "attio_schema.yaml"):
+    """Attio pipeline stages as {name: order}."""
+    with open(path) as f:
+        schema = yaml.safe_load(f)
+    return {stage["name"]: stage["order"] for stage in schema["pipeline"]["stages"]}
+
+
+class ColumnTable:
+    """Fixed-width columns in one append-only file each."""
+
+    def __init__(self, directory, name, columns):
+        self.directory = Path(directory)
+        self.name = name
+        self.dtypes = {col: np.dtype(dtype) for col, dtype in columns.items()}
+        self._maps = {}
+
+    def _path(self, col):
+        return self.directory / f"{self.name}.{col}.bin"
+
+    def __len__(self):
+        col, dtype = next(iter(self.dtypes.items()))
+        path = self._path(col)
+        return path.stat().st_size // dtype.itemsize if path.exists() else 0
+
+    def column(self, col):
+        """Read-only memory map of a column (empty array for an empty table)."""
+        path = self._path(col)
+        size = path.stat().st_size if path.exists() else 0
+        if not size:
+            return np.empty(0, dtype=self.dtypes[col])
+        cached = self._maps.get(col)
+        if cached is None or cached[0] != size:
+            cached = self._maps[col] = (size, np.memmap(path, dtype=self.dtypes[col], mode="r"))
+        return cached[1]
+
+    def append(self, rows):
+        """Append {column: array}; every column must be given, same length."""
+        lengths = {len(rows[col]) for col in self.dtypes}
+        if len(lengths) != 1:
+            raise ValueError(f"{self.name}: ragged append {lengths}")
+        for col, dtype in self.dtypes.items():
+            with open(self._path(col), "ab") as f:
+                f.write(np.asarray(rows[col], dtype=dtype).tobytes())
+        return lengths.pop()
+
+    def truncate(self, rows):
+        """Cut every column back to `rows` rows (drops a partial append)."""
+        self._maps.clear()
+        for col, dtype in self.dtypes.items():
+            path = self._path(col)
+            if path.exists() and path.stat().st_size > rows * dtype.itemsize:
+                with open(path, "r+b") as f:
+                    f.truncate(rows * dtype.itemsize)
+
+    def nbytes(self):
+        return sum(self._path(col).stat().st_size for col in self.dtypes
+                   if self._path(col).exists())
+
+
+class PipelineHistory:
+    """Append-only daily pipeline snapshots + stage transitions."""
+
+    def __init__(self, path=DEFAULT_HISTORY_DIR, stages=None, aliases=None):
+        """aliases: {other stage label (e.g. a pipeline_stages.yaml slug): Attio name}."""
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.mkdir(exist_ok=True)
+        self.stages = stages or load_pipeline_stages()
+        self._codes = {name.lower(): order for name, order in self.stages.items()}
+        for alias, name in (aliases or {}).items():
+            self._codes.setdefault(alias.lower(), self._codes.get(name.lower(), UNKNOWN_STAGE))
+        self.stage_names = {order: name for name, order in self.stages.items()}
+        self.stage_names[UNKNOWN_STAGE] = "Unknown"
+        self.won = self._codes.get(WON_STAGE)
+        self.lost = self._codes.get(LOST_STAGE)
+        self.tables = {name: ColumnTable(self.path, name, cols) for name, cols in TABLES.items()}
+        self.state = self._load_state()
+        for name, table in self.tables.items():
+            committed = self.state["rows"].get(name, 0)
+            if len(table) != committed:
+                logger.warning(f"Pipeline history: {name} has {len(table) - committed} "
+                               f"uncommitted rows from an interrupted snapshot; dropping them")
+                table.truncate(committed)
+
+    def _load_state(self):
+        path = self.path / "state.json"
+        if path.exists():
+            with open(path) as f:
+                return json.load(f)
+        return {"rows": {}, "snapshots": 0, "last_day": None, "deal_keys": {}, "open": {}}
+
+    def _save_state(self):
+        tmp = self.path / "state.json.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, separators=(",", ":"))
+        os.replace(tmp, self.path / "state.json")
+
+    def stage_code(self, stage):
+        if isinstance(stage, dict):
+            stage = stage.get("name") or stage.get("title")
+        return self._codes.get(str(stage or "").strip().lower(), UNKNOWN_STAGE)
+
+    def _deal_key(self, deal_id):
+        keys = self.state["deal_keys"]
+        if deal_id not in keys:
+            keys[deal_id] = len(keys)
+        return keys[deal_id]
+
+    @property
+    def last_snapshot(self):
+        """ISO date of the last snapshot (None before the first one)."""
+        day = self.state["last_day"]
+        return day_iso(day) if day is not None else None
+
+    def record(self, deals, now=None):
+        """
+        Diff the current deals (open ones, plus any closed since the last
+        snapshot) against the previous snapshot and append the day's rows.
+        Each deal needs id, stage (name), stage_changed_at, deal_amount.
+        The first snapshot only seeds the open set. One snapshot per day:
+        returns False if today's is already recorded.
+        """
+        day = to_day(now if now is not None else datetime.now(timezone.utc))
+        last = self.state["last_day"]
+        if last is not None and day <= last:
+            logger.info(f"Pipeline history: snapshot for {day_iso(day)} already recorded")
+            return False
+        codes = max(self.stage_names) + 1
+        entered = np.zeros(codes, dtype=np.uint32)
+        exited = np.zeros(codes, dtype=np.uint32)
+        exit_days = np.zeros(codes, dtype=float)
+        open_count = np.zeros(codes, dtype=np.uint32)
+        open_value = np.zeros(codes, dtype=float)
+        moves = {col: [] for col in TABLES["transitions"]}
+        previous, current = self.state["open"], {}
+        seeding = last is None
+        for deal in deals:
+            deal_id = str(deal["id"])
+            code = self.stage_code(deal.get("stage"))
+            changed = min(to_day(deal.get("stage_changed_at")) or day, day)
+            before = previous.get(deal_id)
+            closed = code in (self.won, self.lost)
+            if before is None:
+                # A closed deal listed again in a later snapshot was already counted
+                if not seeding and not (closed and changed <= last):
+                    entered[code] += 1
+            elif before[0] != code:
+                from_code, since = before
+                exited[from_code] += 1
+                exit_days[from_code] += max(changed - since, 0)
+                entered[code] += 1
+                for col, value in zip(moves, (changed, self._deal_key(deal_id), from_code,
+                                              code, max(changed - since, 0))):
+                    moves[col].append(value)
+            if closed:
+                continue
+            current[deal_id] = before if before and before[0] == code else [code, changed]
+            open_count[code] += 1
+            open_value[code] += float(deal.get("deal_amount") or deal.get("value") or 0)
+        stage_codes = np.arange(codes)
+        added = {
+            "daily": self.tables["daily"].append({
+                "day": np.full(codes, day), "stage": stage_codes, "open_count": open_count,
+                "open_value": open_value, "entered": entered, "exited": exited,
+                "exit_days": exit_days}),
+            "transitions": self.tables["transitions"].append(moves),
+        }
+        for name, rows in added.items():
+            self.state["rows"][name] = self.state["rows"].get(name, 0) + rows
+        gone = len(set(previous) - set(current) - {str(d["id"]) for d in deals})
+        self.state["open"] = current
+        self.state["last_day"] = day
+        self.state["snapshots"] += 1
+        self._save_state()
+        logger.info(f"Pipeline history: {day_iso(day)} snapshot, {len(current)} open deals, "
+                    f"{added['transitions']} stage changes, {gone} deals no longer listed"
+                    + (" (first snapshot, seeding)" if seeding else ""))
+        return True
+
+    def _window(self, weeks):
+        """Slice of daily rows covering the trailing `weeks` (from the last snapshot)."""
+        days = self.tables["daily"].column("day")
+        if not len(days):
+            return slice(0, 0)
+        start = int(days[-1]) - 7 * weeks + 1
+        return slice(int(np.searchsorted(days, start, side="left")), len(days))
+
+    def _sum_by_stage(self, col, weeks):
+        window = self._window(weeks)
+        daily = self.tables["daily"]
+        stages = daily.column("stage")[window]
+        return np.bincount(stages, weights=daily.column(col)[window],
+                           minlength=max(self.stage_names) + 1)
+
+    def value_by_stage(self):
+        """{stage: {"count", "value"}} at the last snapshot."""
+        daily = self.tables["daily"]
+        days = daily.column("day")
+        window = slice(int(np.searchsorted(days, days[-1])) if len(days) else 0, len(days))
+        return {self.stage_names.get(int(s), str(s)): {"count": int(c), "value": float(v)}
+                for s, c, v in zip(daily.column("stage")[window],
+                                   daily.column("open_count")[window],
+                                   daily.column("open_value")[window]) if c}
+
+    def velocity(self, weeks=12):
+        """{stage: average days spent in it} for deals that left it in the trailing weeks."""
+        exits = self._sum_by_stage("exited", weeks)
+        days = self._sum_by_stage("exit_days", weeks)
+        return {self.stage_names.get(s, str(s)): round(float(days[s] / exits[s]), 1)
+                for s in np.flatnonzero(exits)}
+
+    def win_rate(self, weeks=13):
+        """Won / (won + lost) over the trailing weeks (None if nothing closed)."""
+        entered = self._sum_by_stage("entered", weeks)
+        won = entered[self.won] if self.won is not None else 0
+        lost = entered[self.lost] if self.lost is not None else 0
+        return round(float(won / (won + lost)), 3) if won + lost else None
+
+    def win_rate_trend(self, weeks=12):
+        """[{week, won, lost, win_rate}] for each of the trailing weeks, oldest first."""
+        window = self._window(weeks)
+        daily = self.tables["daily"]
+        days = daily.column("day")[window]
+        if not len(days):
+            return []
+        stages = daily.column("stage")[window]
+        entered = daily.column("entered")[window]
+        week = (days - (int(days[-1]) - 7 * weeks + 1)) // 7
+        won = np.bincount(week[stages == self.won], entered[stages == self.won],
+                          minlength=weeks)
+        lost = np.bincount(week[stages == self.lost], entered[stages == self.lost],
+                           minlength=weeks)
+        first = int(days[-1]) - 7 * weeks + 1
+        return [{"week": day_iso(first + 7 * w), "won": int(won[w]), "lost": int(lost[w]),
+                 "win_rate": (round(float(won[w] / (won[w] + lost[w])), 3)
+                              if won[w] + lost[w] else None)}
+                for w in range(weeks)]
+
+    def coverage_ratio(self, target):
+        """Open pipeline value at the last snapshot / target (None without a target)."""
+        if not target:
+            return None
+        open_value = sum(v["value"] for v in self.value_by_stage().values())
+        return round(float(open_value / target), 2)
+
+    def stats(self):
+        return {"snapshots": self.state["snapshots"],
+                "transitions": len(self.tables["transitions"]),
+                "open_deals": len(self.state["open"]), "last_snapshot": self.last_snapshot,
+                "bytes": sum(t.nbytes() for t in self.tables.values())}
@@ -0,0 +1,190 @@
+"""
+Pre-Extraction
+===============
+
+Deterministic pass over a Fathom transcript that runs before Claude in
+Script 5 (Post-Meeting Processor). One compiled pattern tags every span of
+interest in a single pass over the speaker turns:
+
+Filled here, with certainty (no model needed):
+  - competitive_mentions: competitor names / parents from
+    competitive_landscape.yaml, with the sentence they were said in
+  - technical_requirements.ats: ATS names (icp_definitions.yaml ats_fit +
+    KNOWN_ATS), matched case-sensitively
+  - technical_requirements.volume: "800 hires a month"-style figures,
+    joined into one string
+
+Left for Claude (signals that need judgement):
+  - dollar amounts, dates and deadlines, "I'll send / we will" action
+    phrases, and decision / objection / stakeholder / deal-stage cues
+  - ATS names that are also common words (AMBIGUOUS_ATS: "Lever",
+    "Workday"), which may not mean the vendor
+
+Only the turns carrying an unresolved signal (plus CONTEXT_TURNS on each
+side) are sent to Claude; a transcript with none skips Claude entirely.
+Tokens sent vs. the full transcript are logged per transcript.
+"""
+
+import logging
+import re
+from collections import namedtuple
+from pathlib import Path
+
+import yaml
+
+from transcript_extraction import empty_intelligence
+from transcript_index import format_timestamp, iter_turns
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+CONTEXT_TURNS = 1
+CONTEXT_CHARS = 240
+KNOWN_ATS = ("Bullhorn", "Jobvite", "TempWorks", "Avionte", "JobDiva", "Crelate", "Ceipal",
+             "Greenhouse", "Lever", "iCIMS", "Workday", "SmartRecruiters", "Taleo",
+             "SuccessFactors", "JazzHR", "Vincere", "Erecruit", "Top Echelon")
+AMBIGUOUS_ATS = ("Lever", "Workday")
+
+PreExtraction = namedtuple("PreExtraction", ["fields", "windows", "signals",
+                                             "full_tokens", "sent_tokens"])
+
+# Spans resolved here vs. signals that send their window to Claude
+RESOLVED = ("competitor", "ats", "volume")
+UNITS = (r"hires|workers|employees|onboards|onboardings|placements|candidates|contractors|"
+         r"associates|starts|nurses|clinicians|drivers|locations|branches|clients")
+MONTHS = (r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+          r"sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?")
+SIGNAL_PATTERNS = {
+    "volume": rf"\b\d[\d,]*(?:\.\d+)?\s?k?\+?\s+(?:new\s+)?(?:{UNITS})\b"
+              r"(?:\s+(?:a|per|each|every)\s+(?:day|week|month|year|quarter))?",
+    "money": r"\$\s?\d[\d,]*(?:\.\d+)?\s?(?:k|mm?|bn|million|thousand|billion)?\b"
+             r"|\b\d[\d,]*(?:\.\d+)?\s?(?:k|million|thousand)?\s?(?:dollars|usd)\b",
+    "date": rf"\b(?:{MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?\b|\b\d{{1,2}}/\d{{1,2}}(?:/\d{{2,4}})?\b"
+            r"|\b(?:by|before|until|on|next|this)\s+(?:monday|tuesday|wednesday|thursday|"
+            r"friday|week|month|quarter|year)\b|\bend of (?:the )?(?:day|week|month|quarter|year)\b"
+            r"|\b(?:tomorrow|eod|eow|q[1-4])\b",
+    "action": r"\b(?:i'll|i will|we'll|we will|let me|i can|we can|i'm going to|"
+              r"we're going to)\s+(?:\w+\s+)?(?:send|share|follow up|get|set up|schedule|loop|"
+              r"circle back|put together|draft|book|reach out|introduce|check|review|connect)\b",
+    "decision": r"\b(?:we decided|decided to|let's go with|we agreed|agreed to|move forward|"
+                r"moving forward|sign(?:ed)? off|green light|approved)\b",
+    "objection": r"\b(?:concern(?:ed|s)?|worried|too expensive|pricey|budget|not sure|hesitant|"
+                 r"pushback|already (?:use|have)|locked in|renewal)\b",
+    "stakeholder": r"\b(?:our|my) (?:cfo|ceo|coo|cto|cio|chro|vp|vice president|director|"
+                   r"head of|manager|boss|legal|procurement|it team)\b|\b(?:loop(?:ing)? in|"
+                   r"bring in)\b",
+    "stage": r"\b(?:pilot|proposal|pricing|contract|msa|sow|security review|on hold|pause|"
+             r"timeline|procurement)\b",
+}
+
+
+def _alternation(names):
+    return "|".join(re.escape(n) for n in sorted(set(names), key=len, reverse=True))
+
+
+def _sentence(text, start, end):
+    """The sentence around text[start:end], trimmed to CONTEXT_CHARS."""
+    left = max(text.rfind(p, 0, start) for p in ".?!") + 1
+    rights = [i for i in (text.find(p, end) for p in ".?!") if i != -1]
+    sentence = text[left:(min(rights) + 1 if rights else len(text))].strip()
+    return sentence if len(sentence) <= CONTEXT_CHARS else sentence[:CONTEXT_CHARS - 1] + "…"
+
+
+class PreExtractor:
+    """Single-pass rule tagger: fills certain fields, windows the rest for Claude."""
+
+    def __init__(self, competitors, ats_names=KNOWN_ATS, context_turns=CONTEXT_TURNS):
+        """competitors: {alias: canonical name}."""
+        self.competitors = {alias.lower(): name for alias, name in competitors.items()}
+        self.ats = {name.lower(): name for name in ats_names}
+        self.context_turns = context_turns
+        # Competitors first, so "Bullhorn Onboarding" isn't tagged as the ATS.
+        # Vendor names are case-sensitive: "our workday" is not Workday
+        groups = [f"(?P<competitor>\\b(?:{_alternation(competitors)})\\b)",
+                  f"(?P<ats>(?-i:\\b(?:{_alternation(ats_names)})\\b))"]
+        groups += [f"(?P<{kind}>{pattern})" for kind, pattern in SIGNAL_PATTERNS.items()]
+        self.pattern = re.compile("|".join(groups), re.IGNORECASE)
+
+    @classmethod
+    def from_config(cls, config_dir=CONFIG_DIR, **kwargs):
+        with open(config_dir / "competitive_landscape.yaml") as f:
+            landscape = yaml.safe_load(f)
+        with open(config_dir / "icp_definitions.yaml") as f:
+            icps = yaml.safe_load(f)
+        competitors = {}
+        for competitor in landscape["competitors"].values():
+            for alias in (competitor["name"], competitor.get("parent")):
+                if alias:
+                    competitors[alias] = competitor["name"]
+        ats_fit = icps["icps"]["staffing_organizations"].get("ats_fit", {})
+        ats_names = {*KNOWN_ATS, *ats_fit.get("primary", []), *ats_fit.get("secondary", [])}
+        return cls(competitors, sorted(ats_names), **kwargs)
+
+    def scan(self, lines):
+        """Transcript (str, file or iterable of lines) → PreExtraction."""
+        fields = empty_intelligence()
+        mentions, ats, volumes = {}, {}, {}
+        signals = {}
+        windows, full_chars, sent_chars = [], 0, 0
+        previous, last_sent, follow = None, -1, 0
+
+        def send(index, turn):
+            nonlocal last_sent, sent_chars
+            if index <= last_sent:
+                return
+            speaker, start, text = turn
+            stamp = f"[{format_timestamp(start)}] " if start is not None else ""
+            line = f"{stamp}{speaker}: {text}" if speaker else f"{stamp}{text}"
+            windows.append(line)
+            sent_chars += len(line)
+            last_sent = index
+
+        for index, turn in enumerate(iter_turns(lines)):
+            speaker, _, text = turn
+            full_chars += len(text)
+            unresolved = False
+            for match in self.pattern.finditer(text):
+                kind = match.lastgroup
+                signals[kind] = signals.get(kind, 0) + 1
+                span = match.group(kind)
+                if kind == "competitor":
+                    name = self.competitors[span.lower()]
+                    if name not in mentions:
+                        context = _sentence(text, match.start(), match.end())
+                        mentions[name] = f"{speaker}: {context}" if speaker else context
+                elif kind == "ats":
+                    name = self.ats.get(span.lower(), span)
+                    if name in AMBIGUOUS_ATS:
+                        unresolved = True
+                    else:
+                        ats.setdefault(name, None)
+                elif kind == "volume":
+                    volumes.setdefault(" ".join(span.lower().split()), None)
+                else:
+                    unresolved = True
+            if unresolved:
+                if previous is not None and self.context_turns:
+                    send(index - 1, previous)
+                send(index, turn)
+                follow = self.context_turns
+            elif follow:
+                send(index, turn)
+                follow -= 1
+            previous = turn
+
+        fields["competitive_mentions"] = [{"competitor": n, "context": c}
+                                          for n, c in mentions.items()]
+        if ats:
+            fields["technical_requirements"]["ats"] = ", ".join(ats)
+        if volumes:
+            fields["technical_requirements"]["volume"] = "; ".join(volumes)
+        result = PreExtraction(fields, windows, signals, full_chars // CHARS_PER_TOKEN,
+                               sent_chars // CHARS_PER_TOKEN)
+        saved = result.full_tokens - result.sent_tokens
+        logger.info(f"Pre-extraction: {len(mentions)} competitors, {len(ats)} ATS, "
+                    f"{len(volumes)} volume figures filled; sending {result.sent_tokens:,} "
+                    f"of {result.full_tokens:,} tokens to Claude ({saved:,} saved, "
+                    f"{saved / result.full_tokens:.0%})" if result.full_tokens else
+                    "Pre-extraction: empty transcript")
+        return result
@@ -0,0 +1,239 @@
+"""
+Sequence Generation
+====================
+
+Claude generation layer for Script 3 (Personalized Outbound Generator).
+Claude only writes the account-specific personalization lines of each
+sequence (template_renderer.py renders the rest), and this module makes
+those calls as cheap as possible:
+
+  - Grouping: one request per (account, messaging track), never per contact;
+    identical jobs in a run are sent once
+  - Shared prefix: instructions + messaging framework + cadence form a
+    static system block, followed by the account brief; both are marked
+    for prompt caching, so every track of an account and every account in
+    a run re-read the cached prefix instead of paying for it again
+  - Batching: once a run has batch_threshold or more uncached jobs they
+    go through the Message Batches API; smaller runs call Messages directly
+  - Memo: responses are stored under state/ keyed by a hash of the exact
+    request (model, prompt, account facts, track), so re-runs and previews
+    of unchanged accounts never pay twice
+
+Token usage (input, output, cache write, cache read) and latency are
+accounted per run in GenerationUsage.
+"""
+
+import json
+import logging
+import time
+import yaml
+
+from enrichment_cache import DAY, STATE_DIR, EnrichmentCache, content_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "claude-sonnet-4-5"
+DEFAULT_MAX_TOKENS = 600
+DEFAULT_CACHE_PATH = STATE_DIR / "generation_cache.sqlite"
+CACHE_SOURCE = "claude_personalization"
+CACHE_TTL = 30 * DAY
+BATCH_THRESHOLD = 20
+BATCH_POLL_SECONDS = 10
+BATCH_MAX_WAIT_SECONDS = 30 * 60
+# Bump when the prompt wording changes so old memo entries stop matching
+PROMPT_VERSION = "v1"
+
+# Account facts sent to Claude; anything else on the record is ignored and
+# doesn't bust the memo
+ACCOUNT_FACTS = ("name", "domain", "ai_enriched_industry", "industry", "ats_name",
+                 "ai_enriched_tech_stack", "ai_enriched_employee_count",
+                 "ai_enriched_pain_points", "ai_enriched_buying_signals",
+                 "ai_account_brief")
+
+INSTRUCTIONS = """You write the account-specific personalization for Onboarded's \
+outbound email sequences. The subject lines, value props and sign-offs are \
+already templated; you only write one or two sentences per touch that could \
+only be sent to this account: reference their ATS, industry pain, hiring or \
+compliance signals from the account brief. No greetings, no sign-offs, no \
+claims that aren't supported by the brief.
+
+Reply with JSON only: an object with one string per touch type."""
+
+
+class GenerationUsage:
+    """Token and latency accounting for one run."""
+
+    def __init__(self):
+        self.requests = 0
+        self.batches = 0
+        self.memo_hits = 0
+        self.deduplicated = 0
+        self.failures = 0
+        self.tokens = {"input": 0, "output": 0, "cache_write": 0, "cache_read": 0}
+        self.latencies = []
+
+    def record(self, usage, latency=None):
+        self.requests += 1
+        self.tokens["input"] += getattr(usage, "input_tokens", 0) or 0
+        self.tokens["output"] += getattr(usage, "output_tokens", 0) or 0
+        self.tokens["cache_write"] += getattr(usage, "cache_creation_input_tokens", 0) or 0
+        self.tokens["cache_read"] += getattr(usage, "cache_read_input_tokens", 0) or 0
+        if latency is not None:
+            self.latencies.append(latency)
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        prompt = self.tokens["input"] + self.tokens["cache_write"] + self.tokens["cache_read"]
+        pct = lambda p: round(latencies[min(int(p * len(latencies)), len(latencies) - 1)], 3)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "memo_hits": self.memo_hits,
+            "deduplicated": self.deduplicated,
+            "failures": self.failures,
+            "tokens": dict(self.tokens),
+            "prompt_cache_hit_rate": round(self.tokens["cache_read"] / prompt, 3) if prompt else 0.0,
+            "latency_seconds": {"total": round(sum(latencies), 2),
+                                "p50": pct(0.5), "p95": pct(0.95)} if latencies else {},
+        }
+
+
+class PersonalizationGenerator:
+    """Grouped, prefix-cached, batched and memoized Claude personalization."""
+
+    def __init__(self, claude_client, messaging, cadence, cache=None, model=DEFAULT_MODEL,
+                 max_tokens=DEFAULT_MAX_TOKENS, batch_threshold=BATCH_THRESHOLD,
+                 poll_seconds=BATCH_POLL_SECONDS, max_wait_seconds=BATCH_MAX_WAIT_SECONDS):
+        self.claude = claude_client
+        self.model = model
+        self.max_tokens = max_tokens
+        self.batch_threshold = batch_threshold
+        self.poll_seconds = poll_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.cache = cache if cache is not None else EnrichmentCache(
+            DEFAULT_CACHE_PATH, ttls={CACHE_SOURCE: CACHE_TTL})
+        self.cache.ttls.setdefault(CACHE_SOURCE, CACHE_TTL)
+        self.touch_types = [step["type"] for step in cadence]
+        self.prefix = "\n\n".join([
+            INSTRUCTIONS,
+            "Touch types: " + ", ".join(f"{s['type']} (day {s['day']}: {s['label']})"
+                                        for s in cadence),
+            "Messaging framework:\n" + yaml.safe_dump(messaging, sort_keys=False),
+        ])
+        self.usage = GenerationUsage()
+
+    @staticmethod
+    def account_block(account_data):
+        facts = {k: account_data[k] for k in ACCOUNT_FACTS if account_data.get(k)}
+        return "Account brief:\n" + json.dumps(facts, sort_keys=True, default=str)
+
+    def request_params(self, account_block, persona_track):
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "system": [
+                {"type": "text", "text": self.prefix, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": account_block, "cache_control": {"type": "ephemeral"}},
+            ],
+            "messages": [{"role": "user", "content": (
+                f"Messaging track: {persona_track}. Write the personalization for "
+                f"touch types {', '.join(self.touch_types)}.")}],
+        }
+
+    def job_key(self, params):
+        return content_hash(PROMPT_VERSION, params)
+
+    def generate(self, account_data, persona_track):
+        """Personalization {touch_type: text} for one account + track, or None."""
+        return self.generate_many([(account_data, persona_track)])[0]
+
+    def generate_many(self, jobs):
+        """
+        Personalization for many (account_data, persona_track) jobs, aligned
+        with the input. Duplicates are sent once, memoized jobs not at all.
+        """
+        keys = []
+        pending = {}   # key -> params, in first-seen order
+        results = {}
+        for account_data, track in jobs:
+            params = self.request_params(self.account_block(account_data), track)
+            key = self.job_key(params)
+            keys.append(key)
+            if key in results or key in pending:
+                self.usage.deduplicated += 1
+                continue
+            cached = self.cache.get(CACHE_SOURCE, key)
+            if cached is not None:
+                self.usage.memo_hits += 1
+                results[key] = cached
+            else:
+                pending[key] = params
+        if pending:
+            if self.claude is None:
+                if not self.usage.failures:
+                    logger.warning("No Claude client; personalization uses template fallbacks")
+                self.usage.failures += len(pending)
+            elif len(pending) >= self.batch_threshold and hasattr(self.claude.messages, "batches"):
+                results.update(self._run_batch(pending))
+            else:
+                results.update(self._run_direct(pending))
+        return [results.get(key) for key in keys]
+
+    def _parse(self, key, message):
+        text = "".join(getattr(block, "text", "") for block in message.content).strip()
+        if text.startswith("```"):
+            text = text.strip("`").removeprefix("json").strip()
+        try:
+            parsed = json.loads(text)
+        except ValueError:
+            logger.warning(f"Unparseable personalization for job {key[:12]}")
+            self.usage.failures += 1
+            return None
+        personalization = {t: str(parsed[t]) for t in self.touch_types if parsed.get(t)}
+        if personalization:
+            self.cache.put(CACHE_SOURCE, key, personalization)
+        return personalization or None
+
+    def _run_direct(self, pending):
+        results = {}
+        for key, params in pending.items():
+            started = time.monotonic()
+            try:
+                message = self.claude.messages.create(**params)
+            except Exception as e:
+                logger.error(f"Claude personalization failed: {e}")
+                self.usage.failures += 1
+                continue
+            self.usage.record(message.usage, time.monotonic() - started)
+            results[key] = self._parse(key, message)
+        return results
+
+    def _run_batch(self, pending):
+        started = time.monotonic()
+        batch = self.claude.messages.batches.create(requests=[
+            {"custom_id": key, "params": params} for key, params in pending.items()])
+        self.usage.batches += 1
+        logger.info(f"Submitted Claude batch {batch.id} ({len(pending)} requests)")
+        cancelled = False
+        while batch.processing_status != "ended":
+            if not cancelled and time.monotonic() - started > self.max_wait_seconds:
+                logger.warning(f"Batch {batch.id} not done after {self.max_wait_seconds}s; "
+                               f"cancelling and sending the rest directly")
+                self.claude.messages.batches.cancel(batch.id)
+                cancelled = True
+            # Results are only readable once the batch has ended (cancelled
+            # batches pass through "canceling" first)
+            time.sleep(self.poll_seconds)
+            batch = self.claude.messages.batches.retrieve(batch.id)
+        results = {}
+        for entry in self.claude.messages.batches.results(batch.id):
+            if entry.result.type != "succeeded":
+                self.usage.failures += 1
+                continue
+            self.usage.record(entry.result.message.usage)
+            results[entry.custom_id] = self._parse(entry.custom_id, entry.result.message)
+        self.usage.latencies.append(time.monotonic() - started)
+        leftover = {k: p for k, p in pending.items() if k not in results}
+        if leftover and cancelled:
+            results.update(self._run_direct(leftover))
+        return results
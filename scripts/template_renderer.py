@@ -0,0 +1,203 @@
+"""
+Template Renderer
+==================
+
+Compiled renderer for templates/outbound_sequences.yaml, used by Script 3
+(Personalized Outbound Generator) to turn contacts into 4-touch sequences
+without a Claude call per touch.
+
+Compilation (once, at load):
+  - Each `{{ variable }}` pattern is split into literal text and variable
+    slots and turned into a str.format_map template, so rendering is a
+    single C-level substitution
+  - Persona constants (key_message / proof_point per touch) are substituted
+    at compile time, leaving only account and contact variables
+  - Every variable used must be declared in template_variables; unknown
+    variables or unsupported tags ({{ #each }}) fail at load, not mid-batch
+  - Constants and fallbacks are sent verbatim, so one still holding a
+    placeholder ($X, {{ }}, TBD) fails at load too
+
+Rendering:
+  Account values are resolved once per account and shared by all its
+  contacts; render_batch streams (contact, sequence) pairs so 30k+ touches
+  never sit in memory together. Only the `personalization` variable comes
+  from Claude.
+"""
+
+import logging
+import re
+import yaml
+from pathlib import Path
+
+TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
+logger = logging.getLogger(__name__)
+
+VARIABLE_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+# Unfilled copy: "$X", "{{ ... }}", "TBD", "TODO"
+PLACEHOLDER_RE = re.compile(r"\$[A-Z]\b|\{\{|\}\}|\bTBD\b|\bTODO\b")
+PERSONA_SOURCE = "persona."
+
+
+def check_literal(name, value):
+    """Raise ValueError if text that is sent as-is still holds a placeholder."""
+    match = PLACEHOLDER_RE.search(str(value))
+    if match:
+        raise ValueError(f"{name} has unresolved placeholder {match.group()!r}: {value!r}")
+
+
+class CompiledTemplate:
+    """One `{{ variable }}` pattern compiled to a format_map template."""
+
+    __slots__ = ("source", "variables", "_format")
+
+    def __init__(self, text, constants=None):
+        constants = constants or {}
+        self.source = text
+        parts = VARIABLE_RE.split(text)
+        out = []
+        variables = []
+        for i, part in enumerate(parts):
+            if i % 2 == 0:
+                if "{{" in part or "}}" in part:
+                    raise ValueError(f"Unsupported template tag in {text!r}")
+                out.append(part.replace("{", "{{").replace("}", "}}"))
+            elif part in constants:
+                check_literal(part, constants[part])
+                out.append(str(constants[part]).replace("{", "{{").replace("}", "}}"))
+            else:
+                out.append("{" + part + "}")
+                variables.append(part)
+        self.variables = frozenset(variables)
+        self._format = "".join(out).format_map
+
+    def render(self, values):
+        """Render with a mapping holding every variable (KeyError if one is missing)."""
+        return self._format(values)
+
+
+class SequenceRenderer:
+    """All persona × touch templates of outbound_sequences.yaml, compiled."""
+
+    def __init__(self, config):
+        self.variables = config["template_variables"]
+        self.cadence = config["sequence_structure"]["cadence"]
+        touch_templates = config["touch_templates"]
+        self.required = {name for name, spec in self.variables.items()
+                         if "fallback" not in spec
+                         and not spec["source"][0].startswith(PERSONA_SOURCE)}
+        self.fallbacks = {name: spec["fallback"] for name, spec in self.variables.items()
+                          if "fallback" in spec}
+        for name, fallback in self.fallbacks.items():
+            check_literal(f"{name} fallback", fallback)
+        # Split sources by origin so per-contact work only touches contact fields
+        self._account_sources = self._sources("account.")
+        self._contact_sources = self._sources("contact.")
+        self._sender_sources = self._sources("sender.")
+        self.personas = {}
+        for track, persona in config["persona_templates"].items():
+            subjects = persona["subject_line_patterns"]
+            touches = []
+            for index, step in enumerate(self.cadence):
+                spec = touch_templates[step["type"]]
+                constants = {}
+                for name, var in self.variables.items():
+                    source = var["source"][0]
+                    if source.startswith(PERSONA_SOURCE):
+                        items = persona[source[len(PERSONA_SOURCE):]]
+                        constants[name] = items[index % len(items)]
+                body = CompiledTemplate(spec["body"], constants)
+                subject = None
+                if "reply_to" not in spec:
+                    subject = CompiledTemplate(subjects[spec["subject_pattern"] % len(subjects)],
+                                               constants)
+                touches.append({"step": step, "subject": subject, "body": body,
+                                "reply_to": spec.get("reply_to")})
+            self.personas[track] = touches
+        self._validate()
+
+    @classmethod
+    def load(cls, path=TEMPLATE_DIR / "outbound_sequences.yaml"):
+        with open(path) as f:
+            return cls(yaml.safe_load(f))
+
+    def _sources(self, prefix):
+        return {name: [s[len(prefix):] for s in spec["source"] if s.startswith(prefix)]
+                for name, spec in self.variables.items()
+                if any(s.startswith(prefix) for s in spec["source"])}
+
+    def _validate(self):
+        types = [step["type"] for step in self.cadence]
+        for track, touches in self.personas.items():
+            for touch in touches:
+                for template in (touch["subject"], touch["body"]):
+                    if template is None:
+                        continue
+                    unknown = template.variables - set(self.variables)
+                    if unknown:
+                        raise ValueError(f"{track}/{touch['step']['type']}: undeclared "
+                                         f"template variables {sorted(unknown)}")
+                if touch["reply_to"] and touch["reply_to"] not in types:
+                    raise ValueError(f"{track}/{touch['step']['type']}: reply_to "
+                                     f"{touch['reply_to']!r} is not a touch type")
+
+    @staticmethod
+    def _resolve(sources, record):
+        values = {}
+        for name, keys in sources.items():
+            for key in keys:
+                value = record.get(key)
+                if value not in (None, "", []):
+                    values[name] = value
+                    break
+        return values
+
+    def account_values(self, account_data, sender=None):
+        """Account-level values (fallbacks applied), shared by all its contacts."""
+        values = dict(self.fallbacks)
+        values.update(self._resolve(self._sender_sources, sender or {}))
+        values.update(self._resolve(self._account_sources, account_data or {}))
+        return values
+
+    def contact_values(self, contact_data):
+        contact = contact_data or {}
+        if not contact.get("first_name") and contact.get("name"):
+            contact = {**contact, "first_name": contact["name"].split()[0]}
+        return self._resolve(self._contact_sources, contact)
+
+    def render(self, persona_track, account_values, contact_data, personalization=None):
+        """
+        One contact's sequence: list of {touch, day, type, label, subject, body}.
+        `personalization` maps touch type → Claude-written account-specific text.
+        Raises KeyError naming the missing variable if a required value is absent.
+        """
+        values = {**account_values, **self.contact_values(contact_data)}
+        missing = self.required - values.keys()
+        if missing:
+            raise KeyError(f"missing required template variables {sorted(missing)}")
+        personalization = personalization or {}
+        sequence = []
+        subjects = {}
+        for number, touch in enumerate(self.personas[persona_track], start=1):
+            step = touch["step"]
+            line = personalization.get(step["type"])
+            values["personalization"] = f"{line.strip()}\n\n" if line else ""
+            subject = (f"Re: {subjects[touch['reply_to']]}" if touch["reply_to"]
+                       else touch["subject"].render(values))
+            subjects[step["type"]] = subject
+            sequence.append({"touch": number, "day": step["day"], "type": step["type"],
+                             "label": step["label"], "subject": subject,
+                             "body": touch["body"].render(values)})
+        return sequence
+
+    def render_batch(self, items):
+        """
+        Stream sequences for (persona_track, account_values, contact_data,
+        personalization) items; yields (contact_data, sequence). Contacts
+        missing required values are logged and skipped.
+        """
+        for persona_track, account_values, contact_data, personalization in items:
+            try:
+                yield contact_data, self.render(persona_track, account_values,
+                                                contact_data, personalization)
+            except KeyError as e:
+                logger.warning(f"Skipping {contact_data.get('email')}: {e}")
@@ -0,0 +1,211 @@
+"""
+Title Classifier
+=================
+
+Shared persona classifier for job titles, used by Script 2 (Buying Committee
+Builder) and Script 3 (Outbound Generator), and fast enough for event
+attendee lists and bulk Clay people searches.
+
+All persona keyword lists (TARGET_PERSONAS below + personas.*.titles in
+config/messaging_framework.yaml) are compiled into ONE Aho-Corasick automaton
+over normalized title tokens, so a title is classified in a single left-to-
+right pass no matter how many keywords there are.
+
+Normalization:
+  - lowercase, punctuation stripped ("Dir." → "dir", "VP, HR" → "vp hr")
+  - abbreviations canonicalized: VP/Vice President → vp, Dir → director,
+    Sr → senior, Ops → operations, Human Resources → hr, ...
+  - filler words dropped ("Director of IT" → "director it"); two-token
+    keywords also match reversed ("IT Director")
+  - "HRIS" stays its own token (an HR systems role, not HR leadership)
+
+Scoring:
+  The longest keyword match wins (more specific beats generic, so
+  "VP HR Operations" beats "VP HR"). Confidence grows with the share of the
+  title the match covers and drops when another persona matched too.
+  Qualifiers that change the role's weight ("Assistant to the COO",
+  "Associate Director", "Deputy ...") are kept and cut confidence by
+  QUALIFIER_FACTOR, so they usually fall below the committee threshold.
+"""
+
+import re
+import yaml
+from collections import deque, namedtuple
+from pathlib import Path
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+
+TARGET_PERSONAS = [
+    {"title_keywords": ["VP HR Operations", "Director of HR Operations", "Head of HR Operations",
+                        "Director of Onboarding", "Head of Onboarding"],
+     "persona": "hr_ops"},
+    # HR leadership sits with the executives, as in messaging_framework.yaml
+    # (c_suite lists VP HR and COO)
+    {"title_keywords": ["Chief People Officer", "CHRO", "COO", "VP People", "VP HR",
+                        "Head of HR", "Director of HR", "Head of People", "Director of People"],
+     "persona": "c_suite"},
+    {"title_keywords": ["Head of Compliance", "Director of Compliance", "VP Risk"],
+     "persona": "compliance"},
+    {"title_keywords": ["Director of IT", "Head of Systems", "VP Technology", "HRIS"],
+     "persona": "hr_engineer"},
+    {"title_keywords": ["VP Operations", "Director of Operations"],
+     "persona": "operations"},
+]
+
+TitleMatch = namedtuple("TitleMatch", ["persona", "confidence", "keyword"])
+
+# Multi-token phrases collapsed to one canonical token before matching
+PHRASE_ABBREVIATIONS = {
+    ("senior", "vice", "president"): "svp",
+    ("executive", "vice", "president"): "evp",
+    ("vice", "president"): "vp",
+    ("human", "resources"): "hr",
+    ("information", "technology"): "it",
+    ("chief", "human", "resources", "officer"): "chro",
+    ("chief", "operating", "officer"): "coo",
+}
+TOKEN_ABBREVIATIONS = {
+    "dir": "director", "directeur": "director", "mgr": "manager",
+    "mngr": "manager", "sr": "senior", "snr": "senior", "jr": "junior",
+    "ops": "operations", "operation": "operations", "vicepresident": "vp",
+    "svp": "vp", "evp": "vp", "avp": "vp", "hd": "head", "sys": "systems",
+    "tech": "technology", "ppl": "people",
+}
+# First token → candidate phrases, longest first
+_PHRASES_BY_START = {}
+for _phrase in sorted(PHRASE_ABBREVIATIONS, key=len, reverse=True):
+    _PHRASES_BY_START.setdefault(_phrase[0], []).append(_phrase)
+FILLER_TOKENS = {"of", "the", "and", "for", "at", "to", "in", "a", "an"}
+# Seniority prefixes that don't change the persona
+IGNORED_TOKENS = {"senior", "junior", "global", "regional", "interim", "acting", "lead"}
+# Kept in the title, but the person is not the role itself
+QUALIFIER_TOKENS = {"assistant", "associate", "deputy"}
+QUALIFIER_FACTOR = 0.7
+
+
+def normalize_title(title):
+    """Title → canonical token tuple (see module docstring)."""
+    if not title:
+        return ()
+    tokens = re.sub(r"[^a-z0-9]+", " ", str(title).lower().replace("&", " and ")).split()
+    out = []
+    i = 0
+    while i < len(tokens):
+        for phrase in _PHRASES_BY_START.get(tokens[i], ()):
+            if tuple(tokens[i:i + len(phrase)]) == phrase:
+                out.append(PHRASE_ABBREVIATIONS[phrase])
+                i += len(phrase)
+                break
+        else:
+            out.append(tokens[i])
+            i += 1
+    canonical = []
+    for token in out:
+        token = TOKEN_ABBREVIATIONS.get(token, token)
+        if token not in FILLER_TOKENS and token not in IGNORED_TOKENS:
+            canonical.append(token)
+    return tuple(canonical)
+
+
+class TitleClassifier:
+    """Token-level Aho-Corasick automaton over all persona keyword lists."""
+
+    def __init__(self, persona_keywords):
+        """
+        persona_keywords: ordered list of (persona, [keywords]). If the same
+        normalized keyword appears under several personas, the first wins.
+        """
+        self.patterns = []   # (tokens, persona, original keyword)
+        seen = set()
+        for persona, keywords in persona_keywords:
+            for keyword in keywords:
+                tokens = normalize_title(keyword)
+                variants = [tokens]
+                if len(tokens) == 2:
+                    variants.append(tokens[::-1])
+                for variant in variants:
+                    if variant and variant not in seen:
+                        seen.add(variant)
+                        self.patterns.append((variant, persona, keyword))
+        self.personas = list(dict.fromkeys(p for p, _ in persona_keywords))
+        self._build()
+        self._memo = {}
+
+    @classmethod
+    def from_config(cls, target_personas=TARGET_PERSONAS):
+        """Compile TARGET_PERSONAS + messaging_framework.yaml persona titles."""
+        with open(CONFIG_DIR / "messaging_framework.yaml") as f:
+            messaging = yaml.safe_load(f)
+        keyword_lists = [(p["persona"], p["title_keywords"]) for p in target_personas]
+        keyword_lists += [(key, persona.get("titles", []))
+                          for key, persona in messaging.get("personas", {}).items()]
+        return cls(keyword_lists)
+
+    def _build(self):
+        # Trie: goto[state] = {token: next_state}; output[state] = [pattern ids]
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for pid, (tokens, _, _) in enumerate(self.patterns):
+            state = 0
+            for token in tokens:
+                if token not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][token] = len(self._goto) - 1
+                state = self._goto[state][token]
+            self._output[state].append(pid)
+        # Breadth-first failure links; outputs inherit their fail state's outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(token, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def _scan(self, tokens):
+        """Single pass over tokens → list of (pattern id, end token index)."""
+        state = 0
+        found = []
+        for i, token in enumerate(tokens):
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            found.extend((pid, i) for pid in self._output[state])
+        return found
+
+    def classify(self, title):
+        """Best TitleMatch for a title, or None if no persona keyword matches."""
+        if title in self._memo:
+            return self._memo[title]
+        tokens = normalize_title(title)
+        best = {}   # persona -> (length, keyword, start, end)
+        for pid, end in self._scan(tokens):
+            pattern_tokens, persona, keyword = self.patterns[pid]
+            length = len(pattern_tokens)
+            if length > best.get(persona, (0,))[0]:
+                best[persona] = (length, keyword, end - length + 1, end)
+        match = None
+        if best:
+            ranked = sorted(best.items(), key=lambda kv: (-kv[1][0], self.personas.index(kv[0])))
+            persona, (length, keyword, start, end) = ranked[0]
+            confidence = 0.5 + 0.5 * length / len(tokens)
+            # A rival persona only lowers confidence if it matched words
+            # outside the winning keyword ("VP HR" inside "VP HR Operations" doesn't)
+            rivals = [m for _, m in ranked[1:] if m[2] < start or m[3] > end]
+            if rivals:
+                confidence *= length / (length + rivals[0][0])
+            if any(token in QUALIFIER_TOKENS for token in tokens):
+                confidence *= QUALIFIER_FACTOR
+            match = TitleMatch(persona, round(confidence, 2), keyword)
+        self._memo[title] = match
+        return match
+
+    def classify_batch(self, titles):
+        """Classify many titles; repeated titles are resolved once."""
+        return [self.classify(title) for title in titles]
@@ -0,0 +1,294 @@
+"""
+Transcript Extraction
+======================
+
+Chunked map-reduce extraction of meeting intelligence for Script 5
+(Post-Meeting Processor). Long calls (90-minute technical deep dives) no
+longer go to Claude as one prompt:
+
+  - Chunking: the transcript is read line by line and grouped into
+    speaker-aware chunks of up to CHUNK_CHARS (rendered text, overlap
+    included), never splitting a speaker turn (unless one turn alone is
+    longer than a chunk). The last turn of each chunk is repeated at the
+    start of the next for context when both fit; the pieces of a split turn
+    follow each other without repeats.
+  - Map: chunks are extracted in parallel (max_workers per transcript,
+    and at most max_in_flight Claude calls across every transcript the
+    extractor is working on at once). Only a bounded window of chunk texts
+    is held at once, and the static instructions are a prompt-cached
+    system block shared by every chunk.
+  - Reduce: partial results are merged in call order and de-duplicated
+    (normalized text / owner + task / competitor / stakeholder name) into
+    the extract_intelligence schema. The deal stage signal is taken from
+    the latest chunk that has one.
+
+Latency is roughly one chunk's extraction time as long as the chunk count
+stays within the worker window. Per-chunk timings are logged and kept on
+`timings` for the last transcript extracted (extract() itself is safe to
+call from several threads at once). If any chunk fails (API error or
+unparseable reply) extract() returns None rather than a partial merge, so
+callers can retry the transcript instead of recording incomplete
+intelligence. A reply in the wrong shape counts as unparseable, except that
+a bare string where an object is expected ("action_items": ["Send the
+deck"]) is kept as that object's main field.
+"""
+
+import json
+import logging
+import re
+import textwrap
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from transcript_index import format_timestamp, iter_turns
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "claude-sonnet-4-5"
+DEFAULT_MAX_TOKENS = 2000
+CHUNK_CHARS = 24000          # ~6k tokens of transcript per request
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_IN_FLIGHT = 8    # Claude calls at once, across concurrent extract() calls
+LIST_FIELDS = ("decisions", "action_items", "objections", "competitive_mentions",
+               "next_steps", "new_stakeholders")
+DEAL_STAGE_SIGNALS = ("advance", "hold", "regress")
+# Object list fields → the key a bare string item is stored under
+ITEM_TEXT_KEYS = {"action_items": "task", "competitive_mentions": "competitor",
+                  "next_steps": "action", "new_stakeholders": "name"}
+
+Chunk = namedtuple("Chunk", ["index", "start_seconds", "end_seconds", "text"])
+
+INSTRUCTIONS = """You extract structured intelligence from one part of a sales \
+call transcript between Onboarded and a prospect. Only report what is said in \
+this part; earlier and later parts are handled separately. Do not invent \
+owners, dates or numbers.
+
+Reply with JSON only, using exactly these keys (empty list / object / null \
+when nothing applies):
+{
+  "decisions": ["..."],
+  "action_items": [{"owner": "...", "task": "...", "deadline": "... or null"}],
+  "objections": ["..."],
+  "competitive_mentions": [{"competitor": "...", "context": "..."}],
+  "technical_requirements": {"ats": "...", "integrations": ["..."], "volume": "..."},
+  "next_steps": [{"action": "...", "timing": "...", "owner": "..."}],
+  "deal_stage_signal": "advance" | "hold" | "regress" | null,
+  "new_stakeholders": [{"name": "...", "title": "...", "role_in_deal": "..."}]
+}"""
+
+
+def _norm(value):
+    return " ".join(re.findall(r"\w+", str(value or "").lower()))
+
+
+def iter_chunks(lines, max_chars=CHUNK_CHARS):
+    """Transcript lines → Chunks of whole speaker turns, up to max_chars each."""
+    index, turns, size = 0, [], 0
+    previous, previous_size = None, 0   # last whole turn, the next chunk's context
+
+    def render(speaker, start, text):
+        stamp = f"[{format_timestamp(start)}] " if start is not None else ""
+        return f"{stamp}{speaker}: {text}" if speaker else f"{stamp}{text}"
+
+    def make_chunk():
+        starts = [t[1] for t in turns if t[1] is not None]
+        return Chunk(index, starts[0] if starts else None, starts[-1] if starts else None,
+                     "\n".join(render(*t) for t in turns))
+
+    for speaker, start, text in iter_turns(lines):
+        # Rendered size, counting the line's stamp / speaker prefix and newline
+        overhead = len(render(speaker, start, "")) + 1
+        width = max(max_chars - overhead, 1)
+        # A single turn longer than a chunk is cut at word boundaries
+        pieces = [text] if len(text) <= width else textwrap.wrap(text, width)
+        for piece in pieces:
+            cost = overhead + len(piece)
+            if turns and size + cost > max_chars:
+                yield make_chunk()
+                index += 1
+                turns, size = [], 0
+                if previous is not None and previous_size + cost <= max_chars:
+                    turns, size = [previous], previous_size
+            turns.append((speaker, start, piece))
+            size += cost
+            # Pieces of a split turn are never repeated as context
+            previous, previous_size = (turns[-1], cost) if len(pieces) == 1 else (None, 0)
+    if turns:
+        yield make_chunk()
+
+
+def empty_intelligence():
+    return {**{field: [] for field in LIST_FIELDS}, "technical_requirements": {},
+            "deal_stage_signal": None}
+
+
+def clean_partial(partial):
+    """Parsed chunk reply → partial in the schema's shapes, or None if it isn't one."""
+    if not isinstance(partial, dict):
+        return None
+    cleaned = dict(partial)
+    for field in LIST_FIELDS:
+        items = partial.get(field) or []
+        if not isinstance(items, list):
+            return None
+        text_key = ITEM_TEXT_KEYS.get(field)
+        if text_key:
+            items = [{text_key: item} if isinstance(item, str) else item for item in items]
+        if not all(isinstance(item, dict if text_key else str) for item in items):
+            return None
+        cleaned[field] = items
+    if not isinstance(partial.get("technical_requirements") or {}, dict):
+        return None
+    return cleaned
+
+
+def merge_intelligence(partials):
+    """Per-chunk results (in call order) → one de-duplicated result."""
+    merged = empty_intelligence()
+    keyed = {field: {} for field in LIST_FIELDS}
+    item_keys = {
+        "decisions": _norm, "objections": _norm,
+        "action_items": lambda i: (_norm(i.get("owner")), _norm(i.get("task"))),
+        "competitive_mentions": lambda i: _norm(i.get("competitor")),
+        "next_steps": lambda i: _norm(i.get("action")),
+        "new_stakeholders": lambda i: _norm(i.get("name")),
+    }
+    for partial in partials:
+        if not partial:
+            continue
+        for field in LIST_FIELDS:
+            for item in partial.get(field) or []:
+                key = item_keys[field](item)
+                if not (any(key) if isinstance(key, tuple) else key):
+                    continue
+                existing = keyed[field].get(key)
+                if existing is None:
+                    keyed[field][key] = dict(item) if isinstance(item, dict) else item
+                    merged[field].append(keyed[field][key])
+                elif field == "competitive_mentions":
+                    context = item.get("context")
+                    if context and _norm(context) not in _norm(existing.get("context")):
+                        existing["context"] = "; ".join(
+                            c for c in (existing.get("context"), context) if c)
+                elif isinstance(existing, dict):
+                    # Fill in fields the earlier mention left empty
+                    for k, v in item.items():
+                        if v and not existing.get(k):
+                            existing[k] = v
+        for k, v in (partial.get("technical_requirements") or {}).items():
+            current = merged["technical_requirements"].get(k)
+            if isinstance(v, list):
+                current = current if isinstance(current, list) else ([current] if current else [])
+                seen = {_norm(x) for x in current}
+                merged["technical_requirements"][k] = current + [
+                    x for x in v if x and _norm(x) not in seen]
+            elif v and not current:
+                merged["technical_requirements"][k] = v
+        if partial.get("deal_stage_signal") in DEAL_STAGE_SIGNALS:
+            merged["deal_stage_signal"] = partial["deal_stage_signal"]
+    return merged
+
+
+class TranscriptExtractor:
+    """Parallel per-chunk Claude extraction + merge for one transcript at a time."""
+
+    def __init__(self, claude_client, model=DEFAULT_MODEL, max_tokens=DEFAULT_MAX_TOKENS,
+                 chunk_chars=CHUNK_CHARS, max_workers=DEFAULT_WORKERS,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        self.claude = claude_client
+        self.model = model
+        self.max_tokens = max_tokens
+        self.chunk_chars = chunk_chars
+        self.max_workers = max_workers
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.timings = []
+        self._warned = False
+
+    def request_params(self, chunk):
+        span = (f" ({format_timestamp(chunk.start_seconds)}–"
+                f"{format_timestamp(chunk.end_seconds)})" if chunk.start_seconds is not None
+                else "")
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "system": [{"type": "text", "text": INSTRUCTIONS,
+                        "cache_control": {"type": "ephemeral"}}],
+            "messages": [{"role": "user", "content":
+                          f"Transcript part {chunk.index + 1}{span}:\n\n{chunk.text}"}],
+        }
+
+    def extract_chunk(self, chunk):
+        """One chunk → partial result dict (None if the call, parse or shape failed)."""
+        message = self.claude.messages.create(**self.request_params(chunk))
+        text = "".join(getattr(block, "text", "") for block in message.content).strip()
+        if text.startswith("```"):
+            text = text.strip("`").removeprefix("json").strip()
+        try:
+            partial = clean_partial(json.loads(text))
+        except ValueError:
+            partial = None
+        if partial is None:
+            logger.warning(f"Unparseable extraction for chunk {chunk.index + 1}")
+        return partial
+
+    def _timed(self, chunk):
+        started = time.monotonic()
+        try:
+            with self._in_flight:
+                result = self.extract_chunk(chunk)
+        except Exception as e:
+            logger.error(f"Extraction of chunk {chunk.index + 1} failed: {e}")
+            result = None
+        return result, time.monotonic() - started
+
+    def extract(self, lines):
+        """
+        Transcript (str, file or iterable of lines) → merged intelligence,
+        or None if any chunk failed. At most 2 * max_workers chunks are in
+        memory at once.
+        """
+        timings = []
+        if self.claude is None:
+            if not self._warned:
+                logger.warning("No Claude client configured; transcripts are not extracted")
+                self._warned = True
+            return empty_intelligence()
+        started = time.monotonic()
+        partials = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = {}
+
+            def collect(done):
+                for future in done:
+                    chunk = in_flight.pop(future)
+                    result, seconds = future.result()
+                    partials[chunk.index] = result
+                    timings.append({"chunk": chunk.index + 1, "chars": len(chunk.text),
+                                    "start": format_timestamp(chunk.start_seconds),
+                                    "seconds": round(seconds, 2),
+                                    "ok": result is not None})
+                    logger.info(f"Chunk {chunk.index + 1} ({len(chunk.text):,} chars, from "
+                                f"{format_timestamp(chunk.start_seconds) or 'start'}) "
+                                f"extracted in {seconds:.1f}s")
+
+            for chunk in iter_chunks(lines, self.chunk_chars):
+                if len(in_flight) >= 2 * self.max_workers:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                in_flight[executor.submit(self._timed, chunk)] = chunk
+            collect(wait(in_flight).done)
+        timings.sort(key=lambda t: t["chunk"])
+        failed = [t["chunk"] for t in timings if not t["ok"]]
+        if failed:
+            logger.warning(f"Chunks {failed} of {len(timings)} produced no extraction")
+        seconds = sorted(t["seconds"] for t in timings)
+        if seconds:
+            logger.info(f"Extracted {len(seconds)} chunks in {time.monotonic() - started:.1f}s "
+                        f"(per chunk p50 {seconds[len(seconds) // 2]:.1f}s, "
+                        f"max {seconds[-1]:.1f}s)")
+        self.timings = timings
+        if failed:
+            return None
+        return merge_intelligence(partials[i] for i in sorted(partials))
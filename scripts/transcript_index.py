@@ -0,0 +1,301 @@
+"""
+Transcript Index
+=================
+
+Local full-text index over the Fathom transcripts in Google Drive
+(FATHOM_GDRIVE_FOLDER_ID), shared by Script 4 (Meeting Prep) and Script 7
+(Competitive Intelligence). Replaces Drive full-text search, which is slow
+and returns whole documents, with BM25-ranked passage hits in milliseconds.
+
+Passages:
+  Each transcript is split into speaker turns ("0:01:23 - Jane Doe",
+  "[01:23] Jane Doe: ...", and "Jane Doe: ..." once Jane Doe is a known
+  speaker, so lines like "Note: ..." stay text); long turns are cut into
+  ~PASSAGE_WORDS-word chunks. A hit carries the speaker, the timestamp
+  offset into the call and a tight highlighted excerpt, not the whole doc.
+
+Storage:
+  SQLite FTS5 table under state/ (porter-stemmed inverted index, BM25
+  ranking with title and speaker matches weighted above body text).
+
+Updates:
+  sync() lists only Drive files modified after the stored cursor
+  (modifiedTime), re-indexes those documents' passages and advances the
+  cursor up to (not past) the first document that failed to index, so it
+  is retried next sync; unchanged transcripts are never downloaded again.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from company_index import to_epoch, to_iso
+
+STATE_DIR = Path(__file__).parent.parent / "state"
+DEFAULT_INDEX_PATH = STATE_DIR / "transcript_index.sqlite"
+logger = logging.getLogger(__name__)
+
+PASSAGE_WORDS = 120
+DEFAULT_TOP_K = 5
+EXCERPT_TOKENS = 40
+# bm25() column weights: text, speaker, title
+BM25_WEIGHTS = (1.0, 2.0, 3.0)
+DRIVE_PAGE_SIZE = 100
+
+Hit = namedtuple("Hit", ["doc_id", "title", "speaker", "start_seconds", "timestamp",
+                         "excerpt", "score"])
+
+TIMESTAMP = r"\d{1,2}:\d{2}(?::\d{2})?"
+TURN_PATTERNS = [
+    # [0:01:23] Jane Doe: text   /   0:01:23 - Jane Doe: text
+    re.compile(rf"^\[?(?P<ts>{TIMESTAMP})\]?\s*[-–]?\s*(?P<speaker>[^:\n]{{1,60}}):\s*(?P<text>.*)$"),
+    # 0:01:23 - Jane Doe   (text on the following lines)
+    re.compile(rf"^\[?(?P<ts>{TIMESTAMP})\]?\s*[-–]\s*(?P<speaker>[^:\n]{{1,60}})$"),
+    # Jane Doe  0:01:23    (text on the following lines)
+    re.compile(rf"^(?P<speaker>[A-Z][\w .'-]{{0,59}}?)\s+\(?(?P<ts>{TIMESTAMP})\)?$"),
+]
+# Jane Doe: text   (no timestamp: only a turn when Jane Doe is a known speaker)
+BARE_TURN_PATTERN = re.compile(r"^(?P<speaker>[A-Z][\w .'-]{0,59}):\s+(?P<text>.*)$")
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5(
+    text, speaker, title,
+    doc_id UNINDEXED, start_seconds UNINDEXED,
+    tokenize = 'porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS passage_docs (
+    passage_rowid INTEGER PRIMARY KEY,
+    doc_id        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS passage_docs_doc ON passage_docs (doc_id);
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id      TEXT PRIMARY KEY,
+    title       TEXT,
+    modified_at REAL,
+    passages    INTEGER,
+    indexed_at  REAL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def parse_timestamp(value):
+    """'1:02:03' / '02:03' → seconds."""
+    if not value:
+        return None
+    seconds = 0
+    for part in value.split(":"):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def format_timestamp(seconds):
+    if seconds is None:
+        return None
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def iter_turns(lines, participants=()):
+    """
+    Transcript lines (a str, a file or any iterable of lines) → speaker
+    turns (speaker, start_seconds, text), one turn held in memory at a time.
+    An untimestamped "Name: text" line starts a turn only when Name is in
+    `participants` or has already spoken with a timestamp; otherwise
+    ("Note: ...", "Action items: ...") it is part of the current turn.
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    known = {p.strip().lower() for p in participants if p}
+    speaker, start, body = None, None, []
+    for raw in lines or ():
+        line = raw.strip()
+        if not line:
+            continue
+        match = next(filter(None, (pattern.match(line) for pattern in TURN_PATTERNS)), None)
+        if match:
+            known.add(match["speaker"].strip().lower())
+        else:
+            match = BARE_TURN_PATTERN.match(line)
+            if match and match["speaker"].strip().lower() not in known:
+                match = None
+        if match:
+            if body:
+                yield speaker, start, " ".join(" ".join(body).split())
+            parts = match.groupdict()
+            speaker = parts["speaker"].strip()
+            start = parse_timestamp(parts.get("ts")) if parts.get("ts") else start
+            body = [parts["text"]] if parts.get("text") else []
+        else:
+            body.append(line)
+    if body:
+        yield speaker, start, " ".join(" ".join(body).split())
+
+
+def split_passages(text, max_words=PASSAGE_WORDS):
+    """Transcript text → [(speaker, start_seconds, passage text)]."""
+    passages = []
+    for speaker, start, body in iter_turns(text):
+        words = body.split()
+        for i in range(0, len(words), max_words):
+            passages.append((speaker, start, " ".join(words[i:i + max_words])))
+    return passages
+
+
+def fts_query(terms):
+    """Search terms / phrases → FTS5 MATCH expression (phrases OR-ed)."""
+    phrases = []
+    for term in terms:
+        tokens = re.findall(r"\w+", (term or "").lower())
+        if tokens:
+            phrases.append('"' + " ".join(tokens) + '"')
+    return " OR ".join(dict.fromkeys(phrases))
+
+
+def drive_list_modified(gdrive, folder_id, since_iso=None):
+    """Drive v3: files in the Fathom folder modified after since_iso."""
+    query = f"'{folder_id}' in parents and trashed = false"
+    if since_iso:
+        query += f" and modifiedTime > '{since_iso}'"
+    files, page_token = [], None
+    while True:
+        response = gdrive.files().list(
+            q=query, pageSize=DRIVE_PAGE_SIZE, pageToken=page_token,
+            orderBy="modifiedTime", fields="nextPageToken, files(id, name, modifiedTime)",
+        ).execute()
+        files.extend(response.get("files", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return files
+
+
+def drive_read_text(gdrive, file_id):
+    """Drive v3: Google Doc exported as plain text."""
+    data = gdrive.files().export(fileId=file_id, mimeType="text/plain").execute()
+    return data.decode("utf-8") if isinstance(data, bytes) else data
+
+
+class TranscriptIndex:
+    """Incremental BM25 passage index over Fathom transcripts."""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, folder_id=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.folder_id = folder_id or os.environ.get("FATHOM_GDRIVE_FOLDER_ID")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    @property
+    def cursor(self):
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'cursor'").fetchone()
+        return row[0] if row else None
+
+    def add_document(self, doc_id, title, text, modified_at=None, commit=True):
+        """(Re-)index one transcript; replaces any passages it had before."""
+        passages = split_passages(text)
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM passages WHERE rowid IN "
+                "(SELECT passage_rowid FROM passage_docs WHERE doc_id = ?)", (doc_id,))
+            self._db.execute("DELETE FROM passage_docs WHERE doc_id = ?", (doc_id,))
+            for speaker, start, body in passages:
+                rowid = self._db.execute(
+                    "INSERT INTO passages (text, speaker, title, doc_id, start_seconds) "
+                    "VALUES (?, ?, ?, ?, ?)", (body, speaker or "", title, doc_id, start)
+                ).lastrowid
+                self._db.execute("INSERT INTO passage_docs VALUES (?, ?)", (rowid, doc_id))
+            self._db.execute(
+                "INSERT OR REPLACE INTO docs VALUES (?, ?, ?, ?, ?)",
+                (doc_id, title, to_epoch(modified_at), len(passages), time.time()))
+            if commit:
+                self._db.commit()
+        return len(passages)
+
+    def sync(self, gdrive, list_modified=drive_list_modified, read_text=drive_read_text):
+        """
+        Index transcripts modified since the cursor. `list_modified` and
+        `read_text` default to the Drive v3 calls above. Returns the number
+        of documents (re-)indexed.
+        """
+        if gdrive is None or not self.folder_id:
+            logger.warning("Transcript index not synced: no Drive client or "
+                           "FATHOM_GDRIVE_FOLDER_ID")
+            return 0
+        started = time.monotonic()
+        files = list_modified(gdrive, self.folder_id, self.cursor)
+        newest = to_epoch(self.cursor) or 0.0
+        passages, failed = 0, 0
+        for f in files:
+            try:
+                passages += self.add_document(f["id"], f.get("name"), read_text(gdrive, f["id"]),
+                                              f.get("modifiedTime"), commit=False)
+            except Exception as e:
+                logger.error(f"Failed to index transcript {f.get('name')}: {e}")
+                failed += 1
+                continue
+            # Files come oldest first; the cursor stops short of the first
+            # failure so it is listed (and retried) again next sync
+            if not failed:
+                newest = max(newest, to_epoch(f.get("modifiedTime")) or 0.0)
+        with self._lock:
+            if newest:
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('cursor', ?)",
+                                 (to_iso(newest),))
+            self._db.commit()
+        logger.info(f"Transcript index sync: {len(files)} docs ({failed} failed), "
+                    f"{passages} passages in {time.monotonic() - started:.1f}s")
+        return len(files)
+
+    def search(self, terms, k=DEFAULT_TOP_K, doc_ids=None):
+        """
+        Top-k passages for any of `terms` (words or phrases), best first.
+        Optionally restricted to doc_ids.
+        """
+        query = fts_query(terms)
+        if not query:
+            return []
+        sql = ("SELECT doc_id, title, speaker, start_seconds, "
+               f"snippet(passages, 0, '**', '**', '…', {EXCERPT_TOKENS}), "
+               f"bm25(passages, {', '.join(map(str, BM25_WEIGHTS))}) AS rank "
+               "FROM passages WHERE passages MATCH ?")
+        params = [query]
+        if doc_ids:
+            sql += f" AND doc_id IN ({','.join('?' * len(doc_ids))})"
+            params += list(doc_ids)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(k)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [Hit(doc_id, title, speaker or None, start, format_timestamp(start),
+                    excerpt, round(-rank, 3))
+                for doc_id, title, speaker, start, excerpt, rank in rows]
+
+    def documents_mentioning(self, terms):
+        """{doc_id: title} for every transcript with a passage matching `terms`."""
+        query = fts_query(terms)
+        if not query:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT doc_id, title FROM passages WHERE passages MATCH ?",
+                (query,)).fetchall()
+        return dict(rows)
+
+    def stats(self):
+        with self._lock:
+            docs, passages = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(passages), 0) FROM docs").fetchone()
+        return {"documents": docs, "passages": passages, "cursor": self.cursor,
+                "path": str(self.path)}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,155 @@
+"""
+Transcript Ledger
+==================
+
+Local record of which Fathom transcripts Script 5 (Post-Meeting Processor)
+has processed, so batch and ad-hoc runs are idempotent.
+
+Keyed by Drive doc id, each entry holds:
+  - the sha256 content hash of the transcript it applies to (and the Drive
+    modifiedTime it was read at)
+  - the extracted intelligence, so a resumed transcript is not sent to
+    Claude again
+  - one row per finished side-effecting step (Attio note, deal update,
+    tasks, follow-up draft, stakeholder hand-off) and the step that failed
+
+A finished transcript whose modifiedTime hasn't changed is skipped with a
+single primary-key lookup, before it is downloaded. A partially failed one
+resumes at the step that failed. A transcript is only reprocessed from the
+start when its content hash changes (Fathom edited it); a new modifiedTime
+with identical content just refreshes the entry.
+
+Storage:
+  SQLite file under state/.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+STATE_DIR = Path(__file__).parent.parent / "state"
+DEFAULT_LEDGER_PATH = STATE_DIR / "transcript_ledger.sqlite"
+logger = logging.getLogger(__name__)
+
+LedgerEntry = namedtuple("LedgerEntry", ["doc_id", "content_hash", "modified_at", "status",
+                                         "done_steps", "intelligence", "failed_step"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    doc_id       TEXT PRIMARY KEY,
+    title        TEXT,
+    content_hash TEXT NOT NULL,
+    modified_at  TEXT,
+    status       TEXT NOT NULL,
+    intelligence TEXT,
+    failed_step  TEXT,
+    error        TEXT,
+    updated_at   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steps (
+    doc_id   TEXT NOT NULL,
+    step     TEXT NOT NULL,
+    done_at  REAL NOT NULL,
+    PRIMARY KEY (doc_id, step)
+);
+"""
+
+
+class TranscriptLedger:
+    """Per-transcript, per-step processing state keyed by doc id + content hash."""
+
+    def __init__(self, steps, path=DEFAULT_LEDGER_PATH):
+        self.steps = tuple(steps)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    def get(self, doc_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content_hash, modified_at, status, intelligence, failed_step "
+                "FROM transcripts WHERE doc_id = ?", (doc_id,)).fetchone()
+            if row is None:
+                return None
+            done = {step for (step,) in self._db.execute(
+                "SELECT step FROM steps WHERE doc_id = ?", (doc_id,))}
+        return LedgerEntry(doc_id, row[0], row[1], row[2], done,
+                           json.loads(row[3]) if row[3] else None, row[4])
+
+    def is_done(self, doc_id, modified_at=None):
+        """Finished, and (if given) still at the same Drive modifiedTime."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, modified_at FROM transcripts WHERE doc_id = ?",
+                (doc_id,)).fetchone()
+        return bool(row and row[0] == "done" and (modified_at is None or row[1] == modified_at))
+
+    def begin(self, doc_id, content_hash, title=None, modified_at=None):
+        """
+        Entry for this exact content: the existing one (modifiedTime
+        refreshed) if the hash matches, otherwise a fresh one with no steps
+        done.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT content_hash FROM transcripts WHERE doc_id = ?",
+                                   (doc_id,)).fetchone()
+            if row and row[0] == content_hash:
+                self._db.execute(
+                    "UPDATE transcripts SET modified_at = COALESCE(?, modified_at), "
+                    "updated_at = ? WHERE doc_id = ?", (modified_at, now, doc_id))
+            else:
+                if row:
+                    logger.info(f"Transcript {title or doc_id} changed since it was "
+                                f"processed; reprocessing")
+                self._db.execute("DELETE FROM steps WHERE doc_id = ?", (doc_id,))
+                self._db.execute(
+                    "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, 'pending', "
+                    "NULL, NULL, NULL, ?)", (doc_id, title, content_hash, modified_at, now))
+            self._db.commit()
+        return self.get(doc_id)
+
+    def save_intelligence(self, doc_id, intelligence):
+        with self._lock:
+            self._db.execute(
+                "UPDATE transcripts SET intelligence = ?, updated_at = ? WHERE doc_id = ?",
+                (json.dumps(intelligence, default=str), time.time(), doc_id))
+            self._db.commit()
+
+    def mark_done(self, doc_id, step):
+        """Record a finished step; the transcript is done once every step is."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO steps VALUES (?, ?, ?)",
+                             (doc_id, step, now))
+            done = self._db.execute("SELECT COUNT(*) FROM steps WHERE doc_id = ?",
+                                    (doc_id,)).fetchone()[0]
+            status = "done" if done >= len(self.steps) else "partial"
+            self._db.execute(
+                "UPDATE transcripts SET status = ?, failed_step = NULL, error = NULL, "
+                "updated_at = ? WHERE doc_id = ?", (status, now, doc_id))
+            self._db.commit()
+
+    def mark_failed(self, doc_id, step, error):
+        with self._lock:
+            self._db.execute(
+                "UPDATE transcripts SET status = 'partial', failed_step = ?, error = ?, "
+                "updated_at = ? WHERE doc_id = ?", (step, str(error)[:500], time.time(), doc_id))
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._db.execute(
+                "SELECT status, COUNT(*) FROM transcripts GROUP BY status").fetchall())
+        return {"done": counts.get("done", 0), "partial": counts.get("partial", 0),
+                "pending": counts.get("pending", 0), "path": str(self.path)}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,83 @@
+import math
+
+from clay_batcher import ClayBatcher
+from fake_clay import FakeClayClient, make_accounts, run_after
+
+
+class PerItemClay:
+    """Fake Clay without the bulk endpoints."""
+
+    def __init__(self):
+        self.fake = FakeClayClient()
+
+    def search_people(self, domain, name=None, titles=None):
+        return self.fake.search_people(domain, name, titles)
+
+    def enrich_person(self, person_id):
+        return self.fake.enrich_person(person_id)
+
+
+def test_prefetch_coalesces_searches_into_bulk_requests():
+    clay = FakeClayClient()
+    batcher = ClayBatcher(clay, max_batch=10)
+    accounts = [{"domain": f"account{i}.example.com", "name": f"Account {i}"} for i in range(25)]
+    batcher.prefetch(accounts)
+    assert clay.requests == {"search_people": 0, "search_people_bulk": 3,
+                             "enrich_person": 0, "enrich_people_bulk": 0}
+    # Served from the memo, no further requests
+    people = batcher.find_people("ACCOUNT3.example.com")
+    assert people == clay._people("account3.example.com")
+    assert clay.total_requests == 3
+    assert batcher.stats["memo_hits"] == 1
+
+
+def test_pending_duplicates_share_one_future():
+    clay = FakeClayClient()
+    batcher = ClayBatcher(clay)
+    first = batcher.request_people("acme.com")
+    second = batcher.request_people("Acme.com ")
+    assert first is second
+    batcher.flush_searches()
+    assert first.result() == clay._people("acme.com")
+    assert clay.requests["search_people_bulk"] == 1
+    assert batcher.stats["coalesced"] == 1
+
+
+def test_prefetch_skips_accounts_without_a_domain():
+    clay = FakeClayClient()
+    batcher = ClayBatcher(clay)
+    batcher.prefetch([{"name": "No Domain Inc"}, {"domain": "", "name": "Blank"},
+                      {"domain": None, "name": "None"}])
+    assert clay.total_requests == 0
+    assert batcher.stats["search_lookups"] == 0
+    batcher.prefetch([{"name": "No Domain Inc"}, {"domain": "acme.com", "name": "Acme"}])
+    assert clay.requests["search_people_bulk"] == 1
+    assert batcher.stats["search_lookups"] == 1
+
+
+def test_enrichments_are_deduplicated_and_chunked():
+    clay = FakeClayClient()
+    batcher = ClayBatcher(clay, max_batch=25)
+    ids = [f"person-{i}" for i in range(30)]
+    futures = [batcher.request_enrichment(pid) for pid in ids + ids[:5]]
+    batcher.flush_enrichments()
+    assert clay.requests["enrich_people_bulk"] == 2
+    assert clay.requests["enrich_person"] == 0
+    assert futures[-1].result() == {"id": "person-4", "phone": "+1-555-0100"}
+
+
+def test_clients_without_bulk_endpoints_fall_back_per_item():
+    clay = PerItemClay()
+    batcher = ClayBatcher(clay)
+    batcher.prefetch([{"domain": "a.com"}, {"domain": "b.com"}, {"domain": "a.com"}])
+    assert clay.fake.requests["search_people"] == 2
+    assert batcher.stats["search_requests"] == 2
+
+
+def test_batch_run_uses_only_bulk_requests():
+    accounts = make_accounts(60, duplicate_rate=0.2)
+    clay, created = run_after(accounts, latency=0)
+    domains = {a["domain"] for a in accounts}
+    assert clay.requests["search_people"] == clay.requests["enrich_person"] == 0
+    assert clay.requests["search_people_bulk"] == math.ceil(len(domains) / 25)
+    assert clay.requests["enrich_people_bulk"] == math.ceil(created / 25)
@@ -0,0 +1,20 @@
+import numpy as np
+
+from decision_table import DecisionTable
+
+TABLE = {
+    "default": "Nurture",
+    "rules": [
+        {"id": "committee", "when": {"contact_count": {"lt": 2}}, "then": "Build Buying Committee"},
+        {"id": "not_customer", "when": {"is_customer": {"ne": True}}, "then": "Launch Outbound"},
+    ],
+}
+
+
+def test_unknown_facts_fail_every_condition():
+    table = DecisionTable("nba", TABLE)
+    result = table.evaluate({
+        "contact_count": np.array([np.nan, 1, 5, np.nan]),
+        "is_customer": np.array([None, None, False, True], dtype=object),
+    })
+    assert list(result["rule_id"]) == ["default", "committee", "not_customer", "default"]
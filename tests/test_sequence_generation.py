@@ -0,0 +1,74 @@
+import pytest
+
+from enrichment_cache import EnrichmentCache
+from fake_claude import StubClaudeClient
+from sequence_generation import CACHE_SOURCE, CACHE_TTL, PersonalizationGenerator
+
+CADENCE = [{"day": 0, "type": "intro", "label": "Intro"},
+           {"day": 3, "type": "value", "label": "Value"}]
+MESSAGING = {"personas": {"hr_ops": {"hook": "Stop re-entering data."}}}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EnrichmentCache(tmp_path / "generation.sqlite", ttls={CACHE_SOURCE: CACHE_TTL})
+
+
+def make_generator(client, cache, **kwargs):
+    return PersonalizationGenerator(client, MESSAGING, CADENCE, cache=cache,
+                                    poll_seconds=0, **kwargs)
+
+
+def jobs(n, track="hr_ops"):
+    return [({"name": f"Account {i}", "ats_name": "Bullhorn"}, track) for i in range(n)]
+
+
+def test_results_are_memoized_across_runs(cache):
+    client = StubClaudeClient()
+    first = make_generator(client, cache).generate_many(jobs(3))
+    assert client.calls == 3
+    assert first[0] == {"intro": "Noticed Account 0 is scaling onboarding (intro).",
+                        "value": "Noticed Account 0 is scaling onboarding (value)."}
+
+    rerun_client = StubClaudeClient()
+    rerun = make_generator(rerun_client, cache)
+    assert rerun.generate_many(jobs(3)) == first
+    assert rerun_client.calls == 0
+    assert rerun.usage.memo_hits == 3
+
+
+def test_duplicate_jobs_are_sent_once(cache):
+    client = StubClaudeClient()
+    generator = make_generator(client, cache)
+    results = generator.generate_many(jobs(2) + jobs(2))
+    assert client.calls == 2
+    assert generator.usage.deduplicated == 2
+    assert results[:2] == results[2:]
+
+
+def test_small_runs_call_directly(cache):
+    client = StubClaudeClient()
+    generator = make_generator(client, cache, batch_threshold=3)
+    generator.generate_many(jobs(2))
+    assert generator.usage.batches == 0
+    assert client.messages.batches._batches == {}
+
+
+def test_runs_at_the_threshold_use_one_batch(cache):
+    client = StubClaudeClient(batch_polls=2)
+    generator = make_generator(client, cache, batch_threshold=3)
+    results = generator.generate_many(jobs(3))
+    assert generator.usage.batches == 1
+    assert client.messages.batches.cancelled == []
+    assert all(results)
+
+
+def test_batch_past_max_wait_is_cancelled_and_sent_directly(cache):
+    client = StubClaudeClient(batch_polls=None)
+    generator = make_generator(client, cache, batch_threshold=3, max_wait_seconds=0)
+    results = generator.generate_many(jobs(4))
+    assert client.messages.batches.cancelled == ["msgbatch_0001"]
+    # Nothing came back from the cancelled batch, so every job went direct
+    assert client.calls == 4
+    assert [r["intro"] for r in results] == [
+        f"Noticed Account {i} is scaling onboarding (intro)." for i in range(4)]
@@ -0,0 +1,38 @@
+import pytest
+import yaml
+
+from template_renderer import PLACEHOLDER_RE, TEMPLATE_DIR, SequenceRenderer
+
+
+def load_config():
+    with open(TEMPLATE_DIR / "outbound_sequences.yaml") as f:
+        return yaml.safe_load(f)
+
+
+@pytest.mark.parametrize("account", [{"name": "Acme Staffing"},
+                                     {"name": "Acme Staffing", "ats_name": "Bullhorn",
+                                      "industry": "Staffing",
+                                      "similar_company": "Beta Staffing"}])
+def test_every_persona_touch_renders_without_placeholders(account):
+    renderer = SequenceRenderer.load()
+    values = renderer.account_values(account)
+    for track in renderer.personas:
+        sequence = renderer.render(track, values, {"name": "Jo Smith"})
+        assert len(sequence) == len(renderer.cadence)
+        for touch in sequence:
+            for text in (touch["subject"], touch["body"]):
+                assert not PLACEHOLDER_RE.search(text), f"{track}/{touch['type']}: {text!r}"
+
+
+def test_placeholder_in_persona_constant_fails_at_load():
+    config = load_config()
+    config["persona_templates"]["c_suite"]["proof_points"][1] = "$X savings"
+    with pytest.raises(ValueError, match=r"\$X"):
+        SequenceRenderer(config)
+
+
+def test_placeholder_in_fallback_fails_at_load():
+    config = load_config()
+    config["template_variables"]["similar_company"]["fallback"] = "TBD"
+    with pytest.raises(ValueError, match="TBD"):
+        SequenceRenderer(config)
@@ -0,0 +1,39 @@
+import pytest
+
+from title_classifier import TitleClassifier
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return TitleClassifier.from_config()
+
+
+@pytest.mark.parametrize("title, persona", [
+    ("Head of HR", "c_suite"),
+    ("HR Director", "c_suite"),
+    ("Director of Human Resources", "c_suite"),
+    ("VP, HR", "c_suite"),
+    ("Chief People Officer", "c_suite"),
+    ("COO", "c_suite"),
+    ("Chief Operating Officer", "c_suite"),
+    ("Director of HR Operations", "hr_ops"),
+    ("VP HR Operations", "hr_ops"),
+    ("Dir. of Onboarding", "hr_ops"),
+    ("HRIS Manager", "hr_engineer"),
+    ("IT Director", "hr_engineer"),
+    ("Director of Compliance", "compliance"),
+    ("VP Operations", "operations"),
+])
+def test_classifies_persona(classifier, title, persona):
+    assert classifier.classify(title).persona == persona
+
+
+def test_qualifier_lowers_confidence(classifier):
+    assistant = classifier.classify("Assistant to the COO")
+    assert assistant.persona == "c_suite"
+    assert assistant.confidence < classifier.classify("COO").confidence
+
+
+@pytest.mark.parametrize("title", ["Sales Director", "", None])
+def test_unmatched_titles(classifier, title):
+    assert classifier.classify(title) is None
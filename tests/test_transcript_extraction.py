@@ -0,0 +1,46 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from transcript_extraction import TranscriptExtractor, clean_partial, merge_intelligence
+
+TRANSCRIPT = "[00:01] Ann: We need Bullhorn synced to payroll.\n"
+
+
+class ReplyClaude:
+    """Claude stand-in that answers every chunk with the same reply text."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.messages = self
+
+    def create(self, **params):
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=self.reply)])
+
+
+def test_bare_strings_become_objects():
+    partial = clean_partial({"action_items": ["Send the deck"], "next_steps": ["Demo"],
+                             "decisions": ["Pilot in Q3"]})
+    assert partial["action_items"] == [{"task": "Send the deck"}]
+    merged = merge_intelligence([partial])
+    assert merged["next_steps"] == [{"action": "Demo"}]
+    assert merged["decisions"] == ["Pilot in Q3"]
+
+
+@pytest.mark.parametrize("reply", [
+    {"action_items": "Send the deck"},
+    {"decisions": [{"text": "Pilot"}]},
+    {"action_items": [["Send", "deck"]]},
+    {"technical_requirements": ["Bullhorn"]},
+    ["not", "an", "object"],
+])
+def test_wrong_shapes_fail_the_chunk(reply):
+    assert clean_partial(reply) is None
+    assert TranscriptExtractor(ReplyClaude(json.dumps(reply))).extract(TRANSCRIPT) is None
+
+
+def test_string_action_items_extract():
+    reply = json.dumps({"action_items": ["Send the deck"]})
+    result = TranscriptExtractor(ReplyClaude(reply)).extract(TRANSCRIPT)
+    assert result["action_items"] == [{"task": "Send the deck"}]